@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# Compares the time the hand-written SpecifyTokenizer and the PLY-based
+# SpecifyLexer need to tokenize and to parse the specify blocks of a
+# generated library (see generate_library.py) or of the given Verilog
+# files. tests/test_tokenizer.py checks that both produce the same tokens
+# and parse results.
+#
+# Usage: python benchmarks/compare_lexers.py [--modules N] [--seed S]
+#        [--input file.v ...]
+
+import argparse
+import os
+import tempfile
+import time
+
+from generate_library import write_library
+from verilog_timings_parser.extract_timings import (
+    VerilogSpecifyExtractor, parse_specify_block)
+from verilog_timings_parser.lex import SpecifyLexer
+from verilog_timings_parser.tokenizer import SpecifyTokenizer
+from verilog_timings_parser.yacc import Parser
+
+
+def extract_blocks(paths):
+    blocks = dict()
+    for path in paths:
+        extractor = VerilogSpecifyExtractor([])
+        extractor.extract_specify_blocks_from_file(path)
+        blocks.update(extractor.specifyblocks)
+    return blocks
+
+
+def time_tokenize(lexer, texts):
+    start = time.perf_counter()
+    for text in texts:
+        lexer.lexer.lineno = 1
+        lexer.lexer.input(text)
+        while lexer.lexer.token():
+            pass
+    return time.perf_counter() - start
+
+
+def time_parse(parser, blocks):
+    start = time.perf_counter()
+    for block in blocks:
+        parse_specify_block(parser, block)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--modules",
+        help="Number of modules in the generated library",
+        type=int,
+        default=2000)
+    parser.add_argument(
+        "--seed",
+        help="Seed of the generated library",
+        type=int,
+        default=0)
+    parser.add_argument(
+        "--input",
+        help="Measure the given Verilog files instead of a generated library",
+        nargs="+")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        if args.input:
+            paths = args.input
+        else:
+            paths = [os.path.join(tmpdir, 'library.v')]
+            write_library(paths[0], args.modules, seed=args.seed)
+        blocks = extract_blocks(paths)
+
+    texts = ['\n'.join(block) for block in blocks.values()]
+    lines = sum(len(block) for block in blocks.values())
+    print('{:10} {:>14} {:>14}'.format('backend', 'tokenize [s]', 'parse [s]'))
+    for name, lexer, p in (('ply', SpecifyLexer(), Parser(lexer='ply')),
+                           ('fast', SpecifyTokenizer(), Parser(lexer='fast'))):
+        print('{:10} {:14.3f} {:14.3f}'.format(
+            name,
+            time_tokenize(lexer, texts),
+            time_parse(p, blocks.values())))
+    print('({} lines in {} blocks)'.format(lines, len(blocks)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# Compares the memory taken by parse results stored in the __slots__ based
+# model classes against the same results converted to the plain dicts and
+# lists the parser used to produce.
+#
+# Usage: python benchmarks/datamodel_memory.py [number-of-modules]
+
+import sys
+import tracemalloc
+
+from verilog_timings_parser.model import as_dicts
+from verilog_timings_parser.yacc import Parser
+
+SPECIFYBLOCK = '''specify
+specparam tpd = 0.1;
+(A => Y) = (tpd, 0.2);
+(B => Y) = (0.1:0.15:0.2, 0.2:0.25:0.3);
+(C => Y) = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6);
+if (A == 1'b1) (B => Y) = (0.1, 0.2, 0.3);
+ifnone (B => Y) = 0.3;
+(posedge CLK => (Q : D)) = (0.3, 0.35);
+$setuphold (posedge CLK, posedge D, 0.1:0.2:0.3, 0.05, notifier);
+$recrem (posedge RESET_B, posedge CLK, 0.1, 0.2, notifier);
+$width (posedge CLK, 1.0);
+endspecify'''
+
+
+def parse_all(parser, count):
+    results = []
+    for _ in range(count):
+        parser.parse(SPECIFYBLOCK)
+        results.append({
+            'specparams': parser.specparams,
+            'constraintchecks': parser.constraintchecks,
+            'pathdelays': parser.pathdelays,
+            'ifstatements': parser.ifstatements
+        })
+    return results
+
+
+def measure(build):
+    tracemalloc.start()
+    results = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return results, size
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    parser = Parser()
+    _, slotssize = measure(lambda: parse_all(parser, count))
+    results = parse_all(parser, count)
+    # the slots figure covers everything built while parsing (names,
+    # numbers, ...), the dict figure only the containers as_dicts creates on
+    # top of them - as_dicts copies the delays of every transition into its
+    # own list, while the old parser shared the lists of repeated delays
+    _, dictsize = measure(lambda: as_dicts(results))
+    print('modules:        {}'.format(count))
+    print('dict model:     {:10.1f} KiB'.format(dictsize / 1024))
+    print('slots model:    {:10.1f} KiB'.format(slotssize / 1024))
+    print('ratio:          {:10.1f}x'.format(dictsize / slotssize))
+
+
+if __name__ == '__main__':
+    main()
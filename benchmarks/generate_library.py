@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# Generates a synthetic cell library with specify blocks for benchmarking.
+# The output only depends on the arguments - the same seed always gives the
+# same file. Every module has:
+#
+# * specparams used in the delays,
+# * path delays with all delay list forms (1, 2, 3, 6 and 12 delays, with
+#   and without min:typ:max triples), plain, edge-sensitive and data paths,
+# * if/ifnone chains for some of the paths,
+# * $setup/$hold/$setuphold/$recrem/$width/$period checks, including
+#   $setuphold and $recrem with timestamp/timecheck conditions and delayed
+#   signals,
+# * line and block comments and `ifdef noise, both outside and inside the
+#   specify block.
+#
+# Usage: python benchmarks/generate_library.py modules [paths-per-module]
+#        [--seed N] [-o output.v]
+
+import argparse
+import random
+import sys
+
+DELAYFORMS = (1, 2, 3, 6, 12)
+
+
+class LibraryGenerator(object):
+    def __init__(self, paths=8, seed=0):
+        self.paths = paths
+        self.random = random.Random(seed)
+
+    def value(self):
+        return '{:.3f}'.format(self.random.uniform(0.01, 2.0))
+
+    def delval(self, specparams):
+        choice = self.random.random()
+        if choice < 0.2 and specparams:
+            return self.random.choice(specparams)
+        if choice < 0.5:
+            low, typ, high = sorted(self.value() for _ in range(3))
+            return '{}:{}:{}'.format(low, typ, high)
+        return self.value()
+
+    def delaylist(self, form, specparams):
+        delays = [self.delval(specparams) for _ in range(form)]
+        if form == 1:
+            return delays[0]
+        return '({})'.format(', '.join(delays))
+
+    def module(self, index):
+        r = self.random
+        inputs = ['A{}'.format(i) for i in range(r.randint(2, 5))]
+        outputs = ['Y', 'Q']
+        ports = inputs + ['CLK', 'D', 'RESET_B'] + outputs
+        lines = []
+        lines.append('// cell {} - generated, do not edit'.format(index))
+        lines.append('module cell_{} ({});'.format(index, ', '.join(ports)))
+        lines.append('  input {}, CLK, D, RESET_B; /* inputs of'.format(
+            ', '.join(inputs)))
+        lines.append('     the cell */ output Y, Q;')
+        lines.append('`ifdef SC_USE_PG_PIN')
+        lines.append('  input VPWR;')
+        lines.append('  input VGND;')
+        lines.append('`endif')
+        lines.append('  specify')
+        specparams = []
+        for i in range(r.randint(1, 3)):
+            name = 'tp{}'.format(i)
+            lines.append('    specparam {} = {};'.format(name, self.value()))
+            specparams.append(name)
+        for i in range(self.paths):
+            form = DELAYFORMS[(index + i) % len(DELAYFORMS)]
+            source = r.choice(inputs)
+            output = r.choice(outputs)
+            kind = r.random()
+            if kind < 0.15:
+                path = '(posedge CLK => ({} : D))'.format(output)
+            elif kind < 0.25:
+                path = '(negedge RESET_B => ({} +: RESET_B))'.format(output)
+            else:
+                path = '({} {} {})'.format(
+                    source, r.choice(('=>', '*>')), output)
+            delays = self.delaylist(form, specparams)
+            if kind >= 0.25 and r.random() < 0.3:
+                # if chain on a plain path, closed with ifnone
+                other = r.choice([i for i in inputs if i != source])
+                lines.append("    if ({} == 1'b1) {} = {};".format(
+                    other, path, delays))
+                lines.append('    if (!{}) {} = {};'.format(
+                    other, path, self.delaylist(form, specparams)))
+                lines.append('    ifnone {} = {}; // default'.format(
+                    path, self.delaylist(form, specparams)))
+            else:
+                lines.append('    {} = {};'.format(path, delays))
+        lines.append(
+            '    $setuphold (posedge CLK, posedge D, {}, {}, notifier, '
+            'RESET_B, RESET_B, CLK_delayed, D_delayed);'.format(
+                self.delval(specparams), self.delval(specparams)))
+        lines.append(
+            '    $setuphold (posedge CLK, negedge D &&& RESET_B, {}, {}, '
+            'notifier);'.format(self.value(), self.value()))
+        lines.append(
+            '    $recrem (posedge RESET_B, posedge CLK, {}, {}, notifier, '
+            'D, D, RESET_B_delayed, CLK_delayed);'.format(
+                self.value(), self.value()))
+        lines.append('    $setup (D, posedge CLK, {});'.format(self.value()))
+        lines.append('    $hold (posedge CLK, D, {});'.format(self.value()))
+        lines.append('    $width (posedge CLK &&& RESET_B, {}, 0, '
+                     'notifier);'.format(self.value()))
+        lines.append('    $width (negedge CLK, {});'.format(self.value()))
+        lines.append('    $period (posedge CLK, {});'.format(self.value()))
+        lines.append('`ifdef FUNCTIONAL')
+        lines.append('    ({} => Y) = 0;'.format(inputs[0]))
+        lines.append('`else')
+        lines.append('    /* timing-only */ ({} => Q) = {};'.format(
+            inputs[-1], self.value()))
+        lines.append('`endif')
+        lines.append('  endspecify')
+        lines.append('  // behavioural model')
+        lines.append('  assign Y = {};'.format(' & '.join(inputs)))
+        lines.append('endmodule')
+        lines.append('')
+        return lines
+
+    def library(self, modules):
+        yield '`timescale 1ns/1ps'
+        yield ''
+        for index in range(modules):
+            yield from self.module(index)
+
+
+def generate_library(modules, paths=8, seed=0):
+    # Yields the lines of a library with `modules` cells and `paths` path
+    # delays in each of them
+    return LibraryGenerator(paths, seed).library(modules)
+
+
+def write_library(path, modules, paths=8, seed=0):
+    # Writes the library to `path`, returns the number of lines
+    count = 0
+    with open(path, 'w') as f:
+        for line in generate_library(modules, paths, seed):
+            f.write(line)
+            f.write('\n')
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("modules", type=int)
+    parser.add_argument("paths", type=int, nargs="?", default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", type=str)
+    args = parser.parse_args()
+    if args.output:
+        write_library(args.output, args.modules, args.paths, args.seed)
+    else:
+        for line in generate_library(args.modules, args.paths, args.seed):
+            sys.stdout.write(line + '\n')
+
+
+if __name__ == '__main__':
+    main()
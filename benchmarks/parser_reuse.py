@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# Compares the per-module cost of parsing specify blocks with a freshly built
+# parser for every module (old behaviour) against a single reused parser.
+#
+# Usage: python benchmarks/parser_reuse.py [number-of-modules]
+
+import sys
+import time
+
+from verilog_timings_parser.yacc import Parser
+
+SPECIFYBLOCK = '''specify
+specparam tpd = 0.1;
+(A => Y) = (tpd, 0.2);
+(B => Y) = (0.1:0.15:0.2, 0.2:0.25:0.3);
+if (A == 1'b1) (B => Y) = (0.1, 0.2, 0.3);
+ifnone (B => Y) = 0.3;
+(posedge CLK => (Q : D)) = (0.3, 0.35);
+$setuphold (posedge CLK, posedge D, 0.1:0.2:0.3, 0.05, notifier);
+$width (posedge CLK, 1.0);
+endspecify'''
+
+
+def bench_new_parser(count):
+    start = time.perf_counter()
+    for _ in range(count):
+        p = Parser(tablecache=False)
+        p.parse(SPECIFYBLOCK)
+    return (time.perf_counter() - start) / count
+
+
+def bench_reused_parser(count):
+    p = Parser()
+    start = time.perf_counter()
+    for _ in range(count):
+        p.parse(SPECIFYBLOCK)
+    return (time.perf_counter() - start) / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    new = bench_new_parser(count)
+    reused = bench_reused_parser(count)
+    print('modules:              {}'.format(count))
+    print('new parser / module:  {:10.1f} us'.format(new * 1e6))
+    print('reused parser/module: {:10.1f} us'.format(reused * 1e6))
+    print('speedup:              {:10.1f}x'.format(new / reused))
+
+
+if __name__ == '__main__':
+    main()
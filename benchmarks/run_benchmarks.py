@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# Runs the conversion pipeline stage by stage on a generated library (see
+# generate_library.py) or on given Verilog files, and reports the throughput
+# and memory use of each stage:
+#
+# * clean   - removing comments and joining lines of the whole file,
+# * extract - finding and cleaning specify blocks (the default mmap reader),
+# * lex     - tokenizing the specify blocks,
+# * parse   - parsing the specify blocks (includes lexing),
+# * convert - converting parse results to Liberty groups,
+# * write   - writing the Liberty file,
+# * sdf     - writing the SDF file.
+#
+# Every stage reports lines/s (of the input processed by the stage - whole
+# files for clean/extract, specify blocks for the rest), modules/s, peak RSS
+# and how much the peak grew over the RSS at the start of the stage. On Linux
+# the peak is reset before each stage, elsewhere it is the peak of the whole
+# run so far. Results are saved as JSON, and can be compared with a previous
+# run.
+#
+# Usage: python benchmarks/run_benchmarks.py [--modules N] [--paths M]
+#        [--seed S] [--repeat R] [--input file.v ...] [-o results.json]
+#        [--compare previous.json]
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+
+import ply
+
+from generate_library import write_library
+from verilog_timings_parser import extract_timings
+from verilog_timings_parser.convert_verilog_timings_to_liberty import (
+    iter_libertyjson_cells, write_liberty)
+from verilog_timings_parser.sdf_writer import SDFWriter
+
+STAGES = ('clean', 'extract', 'lex', 'parse', 'convert', 'write', 'sdf')
+
+
+def reset_peak_rss():
+    # clears VmHWM, returns False where this is not supported
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def read_status_kib(field):
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def current_rss_kib():
+    rss = read_status_kib('VmRSS')
+    if rss is None:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss
+
+
+def peak_rss_kib():
+    peak = read_status_kib('VmHWM')
+    if peak is None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            peak //= 1024
+    return peak
+
+
+class Pipeline(object):
+    # Runs the stages in order, each one working on the results of the
+    # previous ones
+
+    def __init__(self, paths, outputdir):
+        self.paths = paths
+        self.outputdir = outputdir
+        self.filelines = 0
+        for path in paths:
+            with open(path, 'rb') as f:
+                self.filelines += sum(1 for _ in f)
+        self.specifyblocks = None
+        self.parsed = None
+        self.cells = None
+
+    def blocklines(self):
+        return sum(len(block) for block in self.specifyblocks.values())
+
+    def clean(self):
+        modules = 0
+        for path in self.paths:
+            with open(path, 'r') as f:
+                for line in extract_timings.iter_clean_verilog_lines(f):
+                    if line.startswith('module'):
+                        modules += 1
+        return self.filelines, modules
+
+    def extract(self):
+        self.specifyblocks = dict()
+        for path in self.paths:
+            extractor = extract_timings.VerilogSpecifyExtractor([])
+            extractor.extract_specify_blocks_from_file(path)
+            self.specifyblocks.update(extractor.specifyblocks)
+        return self.filelines, len(self.specifyblocks)
+
+    def lex(self):
+        lexer = extract_timings.get_parser().lexer.lexer
+        for block in self.specifyblocks.values():
+            lexer.lineno = 1
+            lexer.input('\n'.join(block))
+            while lexer.token():
+                pass
+        return self.blocklines(), len(self.specifyblocks)
+
+    def parse(self):
+        p = extract_timings.get_parser()
+        self.parsed = {
+            module: extract_timings.parse_specify_block(p, block)
+            for module, block in self.specifyblocks.items()
+        }
+        return self.blocklines(), len(self.parsed)
+
+    def convert(self):
+        self.cells = list(iter_libertyjson_cells(self.parsed))
+        return self.blocklines(), len(self.parsed)
+
+    def write(self):
+        with open(os.path.join(self.outputdir, 'out.lib'), 'w') as f:
+            write_liberty('benchmark', self.parsed, f)
+        return self.blocklines(), len(self.parsed)
+
+    def sdf(self):
+        with open(os.path.join(self.outputdir, 'out.sdf'), 'w') as f:
+            SDFWriter(f).write_sdf('benchmark', self.parsed)
+        return self.blocklines(), len(self.parsed)
+
+
+def run(paths, repeat):
+    results = dict()
+    with tempfile.TemporaryDirectory() as outputdir:
+        pipeline = Pipeline(paths, outputdir)
+        # builds the lexer and parser tables outside of the measured stages
+        extract_timings.get_parser()
+        for stage in STAGES:
+            best = None
+            for _ in range(repeat):
+                startrss = current_rss_kib()
+                peakreset = reset_peak_rss()
+                start = time.perf_counter()
+                lines, modules = getattr(pipeline, stage)()
+                seconds = time.perf_counter() - start
+                peak = peak_rss_kib()
+                if best is None or seconds < best['seconds']:
+                    best = {
+                        'seconds': seconds,
+                        'lines': lines,
+                        'modules': modules,
+                        'lines_per_s': lines / seconds if seconds else None,
+                        'modules_per_s':
+                            modules / seconds if seconds else None,
+                        'peak_rss_kib': peak,
+                        'peak_rss_growth_kib': max(0, peak - startrss),
+                        'peak_rss_per_stage': peakreset
+                    }
+            results[stage] = best
+    return results
+
+
+def print_results(results, previous=None):
+    header = '{:8} {:>10} {:>14} {:>12} {:>12} {:>12}'.format(
+        'stage', 'time [s]', 'lines/s', 'modules/s', 'peak [KiB]',
+        'growth [KiB]')
+    if previous:
+        header += ' {:>9}'.format('speedup')
+    print(header)
+    for stage, result in results.items():
+        line = '{:8} {:10.3f} {:14.0f} {:12.0f} {:12} {:12}'.format(
+            stage,
+            result['seconds'],
+            result['lines_per_s'] or 0,
+            result['modules_per_s'] or 0,
+            result['peak_rss_kib'],
+            result['peak_rss_growth_kib'])
+        if previous:
+            old = previous.get(stage)
+            if old and result['seconds']:
+                line += ' {:8.2f}x'.format(old['seconds'] / result['seconds'])
+            else:
+                line += ' {:>9}'.format('-')
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--modules",
+        help="Number of modules in the generated library",
+        type=int,
+        default=2000)
+    parser.add_argument(
+        "--paths",
+        help="Number of path delays per generated module",
+        type=int,
+        default=8)
+    parser.add_argument(
+        "--seed",
+        help="Seed of the generated library",
+        type=int,
+        default=0)
+    parser.add_argument(
+        "--repeat",
+        help="Number of runs of every stage, the fastest one is reported",
+        type=int,
+        default=1)
+    parser.add_argument(
+        "--input",
+        help="Benchmark on the given Verilog files instead of a generated library",  # noqa: E501
+        nargs="+")
+    parser.add_argument(
+        "-o", "--output",
+        help="Save the results to the given JSON file")
+    parser.add_argument(
+        "--compare",
+        help="Print the speedup of each stage over the results in the given JSON file")  # noqa: E501
+    args = parser.parse_args()
+
+    meta = {
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'ply': ply.__version__,
+        'repeat': args.repeat
+    }
+    with tempfile.TemporaryDirectory() as tmpdir:
+        if args.input:
+            paths = args.input
+            meta['input'] = paths
+        else:
+            paths = [os.path.join(tmpdir, 'library.v')]
+            write_library(paths[0], args.modules, args.paths, args.seed)
+            meta['generated'] = {
+                'modules': args.modules,
+                'paths': args.paths,
+                'seed': args.seed
+            }
+        results = run(paths, args.repeat)
+
+    previous = None
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            previous = json.load(f)['stages']
+    print_results(results, previous)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'meta': meta, 'stages': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -12,12 +12,23 @@ setuptools.setup(
     author="Antmicro Ltd.",
     author_email="contact@antmicro.com",
     entry_points={
-        'console_scripts': ['verilog-timings-to-liberty=verilog_timings_parser.convert_verilog_timings_to_liberty:main']  # noqa: E501
+        'console_scripts': [
+            'verilog-timings-to-liberty=verilog_timings_parser.convert_verilog_timings_to_liberty:main',  # noqa: E501
+            'verilog-timings-to-sdf=verilog_timings_parser.convert_verilog_timings_to_sdf:main',  # noqa: E501
+            'verilog-timings-daemon=verilog_timings_parser.daemon:main',
+        ]
     },
     install_requires=[
-        'quicklogic_timings_importer @ git+https://github.com/antmicro/quicklogic-timings-importer#egg=quicklogic_timings_importer',  # noqa: E501
         'ply',
     ],
+    extras_require={
+        'quicklogic': [
+            'quicklogic_timings_importer @ git+https://github.com/antmicro/quicklogic-timings-importer#egg=quicklogic_timings_importer',  # noqa: E501
+        ],
+        'numpy': [
+            'numpy',
+        ],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: Apache Software License",
@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# the deterministic library generator of the benchmarks provides the inputs
+# covering every construct the parser supports
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                    'benchmarks'))
+
+from generate_library import write_library  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def library(tmp_path_factory):
+    # path of a generated library
+    path = str(tmp_path_factory.mktemp('library') / 'library.v')
+    write_library(path, 100, seed=0)
+    return path
@@ -0,0 +1,21 @@
+module dff (D, CLK, RESET_B, Q, Q_N);
+input D, CLK, RESET_B;
+output Q, Q_N;
+specify
+    (posedge CLK => (Q : D)) = (0.3:0.4:0.5, 0.35:0.45:0.55);
+    (posedge CLK => (Q_N -: D)) = (0.3:0.4:0.5, 0.35:0.45:0.55);
+    if (RESET_B) (CLK => Q) = 0.2;
+    ifnone (CLK => Q) = 0.25;
+    (RESET_B -=> Q_N) = (0.1:0.15:0.2);
+    $setuphold(posedge CLK, D, 0.1:0.12:0.15, 0.05:0.06:0.07);
+    $width(negedge RESET_B &&& CLK, 1.0);
+endspecify
+endmodule
+module buf8 (A, Y);
+input [7:0] A;
+output [3:0] Y;
+specify
+    (A[3:0] => Y[3:0]) = (0.1, 0.2);
+    (A[7:6] *> Y[0]) = 0.3;
+endspecify
+endmodule
@@ -0,0 +1,44 @@
+import os
+
+from verilog_timings_parser.cache import TableCache
+from verilog_timings_parser.yacc import Parser
+
+
+def tables(directory):
+    return sorted(
+        entry for entry in os.listdir(str(directory))
+        if entry.startswith(('lextab_', 'parsetab_')))
+
+
+def test_tables_of_other_versions_are_kept(tmp_path):
+    # tables of another installed version sharing the directory
+    other = ['lextab_{}.py'.format('0' * 32),
+             'parsetab_{}.pickle'.format('0' * 32)]
+    for entry in other:
+        (tmp_path / entry).write_text('')
+    Parser(tablecache=TableCache(str(tmp_path)), lexer='ply')
+    built = [entry for entry in tables(tmp_path) if entry not in other]
+    assert len(built) == 2
+    assert tables(tmp_path) == sorted(other + built)
+    # the cached tables are used by the next parser
+    Parser(tablecache=TableCache(str(tmp_path)), lexer='ply')
+    assert tables(tmp_path) == sorted(other + built)
+
+
+def test_least_recently_used_tables_are_pruned(tmp_path):
+    cache = TableCache(str(tmp_path))
+    stale = []
+    for index in range(cache.MAX_TABLES + 2):
+        for entry in ('lextab_{:032d}.py'.format(index),
+                      'parsetab_{:032d}.pickle'.format(index)):
+            (tmp_path / entry).write_text('')
+            os.utime(str(tmp_path / entry), (index, index))
+            stale.append(entry)
+    Parser(tablecache=cache, lexer='ply')
+    remaining = tables(tmp_path)
+    assert len(remaining) == 2 * cache.MAX_TABLES
+    # the oldest ones are removed, the newest stale ones and the built
+    # tables are kept
+    assert stale[:6] == [entry for entry in stale[:6]
+                         if entry not in remaining]
+    assert all(entry in remaining for entry in stale[6:])
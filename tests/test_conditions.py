@@ -0,0 +1,62 @@
+import pickle
+
+import pytest
+
+from verilog_timings_parser.conditions import Binary, Not, Signal
+from verilog_timings_parser.extract_timings import (
+    get_parser, parse_specify_block)
+
+# condition -> (Verilog text, Liberty `when`)
+CONDITIONS = [
+    ("A == 1'b1", ("A==1'b1", 'A')),
+    ("A == 1'b0", ("A==1'b0", '!A')),
+    ("1'b0 == A", ("1'b0==A", '!A')),
+    ('A == B', ('A==B', '!(A^B)')),
+    ('A === B', ('A===B', '!(A^B)')),
+    ('A && B', ('A&&B', 'A&B')),
+    ('A & B', ('A&B', 'A&B')),
+    ('~A', ('~A', '!A')),
+    ('!A && ~B', ('!A&&~B', '!A&!B')),
+    ("~(A == 1'b0)", ("~(A==1'b0)", '!(!A)')),
+    ('!(A && B)', ('!(A&&B)', '!(A&B)')),
+    ('(A && B) && C', ('(A&&B)&&C', '(A&B)&C')),
+    ('~(A == B)', ('~(A==B)', '!(!(A^B))')),
+]
+
+
+def conditions(lines):
+    parsed = parse_specify_block(
+        get_parser(), ['specify'] + lines + ['endspecify'])
+    return [
+        pathdelay['cond']
+        for paths in parsed['ifstatements'].values() for pathdelay in paths
+    ]
+
+
+@pytest.mark.parametrize('source, expected', CONDITIONS)
+def test_condition_rendering(source, expected):
+    cond, = conditions(['if ({}) (A => Y) = 1.0;'.format(source)])
+    assert (str(cond), cond.liberty()) == expected
+
+
+def test_ifnone():
+    *_, ifnone = conditions([
+        "if (A == 1'b1) (B => Y) = 1.0;",
+        'if (C && D) (B => Y) = 2.0;',
+        'ifnone (B => Y) = 3.0;',
+    ])
+    assert str(ifnone) == "!(A==1'b1)&!(C&&D)"
+    assert ifnone.liberty() == '!(A)&!(C&D)'
+
+
+def test_conditions_are_shared():
+    # equal conditions and sub-expressions are the same objects
+    first, second, third = conditions([
+        'if (A && !B) (A => Y) = 1.0;',
+        'if (A && !B) (C => Y) = 2.0;',
+        'if (!B) (D => Y) = 3.0;',
+    ])
+    assert first is second
+    assert first is Binary('&&', Signal('A'), Not('!', Signal('B')))
+    assert first.args[2] is third
+    assert pickle.loads(pickle.dumps(first)) is first
@@ -0,0 +1,126 @@
+# Converting parse results must not modify them: the specify blocks of a
+# generated library are parsed once and converted repeatedly to every output
+# (Liberty with min/typ/max values, per-corner Liberty, SDF, the TimingDB and
+# TimingArcs). The parse results must stay unchanged and every output
+# identical to its first run. Both the frozen parse results and mutable
+# copies of them (plain lists and dicts, like the parser returned before
+# model.freeze) are checked.
+
+import io
+import itertools
+import pickle
+from collections import defaultdict
+
+import pytest
+
+from verilog_timings_parser.convert_verilog_timings_to_liberty import (
+    CORNERS, write_liberty, write_liberty_corners)
+from verilog_timings_parser.extract_timings import VerilogLibraryExtractor
+from verilog_timings_parser.sdf_writer import SDFWriter
+from verilog_timings_parser.timingdb import TimingDB
+
+RUNS = 2
+
+# vector paths and conditions on top of the generated library
+VECTORS = '''module vectors (A, B, C, CLK, Y, Z);
+specify
+    (A[7:0] => Y[7:0]) = (1.0:1.5:2.0, 2.0:2.5:3.0);
+    (B[3:0] *> Z[1:0]) = 0.5;
+    if (C) (A[3:0] *> Z[0:1]) = 0.7;
+    ifnone (A[3:0] *> Z[0:1]) = 0.8;
+    $setup(A[1], posedge CLK &&& C, 0.1);
+endspecify
+endmodule
+'''
+
+
+def thaw(parsedspecifyblocks):
+    # mutable copies of the containers, sharing the entries
+    return {
+        module: {
+            'specparams': dict(entry['specparams']),
+            'constraintchecks': list(entry['constraintchecks']),
+            'pathdelays': list(entry['pathdelays']),
+            'ifstatements': defaultdict(list, {
+                key: list(paths)
+                for key, paths in entry['ifstatements'].items()})
+        } for module, entry in parsedspecifyblocks.items()
+    }
+
+
+def liberty(parsed):
+    stream = io.StringIO()
+    write_liberty('library', parsed, stream)
+    return stream.getvalue()
+
+
+def corners(parsed):
+    streams = [io.StringIO() for _ in CORNERS]
+    write_liberty_corners('library', parsed, streams, CORNERS)
+    return [stream.getvalue() for stream in streams]
+
+
+def sdf(parsed):
+    stream = io.StringIO()
+    SDFWriter(stream).write_sdf('design', parsed, '1ns')
+    return stream.getvalue()
+
+
+def timingdb(parsed):
+    return [
+        (arc.cell, arc.kind, arc.related_pin, arc.pin, arc.edge,
+         arc.related_edge, str(arc.cond), repr(arc.value))
+        for arc in TimingDB.from_parsed(parsed)
+    ]
+
+
+def timingarcs(parsed):
+    pytest.importorskip('numpy')
+    from verilog_timings_parser.columnar import TimingArcs
+    arcs = TimingArcs.from_parsed(parsed)
+    return [column.tolist() for column in (
+        arcs.cell, arcs.input, arcs.output, arcs.edge, arcs.cond, arcs.kind,
+        arcs.delays)]
+
+
+@pytest.fixture(scope='module')
+def parsed(library, tmp_path_factory):
+    vectors = tmp_path_factory.mktemp('vectors') / 'vectors.v'
+    vectors.write_text(VECTORS)
+    extractor = VerilogLibraryExtractor([library, str(vectors)])
+    extractor.parse()
+    return extractor.parsedspecifyblocks
+
+
+@pytest.mark.parametrize('convert', [
+    liberty, corners, sdf, timingdb, timingarcs])
+@pytest.mark.parametrize('mutable', [False, True])
+def test_conversion_is_pure(parsed, convert, mutable):
+    results = thaw(parsed) if mutable else parsed
+    snapshot = pickle.dumps(results, pickle.HIGHEST_PROTOCOL)
+    first = convert(results)
+    for _ in range(RUNS - 1):
+        assert pickle.dumps(results, pickle.HIGHEST_PROTOCOL) == snapshot
+        assert convert(results) == first
+    assert pickle.dumps(results, pickle.HIGHEST_PROTOCOL) == snapshot
+
+
+def test_parse_results_are_read_only(parsed):
+    for entry in parsed.values():
+        paths = itertools.chain(
+            entry['pathdelays'], *entry['ifstatements'].values())
+        for pathdelay in paths:
+            with pytest.raises(TypeError):
+                pathdelay['output_port'] = 'X'
+            with pytest.raises(TypeError):
+                pathdelay.cond = None
+        for check in entry['constraintchecks']:
+            event = check['reference_event']
+            with pytest.raises(TypeError):
+                check['notifier'] = 'X'
+            with pytest.raises(TypeError):
+                event['edge'] = None
+            with pytest.raises(AttributeError):
+                event['signals'].append('X')
+        with pytest.raises(TypeError):
+            entry['pathdelays'] += ()
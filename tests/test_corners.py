@@ -0,0 +1,56 @@
+import re
+
+import pytest
+
+from verilog_timings_parser.convert_verilog_timings_to_liberty import (
+    CORNERS, corner_value, main)
+
+CELLS = '''module buf (A, Y);
+specify
+    (A => Y) = (1.0:2.0:3.0, 4.0:5.0:6.0);
+endspecify
+endmodule
+module inv (A, Y);
+specify
+    (A => Y) = (2.0:1.5:3.5);
+endspecify
+endmodule
+'''
+
+# min:typ:max rise delay of every cell
+RISE = {'buf': (1.0, 2.0, 3.0), 'inv': (2.0, 1.5, 3.5)}
+
+_recell = re.compile(r'cell \("(?P<name>\w+)"\) \{(?P<body>.*?)\n    \}',
+                     re.DOTALL)
+
+
+def intrinsic_rise(text):
+    # cell -> set of the intrinsic_rise values of its timing groups
+    return {
+        match.group('name'): set(map(float, re.findall(
+            r'intrinsic_rise : ([0-9.]+);', match.group('body'))))
+        for match in _recell.finditer(text)
+    }
+
+
+@pytest.mark.parametrize('corners', [CORNERS, ('max', 'min'), ('typ',)])
+def test_corner_libraries(tmp_path, corners):
+    source = tmp_path / 'cells.v'
+    source.write_text(CELLS)
+    main([str(source), 'library', str(tmp_path / 'out.lib'), '--no-cache',
+          '--corners', ','.join(corners)])
+    assert sorted(path.name for path in tmp_path.glob('*.lib')) == sorted(
+        'out.{}.lib'.format(corner) for corner in corners)
+    for corner in corners:
+        text = (tmp_path / 'out.{}.lib'.format(corner)).read_text()
+        assert text.startswith('library ("library_{}") {{'.format(corner))
+        assert '_min :' not in text and '_max :' not in text
+        assert intrinsic_rise(text) == {
+            cell: {corner_value(triple, corner)}
+            for cell, triple in RISE.items()
+        }
+
+
+def test_typ_falls_back_to_min():
+    assert [corner_value(RISE['inv'], corner) for corner in CORNERS] == [
+        2.0, 2.0, 3.5]
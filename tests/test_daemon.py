@@ -0,0 +1,57 @@
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+from verilog_timings_parser.convert_verilog_timings_to_liberty import main
+from verilog_timings_parser.daemon import (
+    ConversionServer, _send_request, run_client)
+
+CELLS = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'data', 'cells.v')
+
+TIMEOUT = 0.5
+
+
+@pytest.fixture
+def server(tmp_path):
+    path = str(tmp_path / 'daemon.sock')
+    thread = threading.Thread(
+        target=ConversionServer(path, timeout=TIMEOUT).serve_forever)
+    thread.start()
+    deadline = time.monotonic() + 30
+    while not os.path.exists(path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    yield path
+    if thread.is_alive():
+        _send_request(path, {'command': 'stop'})
+        thread.join()
+    assert not os.path.exists(path)
+
+
+def test_conversion_through_daemon(server, tmp_path, capsys):
+    # a client that connects without sending its request must not hold up
+    # the others - it is closed after a while anyway, so a server without
+    # the timeout fails the test instead of hanging
+    stalled = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stalled.connect(server)
+    closer = threading.Timer(20, stalled.close)
+    closer.start()
+    try:
+        start = time.monotonic()
+        output = tmp_path / 'daemon.lib'
+        assert run_client(
+            server, 'liberty',
+            [CELLS, 'library', str(output), '--no-cache']) == 0
+        assert time.monotonic() - start < 10
+    finally:
+        closer.cancel()
+        stalled.close()
+
+    expected = tmp_path / 'local.lib'
+    main([CELLS, 'library', str(expected), '--no-cache'])
+    assert output.read_text() == expected.read_text()
+
+    assert _send_request(server, {'command': 'stop'}) == {'status': 0}
@@ -0,0 +1,150 @@
+import io
+
+import pytest
+
+from verilog_timings_parser.cache import ResultCache
+from verilog_timings_parser.extract_timings import (
+    VerilogLibraryExtractor, VerilogSpecifyExtractor, iter_clean_verilog_lines)
+from verilog_timings_parser.stats import Stats
+
+MODULE = '''module {name} (A, Z);
+input A;
+output Z;
+specify
+    (A => Z) = ({rise}, {fall});
+endspecify
+endmodule
+'''
+
+
+def write_module(path, name, rise, fall):
+    path.write_text(MODULE.format(name=name, rise=rise, fall=fall))
+    return str(path)
+
+
+def rise_delay(extractor, module):
+    pathdelay = extractor.parsedspecifyblocks[module]['pathdelays'][0]
+    return float(pathdelay['delaylist']['rise'].min)
+
+
+def parse(paths, jobs, cachedir, duplicates='last'):
+    extractor = VerilogLibraryExtractor(
+        paths,
+        duplicates=duplicates,
+        resultcache=ResultCache(str(cachedir)))
+    extractor.parse(jobs)
+    return extractor
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+@pytest.mark.parametrize('warm', ['none', 'first', 'last'])
+def test_duplicate_cells_last_with_cache(tmp_path, jobs, warm):
+    # the definition from the last file wins, whichever of the definitions
+    # are already cached, and every definition is cached under its own key
+    first = write_module(tmp_path / 'a.v', 'M', 1.0, 2.0)
+    last = write_module(tmp_path / 'b.v', 'M', 3.0, 4.0)
+    other = write_module(tmp_path / 'c.v', 'N', 5.0, 6.0)
+    cachedir = tmp_path / 'cache'
+    if warm != 'none':
+        parse([first if warm == 'first' else last], 1, cachedir)
+
+    extractor = parse([first, other, last], jobs, cachedir)
+    assert rise_delay(extractor, 'M') == 3.0
+    assert rise_delay(extractor, 'N') == 5.0
+
+    for path, delay in ((last, 3.0), (first, 1.0)):
+        assert rise_delay(parse([path], jobs, cachedir), 'M') == delay
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_duplicate_cells_first_with_cache(tmp_path, jobs):
+    first = write_module(tmp_path / 'a.v', 'M', 1.0, 2.0)
+    last = write_module(tmp_path / 'b.v', 'M', 3.0, 4.0)
+    cachedir = tmp_path / 'cache'
+    extractor = parse([first, last], jobs, cachedir, duplicates='first')
+    assert rise_delay(extractor, 'M') == 1.0
+    assert rise_delay(parse([last], jobs, cachedir), 'M') == 3.0
+
+
+# comments, continuations and whitespace runs of every kind - with small
+# chunks the delimiters fall on chunk boundaries
+CLEANTEXT = '''module m (A, Z); // line comment
+/* block
+   comment */ input A;
+output /* inline */ Z;
+specify
+    (A => Z) = \\
+        (1.0, \\
+
+        2.0);
+    // (A => Z) = 3.0;
+    /* a */ /* b
+    */ $setup(A, posedge Z, 0.1);
+    a\t\t  b   c // x /* y
+    d /* // */ e
+endspecify
+endmodule
+'''
+
+
+@pytest.mark.parametrize('chunksize', [1, 2, 3, 5, 7, 11, 1 << 16])
+def test_streaming_clean_matches_clear_verilog(chunksize):
+    extractor = VerilogSpecifyExtractor(CLEANTEXT.splitlines(True))
+    extractor.clear_verilog()
+    lines = list(iter_clean_verilog_lines(io.StringIO(CLEANTEXT), chunksize))
+    assert lines == extractor.veriloglines
+
+
+# a block comment spanning several chunks and hiding specify keywords, line
+# continuations, and an indented block ending the file
+READERTEXT = '''module a (A, Z);
+/* specify
+endspecify */
+specify
+    (A => Z) = \\
+        (1.0, 2.0); /* a comment spanning
+    several chunks */ $setup(A, posedge Z, 0.1);
+endspecify
+endmodule
+module b (A, Z);
+  specify // a comment
+    $width(posedge A, 1.0);
+  endspecify
+endmodule
+'''
+
+
+@pytest.mark.parametrize('newline', ['\n', '\r\n'])
+def test_readers_agree(tmp_path, newline):
+    path = tmp_path / 'cells.v'
+    path.write_bytes(READERTEXT.replace('\n', newline).encode())
+
+    mapped = VerilogSpecifyExtractor([])
+    mapped.extract_specify_blocks_from_file(str(path))
+    streamed = VerilogSpecifyExtractor([])
+    with open(path) as f:
+        streamed.extract_specify_blocks_from_stream(f, chunksize=7)
+    with open(path) as f:
+        legacy = VerilogSpecifyExtractor(f.readlines())
+    legacy.clear_verilog()
+    legacy.extract_specify_blocks()
+
+    assert mapped.specifyblocks == {
+        'a': ['specify',
+              ' (A => Z) = (1.0, 2.0); $setup(A, posedge Z, 0.1);',
+              'endspecify'],
+        'b': [' specify ', ' $width(posedge A, 1.0);', ' endspecify'],
+    }
+    assert streamed.specifyblocks == mapped.specifyblocks
+    assert legacy.specifyblocks == mapped.specifyblocks
+    assert mapped.specifylinenumbers == {'a': [4, 5, 8], 'b': [11, 12, 13]}
+    assert streamed.specifylinenumbers == mapped.specifylinenumbers
+
+
+@pytest.mark.parametrize('reader', VerilogLibraryExtractor.READERS)
+def test_readers_time_cleaning(tmp_path, reader):
+    path = tmp_path / 'cells.v'
+    path.write_text(READERTEXT)
+    stats = Stats()
+    VerilogLibraryExtractor([str(path)], reader=reader, stats=stats).extract()
+    assert {'clean', 'extract'} <= set(stats.phases)
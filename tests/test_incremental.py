@@ -0,0 +1,81 @@
+import io
+
+import pytest
+
+from verilog_timings_parser.convert_verilog_timings_to_liberty import (
+    write_liberty)
+from verilog_timings_parser.extract_timings import VerilogLibraryExtractor
+from verilog_timings_parser.incremental import (
+    find_cell_groups, update_liberty)
+
+MODULE = '''module {name} (A, Z);
+input A;
+output Z;
+specify
+    (A => Z) = ({rise}, 2.0);
+endspecify
+endmodule
+'''
+
+
+def write_cells(path, cells):
+    path.write_text(''.join(
+        MODULE.format(name=name, rise=rise) for name, rise in cells.items()))
+
+
+def update(source, output):
+    extractor = VerilogLibraryExtractor([str(source)])
+    extractor.extract()
+    return update_liberty(extractor, 'library', str(output), write_liberty)
+
+
+def groups(data):
+    # cell name -> text of its group
+    return {
+        name: data[start:end]
+        for name, (start, end) in find_cell_groups(data).items()
+    }
+
+
+def full_build(source):
+    extractor = VerilogLibraryExtractor([str(source)])
+    extractor.parse()
+    stream = io.StringIO()
+    write_liberty('library', extractor.parsedspecifyblocks, stream)
+    return stream.getvalue().encode('utf-8')
+
+
+@pytest.fixture
+def library(tmp_path):
+    source = tmp_path / 'cells.v'
+    output = tmp_path / 'out.lib'
+    write_cells(source, {'a': 1.0, 'b': 1.5, 'c': 2.5})
+    assert sorted(update(source, output)) == ['a', 'b', 'c']
+    return source, output
+
+
+@pytest.mark.parametrize('cells, rebuilt', [
+    ({'a': 1.0, 'b': 1.5, 'c': 2.5}, []),
+    ({'a': 1.0, 'b': 9.5, 'c': 2.5}, ['b']),
+    ({'a': 1.0, 'b': 1.5, 'c': 2.5, 'd': 3.5}, ['d']),
+    ({'a': 1.0, 'c': 2.5}, ['b']),
+    ({'a': 7.0, 'c': 2.5, 'd': 3.5}, ['a', 'd', 'b']),
+])
+def test_only_changed_cells_are_rebuilt(library, cells, rebuilt):
+    source, output = library
+    write_cells(source, cells)
+    assert update(source, output) == rebuilt
+
+    data = output.read_bytes()
+    assert groups(data) == groups(full_build(source))
+    # the manifest written with the spliced file describes it
+    assert update(source, output) == []
+    assert output.read_bytes() == data
+
+
+def test_edited_output_is_rebuilt(library):
+    source, output = library
+    with open(output, 'a') as f:
+        f.write('/* edited */\n')
+    assert sorted(update(source, output)) == ['a', 'b', 'c']
+    assert output.read_bytes() == full_build(source)
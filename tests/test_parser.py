@@ -0,0 +1,77 @@
+import pytest
+
+from verilog_timings_parser.extract_timings import (
+    get_parser, parse_specify_block)
+from verilog_timings_parser.model import BusRange, bit_pairs, iter_bit_paths
+from verilog_timings_parser.yacc import Parser
+
+
+def parse(*lines):
+    return parse_specify_block(
+        get_parser(), ['specify'] + list(lines) + ['endspecify'])
+
+
+def pairs(line):
+    pathdelay, = parse(line)['pathdelays']
+    return list(bit_pairs(pathdelay))
+
+
+def test_parallel_bus_path():
+    parsed = parse('(A[7:0] => Y[7:0]) = 1.0;')
+    pathdelay, = parsed['pathdelays']
+    assert pathdelay['input_port'] == BusRange('A', 7, 0)
+    assert pathdelay['output_port'] == BusRange('Y', 7, 0)
+    assert list(bit_pairs(pathdelay)) == [
+        ('A[{}]'.format(i), 'Y[{}]'.format(i)) for i in range(7, -1, -1)]
+
+
+def test_full_bus_path():
+    assert pairs('(B[3:0] *> Z[1:0]) = 0.5;') == [
+        ('B[{}]'.format(i), 'Z[{}]'.format(j))
+        for i in range(3, -1, -1) for j in (1, 0)]
+
+
+def test_ascending_ranges():
+    assert pairs('(A[0:3] => Y[4:7]) = 1.0;') == [
+        ('A[0]', 'Y[4]'), ('A[1]', 'Y[5]'), ('A[2]', 'Y[6]'),
+        ('A[3]', 'Y[7]')]
+    # ranges of opposite directions are paired by position
+    assert pairs('(A[0:1] => Y[1:0]) = 1.0;') == [
+        ('A[0]', 'Y[1]'), ('A[1]', 'Y[0]')]
+
+
+def test_scalar_and_bus_ports():
+    assert pairs('(A *> Y[2:0]) = 1.0;') == [
+        ('A', 'Y[2]'), ('A', 'Y[1]'), ('A', 'Y[0]')]
+    assert pairs('(A *> Y) = 1.0;') == [('A', 'Y')]
+
+
+def test_bit_paths_share_delays():
+    parsed = parse('if (C) (A[1:0] *> Y[1:0]) = (1.0, 2.0);')
+    paths = [path for paths in parsed['ifstatements'].values()
+             for path in paths]
+    bitpaths = list(iter_bit_paths(paths))
+    assert len(bitpaths) == 4
+    for bitpath in bitpaths:
+        assert bitpath['cond'] is paths[0]['cond']
+        assert bitpath['delaylist'] is paths[0]['delaylist']
+
+
+@pytest.mark.parametrize('line', [
+    '(A[3:0] => Y[1:0]) = 1;',
+    '(A[3:0] => Y) = 1;',
+    '(posedge CLK[1:0] => (Q[2:0] : D)) = 1;',
+])
+def test_parallel_width_mismatch(line):
+    with pytest.raises(Parser.PortWidthError):
+        parse(line)
+
+
+@pytest.mark.parametrize('line', [
+    '$setup(A[3:0], posedge CLK, 1);',
+    '$hold(posedge CLK, A[1:0], 1);',
+    '$width(posedge CLK[1:0], 1);',
+])
+def test_range_select_in_timing_check(line):
+    with pytest.raises(Parser.SyntaxError):
+        parse(line)
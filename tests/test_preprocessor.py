@@ -0,0 +1,140 @@
+import io
+
+import pytest
+
+from verilog_timings_parser.convert_verilog_timings_to_liberty import main
+from verilog_timings_parser.extract_timings import (
+    MultiConfigExtractor, Preprocessor, SpecifyBlockScanner,
+    SpecifyParserError, iter_numbered_specify_blocks)
+from verilog_timings_parser.stats import Stats
+
+NESTED = '''module m (A, B, Y);
+specify
+`ifdef FOO
+    `ifndef BAR
+        (A => Y) = 1;
+    `elsif BAZ
+        (A => Y) = 2;
+    `else
+        (A => Y) = 3;
+    `endif
+`elsif BAR
+    (A => Y) = 4;
+`else
+    (A => Y) = 5;
+`endif
+    (B => Y) = 6;
+endspecify
+endmodule
+'''
+
+DEFINES = '''`define FOO
+module m (A, B, Y);
+specify
+`ifdef FOO
+    (A => Y) = 1;
+`endif
+`undef FOO
+`ifdef FOO
+    (A => Y) = 2;
+`else
+    (A => Y) = 3;
+`endif
+`ifdef BAR
+`define BAZ
+`endif
+`ifdef BAZ
+    (A => Y) = 4;
+`endif
+endspecify
+endmodule
+'''
+
+
+def delays(text, defines):
+    # the delays of the paths compiled with the given defines
+    scanner = SpecifyBlockScanner(Preprocessor(defines))
+    return [
+        line.split('=')[-1].strip(' ;')
+        for _, lines, _ in iter_numbered_specify_blocks(
+            io.StringIO(text), scanner=scanner)
+        for line in lines if '=>' in line
+    ]
+
+
+@pytest.mark.parametrize('defines, expected', [
+    ((), ['5', '6']),
+    (('FOO',), ['1', '6']),
+    (('FOO', 'BAR'), ['3', '6']),
+    (('FOO', 'BAR', 'BAZ'), ['2', '6']),
+    (('BAR',), ['4', '6']),
+    (('BAZ',), ['5', '6']),
+])
+def test_nested_conditionals(defines, expected):
+    assert delays(NESTED, defines) == expected
+
+
+@pytest.mark.parametrize('defines, expected', [
+    ((), ['1', '3']),
+    (('BAR',), ['1', '3', '4']),
+])
+def test_define_and_undef(defines, expected):
+    assert delays(DEFINES, defines) == expected
+
+
+@pytest.mark.parametrize('text', [
+    'module m;\n`endif\nendmodule\n',
+    'module m;\n`ifdef FOO\n`endif\n`endif\nendmodule\n',
+    'module m;\n`else\nendmodule\n',
+    'module m;\n`elsif FOO\nendmodule\n',
+    'module m;\n`ifdef\nendmodule\n',
+])
+def test_unbalanced_directives(text):
+    with pytest.raises(SpecifyParserError):
+        delays(text, ())
+
+
+SHARED = '''module shared (A, Y);
+specify
+    (A => Y) = 1;
+endspecify
+endmodule
+module conditional (A, Y);
+specify
+`ifdef FOO
+    (A => Y) = 2;
+`else
+    (A => Y) = 3;
+`endif
+endspecify
+endmodule
+'''
+
+
+def test_shared_blocks_are_parsed_once(tmp_path):
+    path = tmp_path / 'cells.v'
+    path.write_text(SHARED)
+    stats = Stats()
+    extractor = MultiConfigExtractor(
+        [str(path)], {'foo': ['FOO'], 'bar': ['BAR']}, stats=stats)
+    extractor.parse()
+    foo = extractor.extractors['foo'].parsedspecifyblocks
+    bar = extractor.extractors['bar'].parsedspecifyblocks
+    assert foo['shared'] is bar['shared']
+    assert foo['conditional'] is not bar['conditional']
+    assert stats.counters['duplicate_blocks'] == 1
+
+
+def test_only_configurations_are_written(tmp_path):
+    path = tmp_path / 'cells.v'
+    path.write_text(SHARED)
+    output = tmp_path / 'out.lib'
+    main([str(path), 'library', str(output), '--no-cache', '-D', 'FOO',
+          '--config', 'base=', '--config', 'bar=BAR'])
+    assert sorted(p.name for p in tmp_path.glob('*.lib')) == [
+        'out.bar.lib', 'out.base.lib']
+    # both configurations have FOO defined by -D
+    base = (tmp_path / 'out.base.lib').read_text()
+    assert 'intrinsic_rise : 2.0;' in base
+    assert 'intrinsic_rise : 3.0;' not in base
+    assert (tmp_path / 'out.bar.lib').read_text() == base
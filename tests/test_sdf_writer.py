@@ -0,0 +1,20 @@
+# tests/data/cells.v covers IOPATH and COND entries, vector paths and timing
+# checks, cells.sdf is the SDF file expected for it
+import io
+import os
+
+from verilog_timings_parser.extract_timings import VerilogLibraryExtractor
+from verilog_timings_parser.sdf_writer import SDFWriter
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+def test_golden_sdf():
+    extractor = VerilogLibraryExtractor([os.path.join(DATA, 'cells.v')])
+    extractor.parse()
+    stream = io.StringIO()
+    count = SDFWriter(stream).write_sdf(
+        'top', extractor.parsedspecifyblocks, '1ns')
+    assert count == 2
+    with open(os.path.join(DATA, 'cells.sdf'), 'r') as f:
+        assert stream.getvalue() == f.read()
@@ -0,0 +1,48 @@
+import sqlite3
+
+import pytest
+
+from verilog_timings_parser.convert_verilog_timings_to_liberty import main
+from verilog_timings_parser.store import LibraryStore, StoreError
+
+
+@pytest.fixture(scope='module')
+def saved(library, tmp_path_factory):
+    # the library converted from the Verilog files, and saved to a database
+    directory = tmp_path_factory.mktemp('store')
+    output = directory / 'out.lib'
+    database = directory / 'library.db'
+    main([library, 'library', str(output), '--no-cache',
+          '--save-db', str(database)])
+    return output, database
+
+
+def test_round_trip(saved, tmp_path):
+    output, database = saved
+    reloaded = tmp_path / 'out.lib'
+    main(['library', str(reloaded), '--from-db', str(database)])
+    assert reloaded.read_text() == output.read_text()
+
+
+@pytest.mark.parametrize('key, value, reason', [
+    ('schema_version', '0', 'unsupported schema version 0'),
+    ('parser_digest', '0' * 64, 'written by a different version'),
+])
+def test_other_versions_are_refused(saved, tmp_path, capsys, key, value,
+                                    reason):
+    _, database = saved
+    changed = tmp_path / 'library.db'
+    changed.write_bytes(database.read_bytes())
+    connection = sqlite3.connect(str(changed))
+    with connection:
+        connection.execute(
+            'UPDATE meta SET value = ? WHERE key = ?', (value, key))
+    connection.close()
+
+    with pytest.raises(StoreError, match=reason):
+        LibraryStore(str(changed))
+    with pytest.raises(SystemExit):
+        main(['library', str(tmp_path / 'out.lib'),
+              '--from-db', str(changed)])
+    assert reason in capsys.readouterr().err
+    assert not (tmp_path / 'out.lib').exists()
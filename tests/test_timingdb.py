@@ -0,0 +1,96 @@
+import itertools
+
+import pytest
+
+from verilog_timings_parser.columnar import ARC_KINDS
+from verilog_timings_parser.extract_timings import VerilogLibraryExtractor
+from verilog_timings_parser.timingdb import TimingDB, iter_timing_arcs
+
+
+def key(arc):
+    # comparable identity of an arc
+    return (arc.cell, arc.kind, arc.related_pin or '', arc.pin,
+            arc.edge or '', arc.related_edge or '', str(arc.cond),
+            arc.limit or '', id(arc.entry))
+
+
+def all_arcs(parsed):
+    return [
+        arc
+        for cell, entry in parsed.items()
+        for arc in iter_timing_arcs(cell, entry)
+    ]
+
+
+def brute_force(arcs, **criteria):
+    # keys of the arcs matching criteria, by filtering every arc
+    return sorted(
+        key(arc) for arc in arcs
+        if all(getattr(arc, name) == value
+               for name, value in criteria.items()))
+
+
+@pytest.fixture(scope='module', params=[1, 2])
+def filled(request, library):
+    # database filled by onparsed while the library is parsed
+    db = TimingDB()
+    extractor = VerilogLibraryExtractor([library])
+    extractor.onparsed = db.add_cell
+    extractor.parse(request.param)
+    parsed = extractor.parsedspecifyblocks
+    return db, parsed, all_arcs(parsed)
+
+
+def test_onparsed_fills_every_cell(filled):
+    db, parsed, arcs = filled
+    assert set(db.cells) == set(parsed)
+    assert all(db.cells[cell] is parsed[cell] for cell in parsed)
+    assert sorted(map(key, db)) == brute_force(arcs)
+    assert len(db) == len(brute_force(arcs))
+
+
+def test_pin_lookups(filled):
+    db, parsed, arcs = filled
+    cells = set(itertools.islice(parsed, 10))
+    queries = {
+        (arc.cell, arc.related_pin, arc.pin, arc.kind)
+        for arc in db if arc.cell in cells}
+    for cell, related_pin, pin, kind in queries:
+        assert sorted(map(key, db.arcs(
+            cell, related_pin=related_pin, pin=pin, kind=kind))) == \
+            brute_force(arcs, cell=cell, related_pin=related_pin, pin=pin,
+                        kind=kind)
+
+
+@pytest.mark.parametrize('kind', (None,) + ARC_KINDS)
+def test_edge_and_kind_lookups(filled, kind):
+    db, parsed, arcs = filled
+    criteria = {} if kind is None else {'kind': kind}
+    assert sorted(map(key, db.arcs(kind=kind))) == \
+        brute_force(arcs, **criteria)
+    for edge in ('posedge', 'negedge'):
+        expected = brute_force(arcs, edge=edge, **criteria)
+        assert sorted(map(key, db.arcs(kind=kind, edge=edge))) == expected
+
+
+def test_cell_lookups(filled):
+    db, parsed, arcs = filled
+    for cell in itertools.islice(parsed, 10):
+        assert sorted(map(key, db.arcs(cell))) == \
+            brute_force(arcs, cell=cell)
+        assert sorted(map(key, db.arcs(cell, cond=None))) == \
+            brute_force(arcs, cell=cell, cond=None)
+
+
+def test_replacing_cells(filled):
+    db, parsed, arcs = filled
+    db = TimingDB.from_parsed(parsed)
+    cells = list(itertools.islice(parsed, 5))
+    for cell in cells:
+        db.add_cell(cell, parsed[cell])
+    assert sorted(map(key, db)) == brute_force(arcs)
+    for cell in cells:
+        db.remove_cell(cell)
+    remaining = {cell: parsed[cell] for cell in parsed if cell not in cells}
+    assert sorted(map(key, db)) == brute_force(all_arcs(remaining))
+    assert list(db.arcs(cells[0])) == []
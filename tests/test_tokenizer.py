@@ -0,0 +1,136 @@
+# The hand-written SpecifyTokenizer must produce exactly the same tokens
+# (type, value, line and position), errors and parse results as the
+# PLY-based SpecifyLexer.
+
+import pytest
+
+from verilog_timings_parser.extract_timings import (
+    VerilogSpecifyExtractor, parse_specify_block)
+from verilog_timings_parser.lex import Number, SpecifyLexer
+from verilog_timings_parser.model import as_dicts
+from verilog_timings_parser.tokenizer import SpecifyTokenizer
+from verilog_timings_parser.yacc import Parser
+
+CORNERCASES = [
+    '',
+    '\n\n\n',
+    'specify endspecify',
+    'a b_c d$e f[3] g [4] h[ 5]',
+    'a[7:0] b[0:3] c [3:0] d[3: 0] e[3:0][1] f[3:0:1]',
+    "1 12 123456789 -1.5 +0.25 3.0e 1'b0 4'hF 8'o17 'd42 16'h_ff_ff",
+    "33'd1 2'b101 1'b2 'bx 4'hz 0'b1 1'b_",
+    '(a => b) (c *=> d) (e *> f) = == === !~ & && &&& + - ; , :',
+    '$setup $setuphold $hold $recovery $recrem $skew $period $width',
+    '$setupholdx $widthy $foo',
+    '"a string" "two" "strings" x "unterminated',
+    'a\n\nb\n c\t\t d',
+    'a # b',
+    'a * b',
+    'a @ b',
+]
+
+# specify blocks the generated library does not cover
+BLOCKS = [
+    ['specify',
+     '(A[7:0] => Y[7:0]) = (1.0:1.5:2.0, 2.0:2.5:3.0);',
+     '(B[3:0] *> Z[1:0]) = 0.5;',
+     'if (C) (A[3:0] *> Z[0:1]) = 0.7;',
+     'ifnone (A[3:0] *> Z[0:1]) = 0.8;',
+     '(posedge CLK *> (Y[7:0] : C)) = 0.9;',
+     'endspecify'],
+]
+
+# specify blocks with errors - the parser must fail on the same token
+ERRORBLOCKS = [
+    ['specify', '(A => Y) = (1, 2;', 'endspecify'],
+    ['specify', '(A => Y) B = 999999999;', 'endspecify'],
+    ['specify', '(A => Y) = 999999999;', 'endspecify'],
+    ['specify', "(A => Y) = 1'b2;", 'endspecify'],
+    ['specify', '(A => Y) = @;', 'endspecify'],
+    ['specify', 'specparam a = 1;', 'specparam a = 2;', 'endspecify'],
+    ['specify', '(A => Y) = (1, 2);'],
+    ['specify', '(A[3:0] => Y[1:0]) = 1;', 'endspecify'],
+    ['specify', '$setup(A[3:0], posedge CLK, 1);', 'endspecify'],
+]
+
+
+def plain(value):
+    # parse results with Numbers replaced by comparable tuples
+    if isinstance(value, Number):
+        return (value.size, value.typ, value.value)
+    if isinstance(value, dict):
+        return {key: plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [plain(item) for item in value]
+    return value
+
+
+def tokens(lexer, data):
+    # list of (type, value, line, position), or the error raised
+    result = []
+    lexer.lexer.lineno = 1
+    try:
+        lexer.lexer.input(data)
+        while True:
+            token = lexer.lexer.token()
+            if token is None:
+                break
+            result.append(
+                (token.type, plain(token.value), token.lineno, token.lexpos))
+    except Exception as ex:
+        result.append((type(ex).__name__, str(ex)))
+    return result
+
+
+def parse_result(parser, block):
+    # plain parse results, or the error raised
+    try:
+        return plain(as_dicts(parse_specify_block(parser, block)))
+    except Exception as ex:
+        return (type(ex).__name__, str(ex))
+
+
+@pytest.fixture(scope='module')
+def lexers():
+    return SpecifyLexer(), SpecifyTokenizer()
+
+
+@pytest.fixture(scope='module')
+def parsers():
+    return Parser(lexer='ply'), Parser(lexer='fast')
+
+
+@pytest.fixture(scope='module')
+def blocks(library):
+    extractor = VerilogSpecifyExtractor([])
+    extractor.extract_specify_blocks_from_file(library)
+    return extractor.specifyblocks
+
+
+@pytest.mark.parametrize('data', CORNERCASES)
+def test_corner_case_tokens(lexers, data):
+    reference, fast = lexers
+    assert tokens(fast, data) == tokens(reference, data)
+
+
+def test_library_tokens(lexers, blocks):
+    reference, fast = lexers
+    for block in list(blocks.values()) + BLOCKS:
+        text = '\n'.join(block)
+        assert tokens(fast, text) == tokens(reference, text)
+
+
+@pytest.mark.parametrize('block', ERRORBLOCKS)
+def test_error_block_parse(parsers, block):
+    reference, fast = parsers
+    expected = parse_result(reference, block)
+    assert isinstance(expected, tuple)
+    assert parse_result(fast, block) == expected
+
+
+def test_library_parse(parsers, blocks):
+    reference, fast = parsers
+    for block in list(blocks.values()) + BLOCKS:
+        expected = parse_result(reference, block)
+        assert isinstance(expected, dict)
+        assert parse_result(fast, block) == expected
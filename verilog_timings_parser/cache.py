@@ -0,0 +1,283 @@
+import hashlib
+import importlib.util
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import zlib
+
+import ply
+import ply.lex as lex
+import ply.yacc as yacc
+
+# bump whenever the layout of the cached files changes
+CACHE_VERSION = 1
+
+
+def user_cache_dir():
+    path = os.environ.get('VERILOG_TIMINGS_PARSER_CACHE_DIR')
+    if path:
+        return path
+    base = os.environ.get('XDG_CACHE_HOME')
+    if not base:
+        base = os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'verilog_timings_parser')
+
+
+def parser_digest():
+    # Identifies the code producing the parse results - any change to the
+    # lexer or the parser invalidates the cached results
+    digest = hashlib.sha256('cache:{}\nply:{}\n'.format(
+        CACHE_VERSION, ply.__version__).encode('utf-8'))
+    for name in ('conditions.py', 'lex.py', 'model.py', 'tokenizer.py',
+                 'yacc.py'):
+        with open(os.path.join(os.path.dirname(__file__), name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _rules_signature(cls, prefix, extra):
+    # Hashes everything PLY builds its tables from: the token list, the
+    # additional class attributes given in `extra` and all rules with the
+    # given prefix in the order they are defined in.
+    parts = [
+        'cache:{}'.format(CACHE_VERSION),
+        'ply:{}'.format(ply.__version__),
+        'tokens:{}'.format(' '.join(cls.tokens))
+    ]
+    for name in extra:
+        parts.append('{}:{!r}'.format(name, getattr(cls, name, None)))
+    functions = []
+    strings = []
+    for name in dir(cls):
+        if not name.startswith(prefix):
+            continue
+        value = getattr(cls, name)
+        if isinstance(value, str):
+            strings.append('{}={}'.format(name, value))
+        elif callable(value):
+            code = value.__code__
+            functions.append((code.co_firstlineno, name, value.__doc__))
+    parts.extend(sorted(strings))
+    for _, name, doc in sorted(functions):
+        parts.append('{}={}'.format(name, doc))
+    return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+
+def lexer_signature(cls):
+    return _rules_signature(cls, 't_', ['reserved', 'states', 'literals'])
+
+
+def grammar_signature(cls):
+    return _rules_signature(cls, 'p_', ['precedence', 'start'])
+
+
+class TableCache(object):
+    '''Stores the PLY lexer and LALR tables between runs.
+
+    Table files are named after the signature of the rules they were built
+    from, so any change to the grammar, the token list or the PLY version
+    makes the old files stale - they are ignored and new ones are built.
+    Tables of other signatures are kept, as several installed versions of
+    the package may share the directory; only the least recently used ones
+    beyond MAX_TABLES of each kind are removed when a new table is written.
+    '''
+
+    # lexer and parser tables of this many signatures are kept
+    MAX_TABLES = 8
+
+    def __init__(self, directory=None):
+        self.directory = directory if directory else user_cache_dir()
+
+    def _prepare(self, prefix, signature, suffix):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+        except OSError:
+            return None
+        filename = '{}_{}{}'.format(prefix, signature[:32], suffix)
+        return os.path.join(self.directory, filename)
+
+    def _touch(self, path):
+        # marks the table as used, for _prune
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _prune(self, prefix, path):
+        # removes the least recently used tables of `prefix` beyond
+        # MAX_TABLES, never the one at `path`
+        tables = []
+        for entry in os.listdir(self.directory):
+            entrypath = os.path.join(self.directory, entry)
+            if not entry.startswith(prefix + '_') or entrypath == path:
+                continue
+            try:
+                tables.append((os.path.getmtime(entrypath), entrypath))
+            except OSError:
+                pass
+        tables.sort(reverse=True)
+        for _, entrypath in tables[self.MAX_TABLES - 1:]:
+            self._discard(entrypath)
+
+    def _publish(self, tmpdir, tmpname, path):
+        # tables are written to a temporary directory first and moved into
+        # place, so concurrent runs never see half-written files
+        try:
+            os.replace(os.path.join(tmpdir, tmpname), path)
+        except OSError:
+            pass
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def _discard(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def lex(self, module, errorlog):
+        path = self._prepare('lextab', lexer_signature(type(module)), '.py')
+        if path is None:
+            return lex.lex(module=module, errorlog=errorlog)
+        if os.path.exists(path):
+            try:
+                spec = importlib.util.spec_from_file_location(
+                    os.path.basename(path)[:-3], path)
+                lextab = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(lextab)
+                self._touch(path)
+                return lex.lex(
+                    module=module,
+                    errorlog=errorlog,
+                    optimize=1,
+                    lextab=lextab)
+            except Exception:
+                self._discard(path)
+        tmpdir = tempfile.mkdtemp(dir=self.directory)
+        tmpname = os.path.basename(path)[:-3]
+        lexer = lex.lex(
+            module=module,
+            errorlog=errorlog,
+            optimize=1,
+            lextab=tmpname,
+            outputdir=tmpdir)
+        self._publish(tmpdir, tmpname + '.py', path)
+        self._prune('lextab', path)
+        sys.modules.pop(tmpname, None)
+        return lexer
+
+    def yacc(self, module, **kwargs):
+        path = self._prepare(
+            'parsetab', grammar_signature(type(module)), '.pickle')
+        if path is None:
+            return yacc.yacc(module=module, write_tables=False, **kwargs)
+        if os.path.exists(path):
+            try:
+                parser = yacc.yacc(module=module, picklefile=path, **kwargs)
+                self._touch(path)
+                return parser
+            except Exception:
+                self._discard(path)
+        tmpdir = tempfile.mkdtemp(dir=self.directory)
+        tmpname = os.path.basename(path)
+        parser = yacc.yacc(
+            module=module,
+            picklefile=os.path.join(tmpdir, tmpname),
+            **kwargs)
+        self._publish(tmpdir, tmpname, path)
+        self._prune('parsetab', path)
+        return parser
+
+
+class ResultCache(object):
+    '''Stores parsed specify blocks keyed on a hash of their cleaned text.
+
+    Entries are zlib-compressed pickles, one file per block. The total size
+    of the cache is kept under `maxsize` bytes by removing the least
+    recently used entries - reading an entry refreshes its modification
+    time.
+    '''
+
+    def __init__(self, directory=None, maxsize=256 << 20):
+        if directory is None:
+            directory = os.path.join(user_cache_dir(), 'results')
+        self.directory = directory
+        self.maxsize = maxsize
+        self.digest = parser_digest()
+        self.hits = 0
+        self.misses = 0
+        self.size = None
+
+    def key(self, specifyblock):
+        digest = hashlib.sha256(self.digest.encode('utf-8'))
+        digest.update('\n'.join(specifyblock).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.pickle.z')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            entry = pickle.loads(zlib.decompress(data))
+            os.utime(path)
+        except Exception:
+            # missing and damaged entries are both misses, the latter are
+            # overwritten once the block is parsed again
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        data = zlib.compress(pickle.dumps(entry, pickle.HIGHEST_PROTOCOL))
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmppath = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmppath, self._path(key))
+        except OSError:
+            return
+        if self.size is None:
+            self.size = self._scan_size()
+        else:
+            self.size += len(data)
+        if self.size > self.maxsize:
+            self.evict()
+
+    def _entries(self):
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith('.pickle.z'):
+                        stat = entry.stat()
+                        entries.append(
+                            (stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            pass
+        return entries
+
+    def _scan_size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        # drops the least recently used entries until the cache takes up at
+        # most 3/4 of maxsize, so eviction does not run on every put
+        entries = sorted(self._entries())
+        size = sum(size for _, size, _ in entries)
+        target = self.maxsize * 3 // 4
+        for _, entrysize, path in entries:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+                size -= entrysize
+            except OSError:
+                pass
+        self.size = size
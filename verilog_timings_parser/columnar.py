@@ -0,0 +1,200 @@
+import itertools
+
+from .model import DelayList, bit_pairs
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Kinds of timing arcs - $setuphold and $recrem checks are split into two
+# arcs each, so every arc carries a single limit
+ARC_KINDS = (
+    'path',
+    'setup',
+    'hold',
+    'skew',
+    'recovery',
+    'removal',
+    'period',
+    'width'
+)
+
+EDGES = (None, 'posedge', 'negedge')
+
+TRANSITIONS = DelayList.TRANSITIONS
+RISE = TRANSITIONS.index('rise')
+FALL = TRANSITIONS.index('fall')
+
+MIN, TYP, MAX = 0, 1, 2
+
+# limits of each constraint check type as (arc kind, key of the limit)
+CHECKLIMITS = {
+    'setup': (('setup', 'limit'),),
+    'hold': (('hold', 'limit'),),
+    'setuphold': (('setup', 'setup_limit'), ('hold', 'hold_limit')),
+    'skew': (('skew', 'limit'),),
+    'recovery': (('recovery', 'limit'),),
+    'recrem': (('recovery', 'recovery_limit'), ('removal', 'removal_limit')),
+    'period': (('period', 'limit'),),
+    'width': (('width', 'width_limit'),)
+}
+
+
+def iter_cell_arcs(parsedentry):
+    # Yields (kind, input pin, output pin, edge, condition, delays) for all
+    # arcs of a cell, where delays holds the triples of the 12 transitions.
+    # Path delays come first (unconditional, then conditional ones), then
+    # the constraint checks - the same order convert_cell_to_libertyjson
+    # visits them in. Paths between vector ports give an arc per bit pair
+    # (see model.bit_pairs). For checks the output pin is the constrained
+    # one (the data pin, or the reference pin of $period and $width), the
+    # input pin the reference one, and the limit applies to every
+    # transition.
+    paths = itertools.chain(
+        parsedentry['pathdelays'],
+        *parsedentry['ifstatements'].values())
+    for pathdelay in paths:
+        delaylist = pathdelay['delaylist']
+        delays = [delaylist[key] for key in TRANSITIONS]
+        for inputpin, outputpin in bit_pairs(pathdelay):
+            yield (
+                'path',
+                inputpin,
+                outputpin,
+                pathdelay['edge'],
+                pathdelay['cond'] or None,
+                delays)
+    for check in parsedentry['constraintchecks']:
+        reference = check['reference_event']
+        if check['type'] in ('period', 'width'):
+            event, related = reference, None
+        else:
+            event = check['data_event']
+            related = reference['signals'][0]
+        cond = '&'.join(str(s) for s in event['signals'][1:]) or None
+        for kind, limit in CHECKLIMITS[check['type']]:
+            yield (
+                kind,
+                related,
+                event['signals'][0],
+                event['edge'],
+                cond,
+                [check[limit]] * len(TRANSITIONS))
+
+
+class TimingArcs(object):
+    '''All timing arcs of a library packed into NumPy columns.
+
+    Row i describes a single arc:
+
+    * cell[i] - index into cells,
+    * input[i], output[i] - indices into names (-1 if there is no pin),
+    * edge[i] - index into EDGES,
+    * cond[i] - index into conditions (-1 for unconditional arcs),
+    * kind[i] - index into ARC_KINDS,
+    * delays[i] - (12, 3) array of min/typ/max delays for the TRANSITIONS.
+
+    Rows of a cell are contiguous, rows[cellname] gives their slice. For
+    example the maximum rise delay over all path delays of the library is
+    ``arcs.delays[arcs.kind == arcs.kindid('path'), RISE, MAX].max()``.
+    '''
+
+    COLUMNS = ('cell', 'input', 'output', 'edge', 'cond', 'kind', 'delays')
+
+    def __init__(self):
+        if np is None:
+            raise ImportError(
+                'TimingArcs requires numpy - install it with '
+                '"pip install numpy"')
+        self.cells = []
+        self.names = []
+        self.conditions = []
+        self.rows = dict()
+        self._nameids = dict()
+        self._condids = dict()
+        self._collapsed = None
+
+    def _intern(self, value, values, ids):
+        if value is None:
+            return -1
+        value = str(value)
+        index = ids.get(value)
+        if index is None:
+            index = ids[value] = len(values)
+            values.append(value)
+        return index
+
+    @classmethod
+    def from_parsed(cls, parsedspecifyblocks):
+        arcs = cls()
+        columns = {column: [] for column in cls.COLUMNS}
+        for cellid, (cellname, entry) in enumerate(
+                parsedspecifyblocks.items()):
+            arcs.cells.append(cellname)
+            start = len(columns['cell'])
+            for kind, inp, out, edge, cond, delays in iter_cell_arcs(entry):
+                columns['cell'].append(cellid)
+                columns['input'].append(
+                    arcs._intern(inp, arcs.names, arcs._nameids))
+                columns['output'].append(
+                    arcs._intern(out, arcs.names, arcs._nameids))
+                columns['edge'].append(EDGES.index(edge))
+                columns['cond'].append(
+                    arcs._intern(cond, arcs.conditions, arcs._condids))
+                columns['kind'].append(ARC_KINDS.index(kind))
+                columns['delays'].append(delays)
+            arcs.rows[cellname] = slice(start, len(columns['cell']))
+        arcs.cell = np.array(columns['cell'], dtype=np.int32)
+        arcs.input = np.array(columns['input'], dtype=np.int32)
+        arcs.output = np.array(columns['output'], dtype=np.int32)
+        arcs.edge = np.array(columns['edge'], dtype=np.int8)
+        arcs.cond = np.array(columns['cond'], dtype=np.int32)
+        arcs.kind = np.array(columns['kind'], dtype=np.int8)
+        arcs.delays = np.array(columns['delays'], dtype=np.float64).reshape(
+            (-1, len(TRANSITIONS), 3))
+        return arcs
+
+    def __len__(self):
+        return len(self.cell)
+
+    def kindid(self, kind):
+        return ARC_KINDS.index(kind)
+
+    def nameid(self, name):
+        return self._nameids.get(name, -1)
+
+    @property
+    def collapsed(self):
+        # (n, 12) booleans - True where min and max of a delay are equal and
+        # Liberty gets a single value instead of a min/typ/max set
+        if self._collapsed is None:
+            self._collapsed = \
+                self.delays[:, :, MIN] == self.delays[:, :, MAX]
+        return self._collapsed
+
+    def as_structured(self):
+        # returns the columns as a single NumPy structured array
+        table = np.empty(len(self), dtype=[
+            ('cell', np.int32),
+            ('input', np.int32),
+            ('output', np.int32),
+            ('edge', np.int8),
+            ('cond', np.int32),
+            ('kind', np.int8),
+            ('delays', np.float64, (len(TRANSITIONS), 3))
+        ])
+        for column in self.COLUMNS:
+            table[column] = getattr(self, column)
+        return table
+
+    def save(self, path):
+        # stores the columns and lookup tables in a .npz archive
+        np.savez(
+            path,
+            cells=np.array(self.cells, dtype=str),
+            names=np.array(self.names, dtype=str),
+            conditions=np.array(self.conditions, dtype=str),
+            arc_kinds=np.array(ARC_KINDS, dtype=str),
+            transitions=np.array(TRANSITIONS, dtype=str),
+            **{column: getattr(self, column) for column in self.COLUMNS})
@@ -0,0 +1,151 @@
+import weakref
+
+# Conditions of conditional path delays as a small, hash-consed expression
+# tree. Creating a node that already exists returns the existing object, so
+# identical sub-expressions are shared by all paths of all cells, nodes can
+# be compared with `is` and both renderings below are computed only once per
+# distinct node:
+#
+# * str(node) - the Verilog text the condition was parsed from (operators,
+#   parentheses and constants spelled as in the source), used for SDF COND
+#   entries,
+# * node.liberty() - Liberty `when` syntax: && and ~ become & and !, and
+#   comparisons are rewritten as Boolean functions (A == 1'b1 is A,
+#   A == 1'b0 is !A, A == B is !(A^B)).
+#
+# Nodes are immutable and unpickle to the shared node.
+
+
+class Condition(object):
+    __slots__ = ('args', '_text', '_liberty', '__weakref__')
+
+    _nodes = weakref.WeakValueDictionary()
+
+    def __new__(cls, *args):
+        key = (cls,) + args
+        node = Condition._nodes.get(key)
+        if node is None:
+            node = object.__new__(cls)
+            object.__setattr__(node, 'args', args)
+            object.__setattr__(node, '_text', None)
+            object.__setattr__(node, '_liberty', None)
+            Condition._nodes[key] = node
+        return node
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Conditions are immutable')
+
+    def __reduce__(self):
+        return type(self), self.args
+
+    def __str__(self):
+        if self._text is None:
+            object.__setattr__(self, '_text', self.render())
+        return self._text
+
+    def liberty(self):
+        if self._liberty is None:
+            object.__setattr__(self, '_liberty', self.render_liberty())
+        return self._liberty
+
+    def liberty_operand(self):
+        # Liberty text usable as an operand of ! and &
+        return self.liberty()
+
+    def __repr__(self):
+        return '{}({})'.format(
+            type(self).__name__, ', '.join(repr(arg) for arg in self.args))
+
+
+class Signal(Condition):
+    # a pin or net name
+    __slots__ = ()
+
+    def render(self):
+        return self.args[0]
+
+    def render_liberty(self):
+        return self.args[0]
+
+
+class Constant(Condition):
+    # a literal, with its text and integer value
+    __slots__ = ()
+
+    def render(self):
+        return self.args[0]
+
+    def render_liberty(self):
+        value = self.args[1]
+        return str(value) if value in (0, 1) else self.args[0]
+
+
+class Not(Condition):
+    # (operator, operand), operator is ! or ~
+    __slots__ = ()
+
+    def render(self):
+        return '{}{}'.format(self.args[0], self.args[1])
+
+    def render_liberty(self):
+        return '!{}'.format(self.args[1].liberty_operand())
+
+
+class Paren(Condition):
+    # (operand,) written in parentheses
+    __slots__ = ()
+
+    def render(self):
+        return '({})'.format(self.args[0])
+
+    def render_liberty(self):
+        return '({})'.format(self.args[0].liberty())
+
+
+class Binary(Condition):
+    # (operator, left, right), operator is &, &&, == or ===
+    __slots__ = ()
+
+    def render(self):
+        return '{}{}{}'.format(self.args[1], self.args[0], self.args[2])
+
+    def render_liberty(self):
+        operator, left, right = self.args
+        if operator in ('&', '&&'):
+            return '{}&{}'.format(left.liberty(), right.liberty())
+        for signal, constant in ((left, right), (right, left)):
+            if isinstance(constant, Constant) and constant.args[1] in (0, 1):
+                if constant.args[1]:
+                    return signal.liberty()
+                return '!{}'.format(signal.liberty_operand())
+        return '!({}^{})'.format(left.liberty(), right.liberty())
+
+    def liberty_operand(self):
+        text = self.liberty()
+        if self.args[0] in ('&', '&&') or not text.startswith('!'):
+            return '({})'.format(text)
+        return text
+
+
+class NoneOf(Condition):
+    # (conditions,) - true when none of the conditions is, the condition of
+    # an ifnone path referencing the conditions of its sibling paths
+    __slots__ = ()
+
+    def render(self):
+        return '&'.join('!({})'.format(cond) for cond in self.args[0])
+
+    def render_liberty(self):
+        return '&'.join(
+            '!({})'.format(cond.liberty()) for cond in self.args[0])
+
+    def liberty_operand(self):
+        return '({})'.format(self.liberty())
+
+
+def inverted(port, cond=None):
+    # condition of a path with an inverted input: !port, and cond if given
+    signal = Not('!', Signal(port))
+    if cond is None:
+        return signal
+    return Binary('&', signal, cond)
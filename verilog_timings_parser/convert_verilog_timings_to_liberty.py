@@ -1,174 +1,291 @@
 import argparse
+import glob
+import itertools
+import json
+import re
+import sys
+from collections import Counter
 from pathlib import Path
 from . import extract_timings
+from .cache import ResultCache
+from .columnar import FALL, RISE, TimingArcs
+from .conditions import inverted
+from .incremental import replace_output, replace_outputs, update_liberty
+from .liberty_writer import LibertyWriter
+from .model import iter_bit_paths
+from .stats import NULLSTATS, Stats
+from .store import LibraryStore, StoreError
+from .yacc import Parser
 from pprint import pprint as pp
-from quicklogic_timings_importer import json_to_liberty
-
-
-def convert_specify_to_libertyjson(libraryname, parsedentry):
-    librarycontent = {}
-    for key, entry in parsedentry.items():
-        newname = key
-        cell = "cell {}".format(newname)
-        librarycontent[cell] = {}
-        allpaths = entry['pathdelays']
-        for paths in entry['ifstatements'].values():
-            allpaths.extend(paths)
-        for pathdelay in allpaths:
-            pinname = 'pin {}'.format(pathdelay['output_port'])
-            if pinname not in librarycontent[cell]:
-                librarycontent[cell][pinname] = {}
-            if 'timing ' not in librarycontent[cell][pinname]:
-                librarycontent[cell][pinname]['timing '] = []
+
+WRITERS = ('native', 'quicklogic')
+
+# corners of --corners, the min:typ:max values they take
+CORNERS = ('min', 'typ', 'max')
+
+
+def corner_value(triple, corner):
+    # typ falls back to min when it is not above it, as in set_intrinsic
+    if corner == 'min':
+        return triple[0]
+    if corner == 'max':
+        return triple[2]
+    return triple[1] if float(triple[1]) > float(triple[0]) else triple[0]
+
+
+def set_intrinsic(timing, transition, triple, collapsed=None, corner=None):
+    # Sets intrinsic_<transition> to the delay, or to the min/typ/max set when
+    # min and max differ. `collapsed` is the precomputed result of comparing
+    # min and max (see TimingArcs.collapsed), compared here if not given.
+    # With a corner, only its value is set.
+    key = 'intrinsic_{}'.format(transition)
+    if corner is not None:
+        timing[key] = corner_value(triple, corner)
+        return
+    if collapsed is None:
+        collapsed = float(triple[0]) == float(triple[2])
+    if collapsed:
+        timing[key] = triple[0]
+    else:
+        timing['{}_min'.format(key)] = triple[0]
+        timing[key] = triple[1] if float(triple[1]) > float(triple[0]) else triple[0]  # noqa: E501
+        timing['{}_max'.format(key)] = triple[2]
+
+
+def convert_cell_to_libertyjson(entry, rows=None, corner=None):
+    # Returns the pin groups of a single cell, empty if the specify block has
+    # no timings. `rows` optionally iterates over the rows of
+    # TimingArcs.collapsed for the arcs of this cell. With one of CORNERS,
+    # every min:typ:max value is replaced by the value of that corner.
+    def collapsed(transition):
+        return None if row is None else row[transition]
+
+    def intrinsic(timing, transition, triple):
+        set_intrinsic(timing, transition, triple, collapsed(
+            RISE if transition == 'rise' else FALL), corner)
+
+    row = None
+    cellcontent = {}
+    # the parse results are only read, never modified, so they can be
+    # converted any number of times and shared (see model.freeze). Paths
+    # between vector ports are expanded to their bits here, one at a time.
+    allpaths = iter_bit_paths(itertools.chain(
+        entry['pathdelays'], *entry['ifstatements'].values()))
+    for pathdelay in allpaths:
+        row = next(rows) if rows is not None else None
+        pinname = 'pin {}'.format(pathdelay['output_port'])
+        if pinname not in cellcontent:
+            cellcontent[pinname] = {}
+        if 'timing ' not in cellcontent[pinname]:
+            cellcontent[pinname]['timing '] = []
+        timing = {}
+        timing['related_pin'] = pathdelay['input_port']
+        cond = pathdelay['cond']
+        if pathdelay['source']:
+            if 'related_pin' in timing and pathdelay['source'] not in timing['related_pin'].split(' '):
+                timing['related_pin'] += ' {}'.format(pathdelay['source'])
+        if pathdelay['inverted']:
+            cond = inverted(pathdelay['input_port'], cond)
+        if cond:
+            timing['when'] = cond.liberty()
+        if pathdelay['edge'] == 'posedge':
+            timing['timing_type'] = 'rising_edge'
+        elif pathdelay['edge'] == 'negedge':
+            timing['timing_type'] = 'falling_edge'
+        if pathdelay['delaylist']['rise']:
+            intrinsic(timing, 'rise', pathdelay['delaylist']['rise'])
+        if pathdelay['delaylist']['fall']:
+            intrinsic(timing, 'fall', pathdelay['delaylist']['fall'])
+        if pathdelay['edge'] not in ['posedge', 'negedge']:
+            timing['timing_type'] = 'rising_edge'
+            cellcontent[pinname]['timing '].append(timing.copy())
+            timing['timing_type'] = 'falling_edge'
+            cellcontent[pinname]['timing '].append(timing)
+        else:
+            cellcontent[pinname]['timing '].append(timing)
+    for constraintcheck in entry['constraintchecks']:
+        row = next(rows) if rows is not None else None
+        if constraintcheck['type'] in ['setup', 'hold', 'skew', 'recovery']:
+            pinname = 'pin {}'.format(constraintcheck['data_event']['signals'][0])
+            if pinname not in cellcontent:
+                cellcontent[pinname] = {}
+            if 'timing ' not in cellcontent[pinname]:
+                cellcontent[pinname]['timing '] = []
+            timing = {}
+            if constraintcheck['data_event']['edge'] == 'posedge':
+                intrinsic(timing, 'rise', constraintcheck['limit'])
+            if constraintcheck['data_event']['edge'] == 'negedge':
+                intrinsic(timing, 'fall', constraintcheck['limit'])
+            if len(constraintcheck['data_event']['signals']) > 1:
+                cond = '&'.join(constraintcheck['data_event']['signals'][1:])
+                timing['when'] = cond
+            timing['timing_type'] = '{}_{}'.format(constraintcheck['type'], 'rising' if constraintcheck['reference_event']['edge'] == 'posedge' else 'falling')
+            timing['related_pin'] = constraintcheck['reference_event']['signals'][0]
+            cellcontent[pinname]['timing '].append(timing)
+        elif constraintcheck['type'] in ['setuphold', 'recrem']:
+            pinname = 'pin {}'.format(constraintcheck['data_event']['signals'][0])
+            if pinname not in cellcontent:
+                cellcontent[pinname] = {}
+            if 'timing ' not in cellcontent:
+                cellcontent[pinname]['timing '] = []
             timing = {}
-            timing['related_pin'] = pathdelay['input_port']
-            if pathdelay['cond']:
-                timing['when'] = pathdelay['cond']
-            if pathdelay['source']:
-                if 'related_pin' in timing and pathdelay['source'] not in timing['related_pin'].split(' '):
-                    timing['related_pin'] += ' {}'.format(pathdelay['source'])
-            if pathdelay['inverted']:
-                if 'when' in timing:
-                    timing['when'] = '!{}&'.format(pathdelay['input_port']) + timing['when']
-                else:
-                    timing['when'] = '!{}'.format(pathdelay['input_port'])
-            if pathdelay['edge'] == 'posedge':
-                timing['timing_type'] = 'rising_edge'
-            elif pathdelay['edge'] == 'negedge':
-                timing['timing_type'] = 'falling_edge'
-            if pathdelay['delaylist']['rise']:
-                if float(pathdelay['delaylist']['rise'][0]) == float(pathdelay['delaylist']['rise'][2]):
-                    timing['intrinsic_rise'] = pathdelay['delaylist']['rise'][0]
-                else:
-                    print(f'{pathdelay["delaylist"]["fall"][0]} {pathdelay["delaylist"]["fall"][2]}')
-                    timing['intrinsic_rise_min'] = pathdelay['delaylist']['rise'][0]
-                    timing['intrinsic_rise'] = pathdelay['delaylist']['rise'][1] if float(pathdelay['delaylist']['rise'][1]) > float(pathdelay['delaylist']['rise'][0]) else pathdelay['delaylist']['rise'][0]
-                    timing['intrinsic_rise_max'] = pathdelay['delaylist']['rise'][2]
-            if pathdelay['delaylist']['fall']:
-                if float(pathdelay['delaylist']['fall'][0]) == float(pathdelay['delaylist']['fall'][2]):
-                    timing['intrinsic_fall'] = pathdelay['delaylist']['fall'][0]
-                else:
-                    print(f'{pathdelay["delaylist"]["fall"][0]} {pathdelay["delaylist"]["fall"][2]}')
-                    timing['intrinsic_fall_min'] = pathdelay['delaylist']['fall'][0]
-                    timing['intrinsic_fall'] = pathdelay['delaylist']['fall'][1] if float(pathdelay['delaylist']['fall'][1]) > float(pathdelay['delaylist']['fall'][0]) else pathdelay['delaylist']['fall'][0]
-                    timing['intrinsic_fall_max'] = pathdelay['delaylist']['fall'][2]
-            if pathdelay['edge'] not in ['posedge', 'negedge']:
-                timing['timing_type'] = 'rising_edge'
-                librarycontent[cell][pinname]['timing '].append(timing.copy())
-                timing['timing_type'] = 'falling_edge'
-                librarycontent[cell][pinname]['timing '].append(timing)
+            timing['related_pin'] = constraintcheck['reference_event']['signals'][0]
+            limit = 'setup_limit' if constraintcheck['type'] == 'setuphold' else 'recovery_limit'
+            if constraintcheck['data_event']['edge'] == 'posedge':
+                intrinsic(timing, 'rise', constraintcheck[limit])
+            if constraintcheck['data_event']['edge'] == 'negedge':
+                intrinsic(timing, 'fall', constraintcheck[limit])
+            if len(constraintcheck['data_event']['signals']) > 1:
+                cond = '&'.join(constraintcheck['data_event']['signals'][1:])
+                timing['when'] = cond
+            timing['timing_type'] = '{}_{}'.format(
+                    'setup' if constraintcheck['type'] == 'setuphold' else 'recovery',
+                    'rising' if constraintcheck['reference_event']['edge'] == 'posedge' else 'falling')  # noqa: E501
+            cellcontent[pinname]['timing '].append(timing)
+
+            row = next(rows) if rows is not None else None
+            timing = {}
+            timing['related_pin'] = constraintcheck['reference_event']['signals'][0]
+            limit = 'hold_limit' if constraintcheck['type'] == 'setuphold' else 'removal_limit'
+            if constraintcheck['data_event']['edge'] == 'posedge':
+                intrinsic(timing, 'rise', constraintcheck[limit])
+            if constraintcheck['data_event']['edge'] == 'negedge':
+                intrinsic(timing, 'fall', constraintcheck[limit])
+            if len(constraintcheck['data_event']['signals']) > 1:
+                cond = '&'.join(constraintcheck['data_event']['signals'][1:])
+                timing['when'] = cond
+            timing['timing_type'] = '{}_{}'.format(
+                'hold' if constraintcheck['type'] == 'setuphold' else 'removal',
+                'rising' if constraintcheck['reference_event']['edge'] == 'posedge' else 'falling')
+            cellcontent[pinname]['timing '].append(timing)
+        elif constraintcheck['type'] == 'period':
+            pinname = 'pin {}'.format(constraintcheck['reference_event']['signals'][0])
+            if pinname not in cellcontent:
+                cellcontent[pinname] = {}
+            if 'minimum_period ' not in cellcontent:
+                cellcontent[pinname]['minimum_period '] = []
+            period = {}
+
+            if len(constraintcheck['reference_event']['signals']) > 1:
+                period['when'] = '&'.join(constraintcheck['reference_event']['signals'][1:])
+
+            constraint_attr = 'constraint'
+            limit = 'limit'
+            if corner is not None:
+                period[constraint_attr] = corner_value(constraintcheck[limit], corner)
             else:
-                librarycontent[cell][pinname]['timing '].append(timing)
-        for constraintcheck in entry['constraintchecks']:
-            if constraintcheck['type'] in ['setup', 'hold', 'skew', 'recovery']:
-                pinname = 'pin {}'.format(constraintcheck['data_event']['signals'][0])
-                if pinname not in librarycontent[cell]:
-                    librarycontent[cell][pinname] = {}
-                if 'timing ' not in librarycontent[cell][pinname]:
-                    librarycontent[cell][pinname]['timing '] = []
-                timing = {}
-                if constraintcheck['data_event']['edge'] == 'posedge':
-                    if float(constraintcheck['limit'][0]) == float(constraintcheck['limit'][2]):
-                        timing['intrinsic_rise'] = constraintcheck['limit'][0]
-                    else:
-                        timing['intrinsic_rise_min'] = constraintcheck['limit'][0]
-                        timing['intrinsic_rise'] = constraintcheck['limit'][1] if float(constraintcheck['limit'][1]) > float(constraintcheck['limit'][0]) else constraintcheck['limit'][0]
-                        timing['intrinsic_rise_max'] = constraintcheck['limit'][2]
-                if constraintcheck['data_event']['edge'] == 'negedge':
-                    if float(constraintcheck['limit'][0]) == float(constraintcheck['limit'][2]):
-                        timing['intrinsic_fall'] = constraintcheck['limit'][0]
-                    else:
-                        timing['intrinsic_fall_min'] = constraintcheck['limit'][0]
-                        timing['intrinsic_fall'] = constraintcheck['limit'][1] if float(constraintcheck['limit'][1]) > float(constraintcheck['limit'][0]) else constraintcheck['limit'][0]
-                        timing['intrinsic_fall_max'] = constraintcheck['limit'][2]
-                if len(constraintcheck['data_event']['signals']) > 1:
-                    cond = '&'.join(constraintcheck['data_event']['signals'][1:])
-                    timing['when'] = cond
-                timing['timing_type'] = '{}_{}'.format(constraintcheck['type'], 'rising' if constraintcheck['reference_event']['edge'] == 'posedge' else 'falling')
-                timing['related_pin'] = constraintcheck['reference_event']['signals'][0]
-                librarycontent[cell][pinname]['timing '].append(timing)
-            elif constraintcheck['type'] in ['setuphold', 'recrem']:
-                pinname = 'pin {}'.format(constraintcheck['data_event']['signals'][0])
-                if pinname not in librarycontent[cell]:
-                    librarycontent[cell][pinname] = {}
-                if 'timing ' not in librarycontent[cell]:
-                    librarycontent[cell][pinname]['timing '] = []
-                timing = {}
-                timing['related_pin'] = constraintcheck['reference_event']['signals'][0]
-                limit = 'setup_limit' if constraintcheck['type'] == 'setuphold' else 'recovery_limit'
-                if constraintcheck['data_event']['edge'] == 'posedge':
-                    if float(constraintcheck[limit][0]) == float(constraintcheck[limit][2]):
-                        timing['intrinsic_rise'] = constraintcheck[limit][0]
-                    else:
-                        timing['intrinsic_rise_min'] = constraintcheck[limit][0]
-                        timing['intrinsic_rise'] = constraintcheck[limit][1] if float(constraintcheck[limit][1]) > float(constraintcheck[limit][0]) else constraintcheck[limit][0]
-                        timing['intrinsic_rise_max'] = constraintcheck[limit][2]
-                if constraintcheck['data_event']['edge'] == 'negedge':
-                    if float(constraintcheck[limit][0]) == float(constraintcheck[limit][2]):
-                        timing['intrinsic_fall'] = constraintcheck[limit][0]
-                    else:
-                        timing['intrinsic_fall_min'] = constraintcheck[limit][0]
-                        timing['intrinsic_fall'] = constraintcheck[limit][1] if float(constraintcheck[limit][1]) > float(constraintcheck[limit][0]) else constraintcheck[limit][0]
-                        timing['intrinsic_fall_max'] = constraintcheck[limit][2]
-                if len(constraintcheck['data_event']['signals']) > 1:
-                    cond = '&'.join(constraintcheck['data_event']['signals'][1:])
-                    timing['when'] = cond
-                timing['timing_type'] = '{}_{}'.format(
-                        'setup' if constraintcheck['type'] == 'setuphold' else 'recovery',
-                        'rising' if constraintcheck['reference_event']['edge'] == 'posedge' else 'falling')  # noqa: E501
-                librarycontent[cell][pinname]['timing '].append(timing)
-
-                timing = {}
-                timing['related_pin'] = constraintcheck['reference_event']['signals'][0]
-                limit = 'hold_limit' if constraintcheck['type'] == 'setuphold' else 'removal_limit'
-                if constraintcheck['data_event']['edge'] == 'posedge':
-                    if float(constraintcheck[limit][0]) == float(constraintcheck[limit][2]):
-                        timing['intrinsic_rise'] = constraintcheck[limit][0]
-                    else:
-                        timing['intrinsic_rise_min'] = constraintcheck[limit][0]
-                        timing['intrinsic_rise'] = constraintcheck[limit][1] if float(constraintcheck[limit][1]) > float(constraintcheck[limit][0]) else constraintcheck[limit][0]
-                        timing['intrinsic_rise_max'] = constraintcheck[limit][2]
-                if constraintcheck['data_event']['edge'] == 'negedge':
-                    if float(constraintcheck[limit][0]) == float(constraintcheck[limit][2]):
-                        timing['intrinsic_fall'] = constraintcheck[limit][0]
-                    else:
-                        timing['intrinsic_fall_min'] = constraintcheck[limit][0]
-                        timing['intrinsic_fall'] = constraintcheck[limit][1] if float(constraintcheck[limit][1]) > float(constraintcheck[limit][0]) else constraintcheck[limit][0]
-                        timing['intrinsic_fall_max'] = constraintcheck[limit][2]
-                if len(constraintcheck['data_event']['signals']) > 1:
-                    cond = '&'.join(constraintcheck['data_event']['signals'][1:])
-                    timing['when'] = cond
-                timing['timing_type'] = '{}_{}'.format(
-                    'hold' if constraintcheck['type'] == 'setuphold' else 'removal',
-                    'rising' if constraintcheck['reference_event']['edge'] == 'posedge' else 'falling')
-                librarycontent[cell][pinname]['timing '].append(timing)
-            elif constraintcheck['type'] == 'period':
-                pinname = 'pin {}'.format(constraintcheck['reference_event']['signals'][0])
-                if pinname not in librarycontent[cell]:
-                    librarycontent[cell][pinname] = {}
-                if 'minimum_period ' not in librarycontent[cell]:
-                    librarycontent[cell][pinname]['minimum_period '] = []
-                period = {}
-
-                if len(constraintcheck['reference_event']['signals']) > 1:
-                    period['when'] = '&'.join(constraintcheck['reference_event']['signals'][1:])
-
-                constraint_attr = 'constraint'
-                limit = 'limit'
                 period['{}_min'.format(constraint_attr)] = constraintcheck[limit][0]
                 period['{}'.format(constraint_attr)] = constraintcheck[limit][1]
                 period['{}_max'.format(constraint_attr)] = constraintcheck[limit][2]
-                librarycontent[cell][pinname]['minimum_period '].append(period)
+            cellcontent[pinname]['minimum_period '].append(period)
+        else:
+            pinname = 'pin {}'.format(constraintcheck['reference_event']['signals'][0])
+            if pinname not in cellcontent:
+                cellcontent[pinname] = {}
+            limit = 'width_limit'
+            if corner is not None:
+                cellcontent[pinname]['min_pulse_width_low'] = corner_value(constraintcheck[limit], corner)
+                cellcontent[pinname]['min_pulse_width_high'] = corner_value(constraintcheck[limit], corner)
+            else:
+                cellcontent[pinname]['min_pulse_width_low'] = constraintcheck[limit][0]
+                cellcontent[pinname]['min_pulse_width_high'] = constraintcheck[limit][2]
+    return cellcontent
+
+
+def count_emitted(stats, cellcontent):
+    # counts the timing arcs, constraint checks and conditions of a cell
+    for pincontent in cellcontent.values():
+        for timing in pincontent.get('timing ', ()):
+            if timing['timing_type'] in ('rising_edge', 'falling_edge'):
+                stats.count('arcs')
             else:
-                pinname = 'pin {}'.format(constraintcheck['reference_event']['signals'][0])
-                if pinname not in librarycontent[cell]:
-                    librarycontent[cell][pinname] = {}
-                limit = 'width_limit'
-                librarycontent[cell][pinname]['min_pulse_width_low'] = constraintcheck[limit][0]
-                librarycontent[cell][pinname]['min_pulse_width_high'] = constraintcheck[limit][2]
-
-        if len(librarycontent[cell]) == 0:
-            del librarycontent[cell]
+                stats.count('checks')
+            if 'when' in timing:
+                stats.count('conditions')
+        for period in pincontent.get('minimum_period ', ()):
+            stats.count('checks')
+            if 'when' in period:
+                stats.count('conditions')
+        if 'min_pulse_width_low' in pincontent:
+            stats.count('checks')
+
+
+def iter_libertyjson_cells(parsedentry, arcs=None, stats=NULLSTATS):
+    # Yields (cell group name, cell content) for every cell with timings, one
+    # cell at a time. With `arcs` (TimingArcs of the same parse results) the
+    # min/max comparisons are taken from its precomputed arrays. The
+    # conversion is timed as the 'convert' phase of `stats`.
+    return stats.timed_iter(
+        'convert', _iter_libertyjson_cells(parsedentry, arcs, stats))
+
+
+def convert_shared(parsedentry, convert):
+    # Yields (cell, convert(cell, entry)) for every cell, calling `convert`
+    # once for cells sharing the same parse results (identical specify
+    # blocks, see VerilogSpecifyExtractor.blockresults). A conversion is only
+    # kept until the last cell sharing it is reached.
+    remaining = Counter(id(entry) for entry in parsedentry.values())
+    shared = dict()
+    for cell, entry in parsedentry.items():
+        ident = id(entry)
+        remaining[ident] -= 1
+        if ident in shared:
+            converted = shared[ident] if remaining[ident] else \
+                shared.pop(ident)
+        else:
+            converted = convert(cell, entry)
+            if remaining[ident]:
+                shared[ident] = converted
+        yield cell, converted
+
+
+def _iter_libertyjson_cells(parsedentry, arcs, stats):
+    def convert(key, entry):
+        rows = None
+        if arcs is not None:
+            rows = iter(arcs.collapsed[arcs.rows[key]].tolist())
+        return convert_cell_to_libertyjson(entry, rows)
+
+    for key, cellcontent in convert_shared(parsedentry, convert):
+        if len(cellcontent) > 0:
+            if stats.enabled:
+                count_emitted(stats, cellcontent)
+            yield "cell {}".format(key), cellcontent
+
+
+def iter_corner_cells(parsedentry, corners, stats=NULLSTATS):
+    # Yields (cell group name, [cell content for each of corners]) for every
+    # cell with timings - the cell is converted for all corners at once, so
+    # the libraries of all corners can be written side by side
+    return stats.timed_iter(
+        'convert', _iter_corner_cells(parsedentry, corners, stats))
+
+
+def _iter_corner_cells(parsedentry, corners, stats):
+    def convert(key, entry):
+        return [
+            convert_cell_to_libertyjson(entry, corner=corner)
+            for corner in corners
+        ]
+
+    for key, contents in convert_shared(parsedentry, convert):
+        if len(contents[0]) > 0:
+            if stats.enabled:
+                count_emitted(stats, contents[0])
+            yield "cell {}".format(key), contents
+
+
+def convert_specify_to_libertyjson(libraryname, parsedentry, arcs=None,
+                                   stats=NULLSTATS, corner=None):
+    if corner is not None:
+        librarycontent = {
+            key: contents[0]
+            for key, contents in iter_corner_cells(
+                parsedentry, [corner], stats)
+        }
+    else:
+        librarycontent = dict(
+            iter_libertyjson_cells(parsedentry, arcs, stats))
     if len(librarycontent) > 0:
         library = {'library {}'.format(libraryname): librarycontent}
         return library
@@ -176,12 +293,404 @@ def convert_specify_to_libertyjson(libraryname, parsedentry):
         return None
 
 
-def main():
-    parser = argparse.ArgumentParser()
+def expand_input_paths(inputs):
+    # Expands glob patterns and @file lists (one path or pattern per line)
+    # into a list of paths, keeping the order and dropping repeated files
+    paths = []
+    for entry in inputs:
+        if entry.startswith('@'):
+            with open(entry[1:], 'r') as filelist:
+                listed = [line.strip() for line in filelist]
+            paths.extend(expand_input_paths([
+                line for line in listed
+                if line and not line.startswith('#')]))
+        elif any(c in entry for c in '*?['):
+            matches = sorted(glob.glob(entry, recursive=True))
+            if not matches:
+                raise FileNotFoundError(
+                    'No files matching pattern {}'.format(entry))
+            paths.extend(Path(match) for match in matches)
+        else:
+            paths.append(Path(entry))
+    uniquepaths = []
+    seen = set()
+    for path in paths:
+        resolved = path.resolve()
+        if resolved not in seen:
+            seen.add(resolved)
+            uniquepaths.append(path)
+    return uniquepaths
+
+
+def write_liberty(libraryname, parsedspecifyblocks, stream, writer='native',
+                  arcs=None, stats=NULLSTATS):
+    # Writes the Liberty library for the parsed specify blocks to `stream`.
+    # The native writer emits every cell as soon as it is converted, the
+    # quicklogic one needs the whole library as a single dict. Returns False,
+    # without writing anything, if there are no timings.
+    with stats.phase('write'):
+        if writer == 'quicklogic':
+            from quicklogic_timings_importer import json_to_liberty
+            jsonliberty = convert_specify_to_libertyjson(
+                libraryname, parsedspecifyblocks, arcs, stats)
+            if not jsonliberty:
+                return False
+            liblines = json_to_liberty.JSONToLibertyWriter.convert_json_to_liberty(  # noqa: E501
+                jsonliberty)
+            stream.write('\n'.join(liblines))
+            return True
+        cells = iter_libertyjson_cells(parsedspecifyblocks, arcs, stats)
+        first = next(cells, None)
+        if first is None:
+            return False
+        LibertyWriter(stream).write_library(
+            libraryname, itertools.chain([first], cells))
+        return True
+
+
+def corner_library_name(libraryname, corner):
+    return '{}_{}'.format(libraryname, corner)
+
+
+def write_liberty_corners(libraryname, parsedspecifyblocks, streams, corners,
+                          writer='native', stats=NULLSTATS):
+    # Writes a Liberty library per corner, with the values of corners[i] and
+    # named <libraryname>_<corner>, to streams[i]. The native writer converts
+    # each cell for all corners and writes it to all streams before moving
+    # on to the next one. Returns False, without writing anything, if there
+    # are no timings.
+    with stats.phase('write'):
+        if writer == 'quicklogic':
+            from quicklogic_timings_importer import json_to_liberty
+            for stream, corner in zip(streams, corners):
+                jsonliberty = convert_specify_to_libertyjson(
+                    corner_library_name(libraryname, corner),
+                    parsedspecifyblocks, stats=stats, corner=corner)
+                if not jsonliberty:
+                    return False
+                liblines = json_to_liberty.JSONToLibertyWriter.convert_json_to_liberty(  # noqa: E501
+                    jsonliberty)
+                stream.write('\n'.join(liblines))
+            return True
+        cells = iter_corner_cells(parsedspecifyblocks, corners, stats)
+        first = next(cells, None)
+        if first is None:
+            return False
+        writers = [LibertyWriter(stream) for stream in streams]
+        for libertywriter, corner in zip(writers, corners):
+            libertywriter.begin_group(
+                'library', corner_library_name(libraryname, corner))
+        for key, contents in itertools.chain([first], cells):
+            for libertywriter, content in zip(writers, contents):
+                libertywriter.write_group(key, content)
+        for libertywriter in writers:
+            libertywriter.end_group()
+        return True
+
+
+def parse_corners(parser, args):
+    # corners given with --corners, None without it
+    if args.corners is None:
+        return None
+    corners = [corner.strip() for corner in args.corners.split(',')]
+    for corner in corners:
+        if corner not in CORNERS:
+            parser.error('Unknown corner {}, expected a list of {}'.format(
+                corner, ', '.join(CORNERS)))
+    if len(set(corners)) != len(corners):
+        parser.error('Corners given more than once: {}'.format(args.corners))
+    return corners
+
+
+def add_extractor_arguments(parser):
+    # options shared by all command line tools reading Verilog files
     parser.add_argument(
-        "input",
-        help="Input Verilog file",
+        "--print",
+        help="Prints additional info",
+        action="store_true")
+    parser.add_argument(
+        "-j", "--jobs",
+        help="Number of worker processes used for parsing specify blocks (0 uses all CPUs)",  # noqa: E501
+        type=int,
+        default=1)
+    parser.add_argument(
+        "--duplicate-cells",
+        help="What to do with a module defined in more than one input file",
+        choices=extract_timings.VerilogLibraryExtractor.DUPLICATE_POLICIES,
+        default="error")
+    parser.add_argument(
+        "--reader",
+        help="How input files are scanned: memory-mapped pre-scan that only cleans specify blocks, or a streaming read of the whole file",  # noqa: E501
+        choices=extract_timings.VerilogLibraryExtractor.READERS,
+        default="mmap")
+    parser.add_argument(
+        "--lexer",
+        help="Specify block tokenizer: the hand-written one, or the PLY lexer",  # noqa: E501
+        choices=Parser.LEXERS,
+        default="fast")
+    parser.add_argument(
+        "-D", "--define",
+        help="Define a macro (NAME or NAME=VALUE) for `ifdef, `ifndef, `elsif, `else and `endif, which are then evaluated instead of dropping every `ifdef branch except SC_USE_PG_PIN",  # noqa: E501
+        action="append",
+        dest="defines",
+        default=[])
+    parser.add_argument(
+        "--preprocess",
+        help="Evaluate conditional compilation like -D, with no macros defined",  # noqa: E501
+        action="store_true")
+    parser.add_argument(
+        "--config",
+        help="Produce the outputs for configuration NAME=DEF1,DEF2,... with the given macros defined on top of -D, written with .NAME inserted before the file extension. Can be repeated, the inputs are read only once for all configurations. With --config only the outputs of the configurations are written, add e.g. --config base= for one with just the -D macros",  # noqa: E501
+        action="append",
+        dest="configs",
+        default=[])
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory for cached parse results (defaults to the user cache directory)",  # noqa: E501
         type=Path)
+    parser.add_argument(
+        "--cache-size",
+        help="Maximum size of the parse result cache in MiB",
+        type=int,
+        default=256)
+    parser.add_argument(
+        "--no-cache",
+        help="Do not read or store cached parse results",
+        action="store_true")
+    parser.add_argument(
+        "--writer",
+        help="Liberty writer: built-in streaming writer, or the one from quicklogic_timings_importer",  # noqa: E501
+        choices=WRITERS,
+        default="native")
+    parser.add_argument(
+        "--export-arcs",
+        help="Save all timing arcs as NumPy columns to the given .npz file (requires numpy)",  # noqa: E501
+        type=Path)
+    parser.add_argument(
+        "--from-db",
+        help="Read the parse results from a library database written with --save-db instead of parsing Verilog files",  # noqa: E501
+        type=Path)
+    parser.add_argument(
+        "--save-db",
+        help="Save the parse results to the given SQLite library database",
+        type=Path)
+    parser.add_argument(
+        "--keep-going",
+        help="Skip modules whose specify blocks fail to parse and convert the rest, then report all errors and exit with status 1",  # noqa: E501
+        action="store_true")
+    parser.add_argument(
+        "--diagnostics",
+        help="With --keep-going, write the errors as JSON to the given file instead of printing them",  # noqa: E501
+        type=Path)
+    parser.add_argument(
+        "--stats",
+        help="Print time spent in each phase, the slowest modules to parse and token, production and emitted arc counts, as text or JSON",  # noqa: E501
+        nargs="?",
+        const="text",
+        choices=["text", "json"])
+
+
+def export_arcs(parser, args, extractor, config=None):
+    # Returns the TimingArcs of the parse results if --export-arcs was given,
+    # after saving them
+    if args.export_arcs is None:
+        return None
+    try:
+        arcs = TimingArcs.from_parsed(extractor.parsedspecifyblocks)
+    except ImportError as ex:
+        parser.error(str(ex))
+    arcs.save(config_path(args.export_arcs, config))
+    return arcs
+
+
+def preprocessing_options(parser, args):
+    # Returns the macros defined with -D, None if conditional compilation is
+    # not evaluated, and the defines of every --config by name
+    try:
+        defines = [extract_timings.parse_define(d) for d in args.defines]
+        configs = dict()
+        for config in args.configs:
+            name, _, configdefines = config.partition('=')
+            if not re.match(r'^[a-zA-Z0-9_.-]+$', name):
+                raise ValueError('Invalid configuration name: {}'.format(
+                    name))
+            if name in configs:
+                raise ValueError('Configuration {} given twice'.format(name))
+            configs[name] = defines + [
+                extract_timings.parse_define(d)
+                for d in configdefines.split(',') if d
+            ]
+    except ValueError as ex:
+        parser.error(str(ex))
+    if not defines and not args.preprocess:
+        defines = None
+    return defines, configs
+
+
+def config_path(path, config):
+    # output path of a --config, e.g. lib.lib -> lib.<config>.lib
+    if path is None or config is None:
+        return path
+    return path.with_name('{}.{}{}'.format(path.stem, config, path.suffix))
+
+
+def configurations(extractor):
+    # (--config name, extractor) of every configuration, a single one with
+    # no name without --config
+    if isinstance(extractor, extract_timings.MultiConfigExtractor):
+        return list(extractor.extractors.items())
+    return [(None, extractor)]
+
+
+def create_extractor(parser, args):
+    # Returns the expanded list of input files and an extractor for them,
+    # collecting statistics in extractor.stats if --stats was given
+    try:
+        inputs = expand_input_paths(args.input)
+    except OSError as ex:
+        parser.error(str(ex))
+    defines, configs = preprocessing_options(parser, args)
+    options = {
+        'reader': args.reader,
+        'resultcache': None if args.no_cache else ResultCache(
+            args.cache_dir, args.cache_size << 20),
+        'stats': Stats() if args.stats else None,
+        'lexer': args.lexer
+    }
+    if configs:
+        extractor = extract_timings.MultiConfigExtractor(
+            inputs, configs, args.duplicate_cells, **options)
+    else:
+        extractor = extract_timings.VerilogLibraryExtractor(
+            inputs, args.duplicate_cells, defines=defines, **options)
+    extractor.keepgoing = args.keep_going
+    return inputs, extractor
+
+
+def print_stats(args, extractor):
+    if args.stats:
+        print(extractor.stats.report(args.stats))
+
+
+def report_diagnostics(args, extractor):
+    # Prints a summary of the modules skipped with --keep-going and their
+    # diagnostics as JSON, or writes the latter to --diagnostics. Returns
+    # the number of skipped modules.
+    if not args.keep_going:
+        return 0
+    diagnostics = extractor.diagnostics
+    if diagnostics:
+        print('Skipped {} modules that failed to parse:'.format(
+            len(diagnostics)))
+        for d in diagnostics:
+            print('  {}:{}: {}: {}'.format(
+                d.source or '?', d.line or '?', d.module, d.message))
+    document = json.dumps({
+        'failed_modules': len(diagnostics),
+        'diagnostics': [d._asdict() for d in diagnostics]
+    }, indent=1)
+    if args.diagnostics is not None:
+        with open(args.diagnostics, 'w') as f:
+            f.write(document + '\n')
+    elif diagnostics:
+        print(document)
+    return len(diagnostics)
+
+
+def check_inputs(parser, args):
+    if args.from_db is not None:
+        if args.input:
+            parser.error('input files cannot be given with --from-db')
+        if args.save_db is not None:
+            parser.error('--save-db cannot be used with --from-db')
+        if args.configs:
+            parser.error('--config cannot be used with --from-db')
+    elif not args.input:
+        parser.error('no input files given')
+    if args.diagnostics is not None and not args.keep_going:
+        parser.error('--diagnostics requires --keep-going')
+
+
+def parse_inputs(parser, args):
+    # Parses the input files, or reads the parse results with --from-db
+    check_inputs(parser, args)
+    inputs, extractor = create_extractor(parser, args)
+    if args.from_db is not None:
+        try:
+            with extractor.stats.phase('load'), \
+                    LibraryStore(args.from_db) as store:
+                extractor.parsedspecifyblocks = store.load()
+                extractor.sources = store.sources()
+        except StoreError as ex:
+            parser.error(str(ex))
+    else:
+        try:
+            extractor.parse(args.jobs)
+        except extract_timings.DuplicateModuleError as ex:
+            parser.error(str(ex))
+        if args.save_db is not None:
+            for name, configextractor in configurations(extractor):
+                with extractor.stats.phase('save'):
+                    LibraryStore.save(
+                        config_path(args.save_db, name),
+                        configextractor.parsedspecifyblocks,
+                        configextractor.sources)
+    if args.print:
+        for name, configextractor in configurations(extractor):
+            if name is not None:
+                print('Configuration: {}'.format(name))
+            print_parse_results(inputs, configextractor)
+    return extractor
+
+
+def print_parse_results(inputs, extractor):
+    if extractor.resultcache is not None:
+        print('Parse result cache: {} hits, {} misses'.format(
+            extractor.resultcache.hits,
+            extractor.resultcache.misses))
+    for path in inputs:
+        with open(path, 'r') as f:
+            print('-------------------')
+            print(f.read())
+    print('-------------------')
+    for module, parsedentry in extractor.parsedspecifyblocks.items():
+        print('-------------------')
+        print('Module: {}'.format(module))
+        print('-------------------')
+        print('Specparams')
+        for param, value in parsedentry["specparams"].items():
+            pp('{} = {}'.format(param, value))
+        print('-------------------')
+        print('Constraint checks')
+        for c in parsedentry["constraintchecks"]:
+            pp(c)
+        print('-------------------')
+        print('Path delays')
+        for p in parsedentry["pathdelays"]:
+            pp(p)
+        print('-------------------')
+        print('Conditioned path delays')
+        for v in parsedentry["ifstatements"].values():
+            for e in v:
+                pp(e)
+
+
+def incremental_options(args, extractor):
+    # settings recorded in the manifest, a change rebuilds the whole output
+    options = {'writer': args.writer}
+    if extractor.defines is not None:
+        options['defines'] = sorted(extractor.defines)
+    return options
+
+
+def main(argv=None, prog=None):
+    # argv and prog default to the ones of the command line
+    parser = argparse.ArgumentParser(prog=prog)
+    parser.add_argument(
+        "input",
+        help="Input Verilog files, glob patterns or @file lists",
+        nargs="*",
+        type=str)
     parser.add_argument(
         "library_name",
         help="Library name for Liberty file",
@@ -190,53 +699,83 @@ def main():
         "output",
         help="Output Liberty file",
         type=Path)
+    add_extractor_arguments(parser)
     parser.add_argument(
-        "--print",
-        help="Prints additional info",
+        "--corners",
+        help="Write a library with scalar values for each of the given corners out of min,typ,max instead of a single library with min/typ/max values. The libraries are named <library>_<corner> and written with .<corner> inserted before the extension of the output",  # noqa: E501
+        type=str)
+    parser.add_argument(
+        "--incremental",
+        help="Only regenerate the cells whose specify blocks changed since the last run and splice them into the existing output",  # noqa: E501
         action="store_true")
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    corners = parse_corners(parser, args)
 
-    with open(args.input, 'r') as f:
-        veriloglines = f.readlines()
-    extractor = extract_timings.VerilogSpecifyExtractor(veriloglines)
-    extractor.parse()
-    if args.print:
-        print('-------------------')
-        print(''.join(veriloglines))
-        print('-------------------')
-        for module, parsedentry in extractor.parsedspecifyblocks.items():
-            print('-------------------')
-            print('Module: {}'.format(module))
-            print('-------------------')
-            print('Specparams')
-            for param, value in parsedentry["specparams"].items():
-                pp('{} = {}'.format(param, value))
-            print('-------------------')
-            print('Constraint checks')
-            for c in parsedentry["constraintchecks"]:
-                pp(c)
-            print('-------------------')
-            print('Path delays')
-            for p in parsedentry["pathdelays"]:
-                pp(p)
-            print('-------------------')
-            print('Conditioned path delays')
-            for v in parsedentry["ifstatements"].values():
-                for e in v:
-                    pp(e)
-
-    if len(extractor.parsedspecifyblocks) > 0:
-        jsonliberty = convert_specify_to_libertyjson(args.library_name, extractor.parsedspecifyblocks)
-        if jsonliberty:
-            liblines = json_to_liberty.JSONToLibertyWriter.convert_json_to_liberty(jsonliberty)
-            if liblines:
-                with open(args.output, 'w') as outputlib:
-                    outputlib.write('\n'.join(liblines))
+    arcs = None
+    extractor = None
+
+    def write(libraryname, parsedspecifyblocks, stream):
+        return write_liberty(
+            libraryname, parsedspecifyblocks, stream, args.writer, arcs,
+            extractor.stats)
+
+    if args.incremental:
+        if args.export_arcs is not None:
+            parser.error('--export-arcs cannot be used with --incremental')
+        if args.from_db is not None or args.save_db is not None:
+            parser.error(
+                '--from-db and --save-db cannot be used with --incremental')
+        if args.configs:
+            parser.error('--config cannot be used with --incremental')
+        if corners is not None:
+            parser.error('--corners cannot be used with --incremental')
+        check_inputs(parser, args)
+        _, extractor = create_extractor(parser, args)
+        try:
+            extractor.extract()
+        except extract_timings.DuplicateModuleError as ex:
+            parser.error(str(ex))
+        if len(extractor.specifyblocks) == 0:
+            print('No specify block')
         else:
-            print('No timings data in specify block')
-    else:
-        print('No specify block')
+            rebuilt = update_liberty(
+                extractor,
+                args.library_name,
+                args.output,
+                write,
+                args.jobs,
+                incremental_options(args, extractor))
+            if rebuilt is None:
+                print('No timings data in specify block')
+            elif args.print:
+                print('Rebuilt cells: {}'.format(', '.join(rebuilt)))
+        print_stats(args, extractor)
+        if report_diagnostics(args, extractor):
+            sys.exit(1)
+        return
+    extractor = parse_inputs(parser, args)
+    for name, configextractor in configurations(extractor):
+        arcs = export_arcs(parser, args, configextractor, name)
+        parsed = configextractor.parsedspecifyblocks
+        if len(parsed) > 0:
+            output = config_path(args.output, name)
+            if corners is not None:
+                written = replace_outputs(
+                    [config_path(output, corner) for corner in corners],
+                    lambda streams: write_liberty_corners(
+                        args.library_name, parsed, streams, corners,
+                        args.writer, extractor.stats))
+            else:
+                written = replace_output(output, lambda f: write(
+                    args.library_name, parsed, f))
+            if not written:
+                print('No timings data in specify block')
+        else:
+            print('No specify block')
+    print_stats(args, extractor)
+    if report_diagnostics(args, extractor):
+        sys.exit(1)
 
 
 if __name__ == '__main__':
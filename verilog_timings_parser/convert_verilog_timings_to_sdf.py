@@ -0,0 +1,78 @@
+import argparse
+import sys
+from pathlib import Path
+from .convert_verilog_timings_to_liberty import (
+    add_extractor_arguments, config_path, configurations, export_arcs,
+    parse_inputs, print_stats, report_diagnostics, write_liberty)
+from .incremental import replace_output
+from .sdf_writer import SDFWriter
+
+
+def main(argv=None, prog=None):
+    # argv and prog default to the ones of the command line
+    parser = argparse.ArgumentParser(prog=prog)
+    parser.add_argument(
+        "input",
+        help="Input Verilog files, glob patterns or @file lists",
+        nargs="*",
+        type=str)
+    parser.add_argument(
+        "design_name",
+        help="Design name for SDF file",
+        type=str)
+    parser.add_argument(
+        "output",
+        help="Output SDF file",
+        type=Path)
+    parser.add_argument(
+        "--timescale",
+        help="Time unit of the delays in the Verilog files",
+        type=str,
+        default="1ns")
+    parser.add_argument(
+        "--liberty",
+        help="Also write a Liberty file from the same parse results",
+        type=Path)
+    parser.add_argument(
+        "--library-name",
+        help="Library name for Liberty file (defaults to the design name)",
+        type=str)
+    add_extractor_arguments(parser)
+
+    args = parser.parse_args(argv)
+
+    extractor = parse_inputs(parser, args)
+    for name, configextractor in configurations(extractor):
+        arcs = export_arcs(parser, args, configextractor, name)
+        write_outputs(args, configextractor, arcs, name)
+    print_stats(args, extractor)
+    if report_diagnostics(args, extractor):
+        sys.exit(1)
+
+
+def write_outputs(args, extractor, arcs, config=None):
+    stats = extractor.stats
+    if len(extractor.parsedspecifyblocks) == 0:
+        print('No specify block')
+        return
+    with stats.phase('sdf'):
+        written = replace_output(
+            config_path(args.output, config),
+            lambda f: SDFWriter(f).write_sdf(
+                args.design_name,
+                extractor.parsedspecifyblocks,
+                args.timescale) > 0)
+    if not written:
+        print('No timings data in specify block')
+        return
+    if args.liberty is not None:
+        libraryname = args.library_name or args.design_name
+        replace_output(
+            config_path(args.liberty, config),
+            lambda f: write_liberty(
+                libraryname, extractor.parsedspecifyblocks, f, args.writer,
+                arcs, stats))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,293 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import socket
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+from . import convert_verilog_timings_to_liberty
+from . import convert_verilog_timings_to_sdf
+from . import extract_timings
+from .cache import user_cache_dir
+
+# Conversion daemon: `--serve` keeps the interpreter, the imported modules
+# and the parsers warm in a long-running process and runs the conversion
+# tools on behalf of clients connecting to a Unix domain socket. A request
+# is a single line of JSON:
+#
+#     {"command": "convert", "tool": "liberty" or "sdf",
+#      "args": [command line of the tool], "cwd": "/client/directory"}
+#
+# where args carries the input paths, the library or design name, the
+# output path and the options, exactly as given to verilog-timings-to-liberty
+# or verilog-timings-to-sdf. The reply is a line of JSON with the exit
+# status and the output of the tool: {"status": 0, "stdout": "...",
+# "stderr": "..."}. {"command": "stop"} shuts the daemon down.
+
+TOOLS = {
+    'liberty': ('verilog-timings-to-liberty',
+                convert_verilog_timings_to_liberty.main),
+    'sdf': ('verilog-timings-to-sdf', convert_verilog_timings_to_sdf.main)
+}
+
+
+def default_socket_path():
+    return os.environ.get(
+        'VERILOG_TIMINGS_PARSER_SOCKET',
+        os.path.join(user_cache_dir(), 'daemon.sock'))
+
+
+def warm_up():
+    # builds the parser and imports the optional writer ahead of the
+    # first request
+    extract_timings.get_parser()
+    try:
+        import quicklogic_timings_importer.json_to_liberty  # noqa: F401
+    except ImportError:
+        pass
+
+
+def run_tool(tool, args, cwd):
+    # Runs a conversion tool in this process, returns its reply
+    prog, main = TOOLS[tool]
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    status = 0
+    olddir = os.getcwd()
+    try:
+        os.chdir(cwd)
+        with contextlib.redirect_stdout(stdout), \
+                contextlib.redirect_stderr(stderr):
+            main(args, prog)
+    except SystemExit as ex:
+        if isinstance(ex.code, int):
+            status = ex.code
+        elif ex.code is not None:
+            stderr.write('{}\n'.format(ex.code))
+            status = 1
+    except Exception:
+        stderr.write(traceback.format_exc())
+        status = 1
+    finally:
+        os.chdir(olddir)
+    return {
+        'status': status,
+        'stdout': stdout.getvalue(),
+        'stderr': stderr.getvalue()
+    }
+
+
+def _send(connection, message):
+    connection.sendall(json.dumps(message).encode('utf-8') + b'\n')
+
+
+def _receive(connection):
+    with connection.makefile('rb') as f:
+        line = f.readline()
+    if not line:
+        raise ConnectionError('Connection closed without a message')
+    return json.loads(line.decode('utf-8'))
+
+
+class ConversionServer(object):
+    '''Serves conversion requests on a Unix domain socket.
+
+    With workers > 1 requests are handed to a pool of worker processes with
+    warm parsers, so that many requests are converted at once; otherwise
+    they are converted one at a time in the server process. Requests are
+    read in the server loop, a client that does not send its request or
+    read the reply within `timeout` seconds is disconnected so it cannot
+    hold up the others.
+    '''
+
+    def __init__(self, path, workers=1, timeout=10.0):
+        self.path = path
+        self.workers = workers
+        self.timeout = timeout
+
+    def _bind(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)),
+                        exist_ok=True)
+            if os.path.exists(self.path):
+                # refuse to take over the socket of a running daemon
+                try:
+                    _send_request(self.path, {'command': 'ping'})
+                except OSError:
+                    os.remove(self.path)
+                else:
+                    raise OSError(
+                        'A daemon is already listening on {}'.format(
+                            self.path))
+            umask = os.umask(0o177)
+            try:
+                sock.bind(self.path)
+            finally:
+                os.umask(umask)
+            sock.listen()
+        except BaseException:
+            sock.close()
+            raise
+        return sock
+
+    def serve_forever(self):
+        sock = self._bind()
+        executor = None
+        try:
+            if self.workers > 1:
+                executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=warm_up)
+            else:
+                warm_up()
+            while True:
+                connection, _ = sock.accept()
+                connection.settimeout(self.timeout)
+                try:
+                    request = _receive(connection)
+                except (OSError, ValueError):
+                    connection.close()
+                    continue
+                command = request.get('command')
+                if command == 'stop':
+                    _send(connection, {'status': 0})
+                    connection.close()
+                    break
+                if command != 'convert' or request.get('tool') not in TOOLS:
+                    self._reply(connection, {
+                        'status': 2,
+                        'stdout': '',
+                        'stderr': 'Unknown request\n'})
+                elif executor is None:
+                    self._reply(connection, run_tool(
+                        request['tool'], request['args'], request['cwd']))
+                else:
+                    future = executor.submit(
+                        run_tool,
+                        request['tool'], request['args'], request['cwd'])
+                    future.add_done_callback(
+                        lambda f, c=connection: self._reply_future(c, f))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            sock.close()
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def _reply(self, connection, reply):
+        try:
+            _send(connection, reply)
+        except OSError:
+            # the client is gone
+            pass
+        finally:
+            connection.close()
+
+    def _reply_future(self, connection, future):
+        # runs in the thread of the pool, a failing worker process must not
+        # leave the client waiting
+        try:
+            reply = future.result()
+        except Exception:
+            reply = {
+                'status': 1,
+                'stdout': '',
+                'stderr': traceback.format_exc()
+            }
+        self._reply(connection, reply)
+
+
+def _send_request(path, request):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        if request['command'] == 'ping':
+            return None
+        _send(sock, request)
+        return _receive(sock)
+
+
+def run_client(path, tool, args):
+    # Converts through the daemon listening on `path`, or in this process if
+    # there is none. Returns the exit status.
+    request = {
+        'command': 'convert',
+        'tool': tool,
+        'args': args,
+        'cwd': os.getcwd()
+    }
+    try:
+        reply = _send_request(path, request)
+    except (FileNotFoundError, ConnectionRefusedError):
+        reply = None
+    if reply is None:
+        prog, main = TOOLS[tool]
+        try:
+            main(args, prog)
+        except SystemExit as ex:
+            return ex.code
+        return 0
+    sys.stdout.write(reply['stdout'])
+    sys.stderr.write(reply['stderr'])
+    return reply['status']
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Runs verilog-timings-to-liberty or verilog-timings-to-sdf through a warm daemon process, or in this process if no daemon is running, e.g. %(prog)s liberty cells.v library out.lib")  # noqa: E501
+    parser.add_argument(
+        "tool",
+        help="Conversion to run",
+        nargs="?",
+        choices=sorted(TOOLS))
+    parser.add_argument(
+        "args",
+        help="Arguments of the conversion tool",
+        nargs=argparse.REMAINDER)
+    parser.add_argument(
+        "--socket",
+        help="Unix domain socket of the daemon (defaults to $VERILOG_TIMINGS_PARSER_SOCKET or daemon.sock in the cache directory)",  # noqa: E501
+        type=str,
+        default=default_socket_path())
+    parser.add_argument(
+        "--serve",
+        help="Run the daemon",
+        action="store_true")
+    parser.add_argument(
+        "--workers",
+        help="Number of worker processes converting requests of the daemon",
+        type=int,
+        default=1)
+    parser.add_argument(
+        "--stop",
+        help="Stop the daemon",
+        action="store_true")
+
+    args = parser.parse_args()
+
+    if args.serve:
+        try:
+            ConversionServer(args.socket, args.workers).serve_forever()
+        except OSError as ex:
+            parser.error(str(ex))
+        except KeyboardInterrupt:
+            pass
+        return
+    if args.stop:
+        try:
+            _send_request(args.socket, {'command': 'stop'})
+        except OSError:
+            parser.error('No daemon is listening on {}'.format(args.socket))
+        return
+    if args.tool is None:
+        parser.error('a tool to run, --serve or --stop is required')
+    sys.exit(run_client(args.socket, args.tool, args.args))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,81 @@
+import io
+import mmap
+import os
 import re
-from collections import defaultdict
+import time
+from collections import defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
 
+from .model import freeze
+from .stats import NULLSTATS, Stats
 from .yacc import Parser
 
 
+_sharedparsers = dict()
+
+
+def get_parser(lexer='fast'):
+    # building the LALR tables and the lexer is expensive, so a single parser
+    # per tokenizer backend is built on first use and reused for every
+    # specify block in the process
+    if lexer not in _sharedparsers:
+        _sharedparsers[lexer] = Parser(lexer=lexer)
+    return _sharedparsers[lexer]
+
+
+def parse_specify_block(p, specifyblock):
+    p.parse('\n'.join(specifyblock))
+    return freeze({
+        'specparams': p.specparams,
+        'constraintchecks': p.constraintchecks,
+        'pathdelays': p.pathdelays,
+        'ifstatements': p.ifstatements
+    })
+
+
+def error_info(ex):
+    # (type, message, line within the specify block, token) of a parser
+    # exception, as plain values that can be sent back from the workers
+    token = getattr(ex, 'token', None)
+    return (
+        type(ex).__name__,
+        str(ex),
+        getattr(ex, 'lineno', None),
+        None if token is None else str(token))
+
+
+def _init_worker(lexer='fast'):
+    get_parser(lexer)
+
+
+def _parse_in_worker(items, collect=False, lexer='fast'):
+    # Items are (module, block key, cache key), where the block key is the
+    # tuple of lines of the specify block; both keys are sent back with the
+    # result, as the module may have been redefined in the meantime.
+    # Exceptions raised by the parser are not guaranteed to survive
+    # pickling, so the worker sends back the error description instead.
+    # With collect, statistics of the batch are sent back along with the
+    # results.
+    results = []
+    p = get_parser(lexer)
+    stats = Stats() if collect else None
+    p.collect_stats(stats)
+    for module, key, cachekey in items:
+        start = time.perf_counter() if collect else None
+        try:
+            parsedentry = parse_specify_block(p, key)
+        except Exception as ex:
+            results.append((module, key, cachekey, None, error_info(ex)))
+        else:
+            results.append((module, key, cachekey, parsedentry, None))
+        if collect:
+            stats.add_module_time(module, time.perf_counter() - start)
+    if collect:
+        p.collect_stats(None)
+        return results, stats.export()
+    return results
+
+
 class SpecifyParserError(Exception):
     def __init__(self, lineno, line):
         self.message = 'Error at line {}: {}'.format(lineno, line)
@@ -13,17 +85,512 @@ class SpecifyParserError(Exception):
             return self.message
 
 
+class ModuleParseError(Exception):
+    def __init__(self, module, errortype, message):
+        self.module = module
+        self.errortype = errortype
+        self.message = 'Module {}: {}: {}'.format(module, errortype, message)
+
+    def __str__(self):
+        if self.message:
+            return self.message
+
+
+class ParseDiagnostic(namedtuple('ParseDiagnostic', [
+        'module', 'source', 'line', 'blockline', 'token', 'errortype',
+        'message'])):
+    # A module that failed to parse and was skipped with keepgoing:
+    #
+    # * source - the file the module comes from, None if not known,
+    # * line - 1-based source line of the error, None if not known,
+    # * blockline - 1-based line of the error within the cleaned specify
+    #   block, None if the error does not tell,
+    # * token - text of the offending token, None if not known (e.g. a
+    #   syntax error at the end of the block),
+    # * errortype, message - name and text of the exception.
+    __slots__ = ()
+
+
+class DuplicateModuleError(Exception):
+    def __init__(self, module, firstpath, secondpath):
+        self.message = 'Module {} from {} is already defined in {}'.format(
+            module, secondpath, firstpath)
+
+    def __str__(self):
+        if self.message:
+            return self.message
+
+
+# conditional compilation directives, with the macro name they take
+_redirective = re.compile(
+    r'`(?P<directive>ifdef|ifndef|elsif|else|endif|define|undef)\b'
+    r'(?: ?(?P<name>[a-zA-Z_][a-zA-Z0-9_\$]*))?')
+
+
+def parse_define(text):
+    # macro name of a NAME or NAME=VALUE define, only definedness matters
+    name = text.split('=', 1)[0].strip()
+    if not re.match(r'^[a-zA-Z_][a-zA-Z0-9_\$]*$', name):
+        raise ValueError('Invalid define: {}'.format(text))
+    return name
+
+
+class Preprocessor(object):
+    # Evaluates nested `ifdef, `ifndef, `elsif, `else and `endif for a set
+    # of defined macro names, kept up to date by `define and `undef. Macros
+    # are not expanded. `active` tells whether the current line is compiled.
+
+    def __init__(self, defines=()):
+        self.defines = set(defines)
+        # (enclosing branch active, a branch was taken) per open `ifdef
+        self.stack = []
+        self.active = True
+
+    def directives(self, num, line, directives):
+        # applies the (directive, name) pairs found in a line, in order
+        for directive, name in directives:
+            if directive in ('ifdef', 'ifndef', 'elsif', 'define', 'undef') \
+                    and not name:
+                raise SpecifyParserError(num, line)
+            if directive in ('ifdef', 'ifndef'):
+                taken = self.active and \
+                    (name in self.defines) == (directive == 'ifdef')
+                self.stack.append((self.active, taken))
+                self.active = taken
+            elif directive == 'define':
+                if self.active:
+                    self.defines.add(name)
+            elif directive == 'undef':
+                if self.active:
+                    self.defines.discard(name)
+            elif not self.stack:
+                raise SpecifyParserError(num, line)
+            elif directive == 'elsif':
+                enclosing, taken = self.stack[-1]
+                self.active = enclosing and not taken and name in self.defines
+                self.stack[-1] = (enclosing, taken or self.active)
+            elif directive == 'else':
+                enclosing, taken = self.stack[-1]
+                self.active = enclosing and not taken
+                self.stack[-1] = (enclosing, True)
+            else:
+                self.active = self.stack.pop()[0]
+
+
+class SpecifyBlockScanner(object):
+    # Line-by-line state machine finding specify blocks in cleaned Verilog.
+    # feed() returns (module, lines, linenumbers) once the endspecify line of
+    # a block is seen, lines outside specify blocks are not stored. With a
+    # Preprocessor, conditional compilation is evaluated properly, otherwise
+    # the `ifdef heuristic of _legacy_directive is applied.
+
+    remodule = re.compile(r'^\s*module\s*(?P<name>[a-zA-Z_][a-zA-Z0-9_\$]*)')
+    respecify = re.compile(r'^\s*specify')
+    reendspecify = re.compile(r'^\s*endspecify')
+
+    def __init__(self, preprocessor=None):
+        self.isspecify = 0
+        self.modulename = None
+        self.preprocessor = preprocessor
+        # XXX: assumption here that the crucial information of ifdef is stored in else part
+        # XXX: except for SC_USE_PG_PIN
+        self.ifdef = False
+        self.block = None
+        self.blocklinenumbers = None
+        # specify block lines dropped by conditional compilation, and the
+        # modules they come from
+        self.ifdefskipped = 0
+        self.ifdefmodules = set()
+
+    @classmethod
+    def classify(cls, line):
+        # (kind, value) of a line: the module name of a module line, the
+        # (directive, name) pairs of a directive line
+        modulematch = cls.remodule.match(line)
+        if modulematch:
+            return 'module', modulematch.group('name')
+        if cls.respecify.match(line):
+            return 'specify', None
+        if cls.reendspecify.match(line):
+            return 'endspecify', None
+        if '`' in line:
+            directives = _redirective.findall(line)
+            if directives:
+                return 'directive', directives
+        return None, None
+
+    def feed(self, num, line):
+        kind, value = self.classify(line)
+        return self.step(num, line, kind, value)
+
+    def step(self, num, line, kind, value):
+        # feed() for a line classified already
+        preprocessor = self.preprocessor
+        if preprocessor is not None:
+            if kind == 'directive':
+                preprocessor.directives(num, line, value)
+                return None
+            if not preprocessor.active:
+                if self.isspecify == 1:
+                    self.ifdefskipped += 1
+                    self.ifdefmodules.add(self.modulename)
+                return None
+        if kind == 'module':
+            if self.isspecify == 1:
+                raise SpecifyParserError(num, line)
+            self.modulename = value
+            self.isspecify = 0
+        elif kind == 'specify':
+            if self.isspecify != 0:
+                raise SpecifyParserError(num, line)
+            self.isspecify = 1
+            if self.modulename is None:
+                raise SpecifyParserError(num, line)
+            self.block = [line]
+            self.blocklinenumbers = [num]
+        elif kind == 'endspecify':
+            if self.isspecify != 1:
+                raise SpecifyParserError(num, line)
+            self.isspecify = 2
+            self.block.append(line)
+            self.blocklinenumbers.append(num)
+            return self.finish()
+        elif preprocessor is None and self._legacy_directive(line):
+            pass
+        elif self.isspecify == 1:
+            if not self.ifdef:
+                self.block.append(line)
+                self.blocklinenumbers.append(num)
+            else:
+                self.ifdefskipped += 1
+                self.ifdefmodules.add(self.modulename)
+        return None
+
+    def _legacy_directive(self, line):
+        if '`ifdef' in line:
+            if 'SC_USE_PG_PIN' not in line:
+                self.ifdef = True
+        elif '`ifndef' in line:
+            pass
+        elif '`else' in line:
+            self.ifdef = False
+        elif '`endif' in line:
+            self.ifdef = False
+        else:
+            return False
+        return True
+
+    def finish(self):
+        # returns the block left open at the end of the file, if any
+        if self.block is None:
+            return None
+        block = self.modulename, self.block, self.blocklinenumbers
+        self.block = None
+        self.blocklinenumbers = None
+        return block
+
+
+class MultiConfigScanner(object):
+    # Runs a SpecifyBlockScanner with its own Preprocessor for each set of
+    # defines over the same lines. Every line is classified only once, the
+    # scanners only follow their own conditional compilation state. feed()
+    # and finish() return nothing, the blocks of configuration i are
+    # collected in blocks[i].
+
+    def __init__(self, definesets):
+        self.scanners = [
+            SpecifyBlockScanner(Preprocessor(defines))
+            for defines in definesets
+        ]
+        self.blocks = [[] for _ in self.scanners]
+
+    def feed(self, num, line):
+        kind, value = SpecifyBlockScanner.classify(line)
+        for scanner, blocks in zip(self.scanners, self.blocks):
+            block = scanner.step(num, line, kind, value)
+            if block is not None:
+                blocks.append(block)
+        return None
+
+    def finish(self):
+        for scanner, blocks in zip(self.scanners, self.blocks):
+            block = scanner.finish()
+            if block is not None:
+                blocks.append(block)
+        return None
+
+
+_recomment = re.compile(r'/\*|//')
+_recontinuation = re.compile(r'\\[\s\r\t]*$')
+_respaces = re.compile(' +')
+
+
+def _collapse_whitespace(line):
+    if '\t' in line:
+        line = line.replace('\t', ' ')
+    if '  ' in line:
+        line = _respaces.sub(' ', line)
+    return line
+
+
+def iter_numbered_verilog_lines(stream, chunksize=1 << 16):
+    # Incremental equivalent of VerilogSpecifyExtractor.clear_verilog - reads
+    # the stream in chunks and yields lines with comments and line
+    # continuations removed and whitespace collapsed, together with the
+    # (0-based) number of the source line each of them starts at. Only the
+    # current line and the block comment state are kept between chunks.
+    recomment = _recomment
+    recontinuation = _recontinuation
+    inblockcomment = False
+    # text of the line ending with a continuation, joined with the next one
+    continuation = None
+    logical = []
+    rawnum = -1
+    startnum = 0
+    carry = ''
+    while True:
+        chunk = stream.read(chunksize)
+        if chunk:
+            rawlines = (carry + chunk).split('\n')
+            carry = rawlines.pop()
+        else:
+            rawlines = [carry]
+        for raw in rawlines:
+            rawnum += 1
+            if not logical and continuation is None:
+                startnum = rawnum
+            pos = 0
+            pieces = []
+            newline = True
+            if not inblockcomment and '/' not in raw:
+                pieces.append(raw)
+                pos = len(raw)
+            while pos < len(raw) or inblockcomment:
+                if inblockcomment:
+                    end = raw.find('*/', pos)
+                    if end < 0:
+                        # the newline is a part of the comment
+                        newline = False
+                        break
+                    inblockcomment = False
+                    pos = end + 2
+                    continue
+                match = recomment.search(raw, pos)
+                if match is None:
+                    pieces.append(raw[pos:])
+                    break
+                pieces.append(raw[pos:match.start()])
+                if match.group() == '//':
+                    break
+                inblockcomment = True
+                pos = match.end()
+            logical.extend(pieces)
+            if not newline:
+                continue
+            line = ''.join(logical)
+            logical = []
+            if continuation is not None:
+                if not line.strip():
+                    # whitespace-only lines after a continuation are dropped
+                    continue
+                line = continuation + line
+            match = recontinuation.search(line)
+            if match:
+                continuation = line[:match.start()]
+                continue
+            continuation = None
+            yield startnum, _collapse_whitespace(line)
+        if not chunk:
+            break
+    if logical or continuation is not None:
+        line = (continuation or '') + ''.join(logical)
+        yield startnum, _collapse_whitespace(line)
+
+
+def iter_clean_verilog_lines(stream, chunksize=1 << 16):
+    for _, line in iter_numbered_verilog_lines(stream, chunksize):
+        yield line
+
+
+def iter_numbered_specify_blocks(stream, chunksize=1 << 16, scanner=None,
+                                 stats=NULLSTATS):
+    # Yields (module, lines, linenumbers) as soon as every block is closed,
+    # linenumbers are the 1-based source lines of the block lines. Cleaning
+    # the lines is timed as the `clean` phase of stats.
+    if scanner is None:
+        scanner = SpecifyBlockScanner()
+    lines = stats.timed_iter(
+        'clean', iter_numbered_verilog_lines(stream, chunksize))
+    for num, line in lines:
+        block = scanner.feed(num + 1, line)
+        if block is not None:
+            yield block
+    block = scanner.finish()
+    if block is not None:
+        yield block
+
+
+def iter_specify_blocks(stream, chunksize=1 << 16):
+    # Yields (module, specify_text) pairs as soon as every block is closed
+    for module, lines, _ in iter_numbered_specify_blocks(stream, chunksize):
+        yield module, '\n'.join(lines)
+
+
+# line comments are not searched for - keywords have to start a line, so they
+# can never be hidden by one, and other matches are checked with rfind
+_represcan = re.compile(
+    rb'/\*|^[ \t]*(?P<keyword>endspecify|specify|module)|`(?:ifdef|ifndef|elsif|else|endif|define|undef)',  # noqa: E501
+    re.MULTILINE)
+
+
+def _decode(data):
+    # spans end just before a newline, so a CRLF of the last line is cut in
+    # half - its \r is dropped like the ones of the lines before
+    text = data.decode('utf-8', errors='replace').replace('\r\n', '\n')
+    if text.endswith('\r'):
+        text = text[:-1]
+    return text
+
+
+def prescan_specify_blocks(path, scanner=None, stats=NULLSTATS):
+    # Memory-maps the file and locates module, specify, endspecify and
+    # `ifdef-like lines with a bytes-level search. Only those lines and the
+    # specify...endspecify slices are decoded and cleaned, everything else
+    # (behavioural code, UDPs, port lists) is skipped without being copied.
+    # Yields (module, lines, linenumbers) like iter_numbered_specify_blocks.
+    # Decoding and cleaning the lines is timed as the `clean` phase of stats.
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    with mm:
+        yield from _prescan_mapped(mm, scanner=scanner, stats=stats)
+
+
+def _prescan_mapped(mm, gap=1 << 12, scanner=None, stats=NULLSTATS):
+    if scanner is None:
+        scanner = SpecifyBlockScanner()
+    size = len(mm)
+    countedpos = 0
+    countedlines = 0
+
+    def linenumber(pos):
+        # 0-based number of the line containing pos, pos never decreases
+        nonlocal countedpos, countedlines
+        while countedpos < pos:
+            end = min(pos, countedpos + (1 << 20))
+            countedlines += mm[countedpos:end].count(b'\n')
+            countedpos = end
+        return countedlines
+
+    def feed(start, end):
+        base = linenumber(start)
+        with stats.phase('clean'):
+            text = _decode(mm[start:end])
+        lines = stats.timed_iter(
+            'clean', iter_numbered_verilog_lines(io.StringIO(text)))
+        for num, line in lines:
+            block = scanner.feed(base + num + 1, line)
+            if block is not None:
+                yield block
+
+    # Interesting lines and specify regions are gathered into spans, spans
+    # separated by less than `gap` bytes are merged and cleaned together
+    spanstart = None
+    spanend = None
+
+    def addspan(start, end):
+        nonlocal spanstart, spanend
+        if spanstart is not None and start - spanend <= gap:
+            spanend = max(spanend, end)
+            return
+        if spanstart is not None:
+            yield from feed(spanstart, spanend)
+        spanstart = start
+        spanend = end
+
+    pos = 0
+    regionstart = None
+    while pos < size:
+        match = _represcan.search(mm, pos)
+        if match is None:
+            break
+        pos = match.end()
+        keyword = match.group('keyword')
+        linestart = mm.rfind(b'\n', 0, match.start()) + 1
+        lineend = mm.find(b'\n', match.start())
+        if lineend < 0:
+            lineend = size
+        if keyword is None and mm.rfind(b'//', linestart, match.start()) >= 0:
+            # commented out with a line comment
+            pos = lineend
+            continue
+        if match.group() == b'/*':
+            end = mm.find(b'*/', pos)
+            pos = size if end < 0 else end + 2
+            continue
+        if regionstart is not None:
+            # inside a specify block only its end or a misplaced module matter
+            if keyword == b'endspecify':
+                yield from addspan(regionstart, lineend)
+                regionstart = None
+                continue
+            if keyword != b'module':
+                continue
+            yield from addspan(regionstart, linestart)
+            regionstart = None
+        if keyword == b'specify':
+            regionstart = linestart
+        else:
+            yield from addspan(linestart, lineend)
+    if regionstart is not None:
+        yield from addspan(regionstart, size)
+    if spanstart is not None:
+        yield from feed(spanstart, spanend)
+    block = scanner.finish()
+    if block is not None:
+        yield block
+
+
 class VerilogSpecifyExtractor(object):
-    def __init__(self, veriloglines):
+    def __init__(self, veriloglines, parser=None, resultcache=None,
+                 stats=None, lexer='fast', defines=None):
         self.moduletimings = []
         self.inmodule = False
         self.inspecify = False
         self.currmodulename = ''
         self.veriloglines = veriloglines
         self.specifyblocks = None
+        # source line numbers of the lines in specifyblocks, when known
+        self.specifylinenumbers = None
         self.parsedspecifyblocks = None
+        self.parser = parser
+        # tokenizer backend of the parsers built when `parser` is not given
+        self.lexer = lexer
+        self.resultcache = resultcache
+        # phase timings and counters, see stats.Stats
+        self.stats = stats if stats is not None else NULLSTATS
+        # called with (module, parsedentry) as soon as a module is parsed
+        # or loaded from the result cache, in the order they complete - e.g.
+        # TimingDB.add_cell to index the modules while the rest is parsed
+        self.onparsed = None
+        # with keepgoing, modules failing to parse are skipped and described
+        # in diagnostics instead of stopping the parse at the first error
+        self.keepgoing = False
+        self.diagnostics = []
+        # macros defined for conditional compilation, None keeps the
+        # `ifdef heuristic of SpecifyBlockScanner
+        self.defines = defines
+        # block lines -> (parse results, error info) of every distinct
+        # specify block parsed so far, cells with identical blocks share the
+        # frozen parse results
+        self.blockresults = dict()
 
     def clear_verilog(self):
+        with self.stats.phase('clean'):
+            self._clear_verilog()
+
+    def _clear_verilog(self):
         # join all lines into single string
         fullfile = ''.join(self.veriloglines)
 
@@ -42,79 +609,388 @@ class VerilogSpecifyExtractor(object):
 
         self.veriloglines = fullfile.split('\n')
 
+    def scanner(self):
+        if self.defines is None:
+            return SpecifyBlockScanner()
+        return SpecifyBlockScanner(Preprocessor(self.defines))
+
     def extract_specify_blocks(self):
+        self.stats.start('extract')
         specifyblocks = defaultdict(list)
-        isspecify = 0
-        modulename = None
-        # XXX: assumption here that the crucial information of ifdef is stored in else part
-        # XXX: except for SC_USE_PG_PIN
-        ifdef = False
-        remodule = re.compile(r'^\s*module\s*(?P<name>[a-zA-Z_][a-zA-Z0-9_\$]*)')
-        respecify = re.compile(r'^\s*specify')
-        reendspecify = re.compile(r'^\s*endspecify')
+        scanner = self.scanner()
         for num, line in enumerate(self.veriloglines):
-            modulematch = remodule.match(line)
-            if modulematch:
-                if isspecify == 1:
-                    raise SpecifyParserError(num, line)
-                modulename = modulematch.group('name')
-                isspecify = 0
-            elif respecify.match(line):
-                if isspecify != 0:
-                    raise SpecifyParserError(num, line)
-                isspecify = 1
-                if modulename is None:
-                    raise SpecifyParserError(num, line)
-                specifyblocks[modulename].append(line)
-            elif reendspecify.match(line):
-                if isspecify != 1:
-                    raise SpecifyParserError(num, line)
-                isspecify = 2
-                specifyblocks[modulename].append(line)
-            elif '`ifdef' in line:
-                if 'SC_USE_PG_PIN' not in line:
-                    ifdef = True
-            elif '`ifndef' in line:
-                pass
-            elif '`else' in line:
-                ifdef = False
-            elif '`endif' in line:
-                ifdef = False
-            else:
-                if isspecify == 1 and not ifdef:
-                    specifyblocks[modulename].append(line)
+            block = scanner.feed(num, line)
+            if block is not None:
+                specifyblocks[block[0]].extend(block[1])
+        block = scanner.finish()
+        if block is not None:
+            specifyblocks[block[0]].extend(block[1])
         self.specifyblocks = specifyblocks
+        self.stats.stop()
+        self._count_ifdef(scanner)
+
+    def _count_ifdef(self, scanner):
+        # a module is skipped when nothing but specify and endspecify is
+        # left of its block
+        if self.stats.enabled:
+            self.stats.count('ifdef_skipped_lines', scanner.ifdefskipped)
+            self.stats.count(
+                'ifdef_affected_modules', len(scanner.ifdefmodules))
+            self.stats.count('ifdef_skipped_modules', sum(
+                1 for module in scanner.ifdefmodules
+                if len(self.specifyblocks.get(module, ())) <= 2))
+
+    def _collect_numbered_blocks(self, blocks):
+        specifyblocks = defaultdict(list)
+        specifylinenumbers = defaultdict(list)
+        for module, lines, linenumbers in blocks:
+            specifyblocks[module].extend(lines)
+            specifylinenumbers[module].extend(linenumbers)
+        self.specifyblocks = specifyblocks
+        self.specifylinenumbers = specifylinenumbers
+
+    def extract_specify_blocks_from_stream(self, stream, chunksize=1 << 16):
+        # streaming alternative to clear_verilog + extract_specify_blocks
+        scanner = self.scanner()
+        with self.stats.phase('extract'):
+            self._collect_numbered_blocks(
+                iter_numbered_specify_blocks(
+                    stream, chunksize, scanner, self.stats))
+        self._count_ifdef(scanner)
+
+    def extract_specify_blocks_from_file(self, path):
+        # memory-mapped alternative to clear_verilog + extract_specify_blocks
+        scanner = self.scanner()
+        with self.stats.phase('extract'):
+            self._collect_numbered_blocks(
+                prescan_specify_blocks(path, scanner, self.stats))
+        self._count_ifdef(scanner)
 
-    def parse_specify_blocks(self):
-        parsedspecifyblocks = dict()
+    def report_parse_error(self, module, error):
+        print('---------------')
+        print('Module: {}'.format(module))
+        print('---------------')
+        for i, line in enumerate(self.specifyblocks[module]):
+            print('{:06d}: {}'.format(i + 1, line))
+        print('---------------')
+        print(error)
+        print('---------------')
+
+    def diagnose(self, module, errortype, message, blockline, token):
+        # ParseDiagnostic of a module, with the line within the block mapped
+        # to the source line when the source lines of the block are known
+        line = None
+        linenumbers = (self.specifylinenumbers or {}).get(module)
+        if blockline is not None and linenumbers and \
+                0 < blockline <= len(linenumbers):
+            line = linenumbers[blockline - 1]
+        return ParseDiagnostic(
+            module, None, line, blockline, token, errortype, message)
+
+    def _parse_failed(self, module, info):
+        # Records the error of a module with keepgoing, otherwise reports it
+        # and returns False so the caller raises
+        if not self.keepgoing:
+            self.report_parse_error(module, info[1])
+            return False
+        self.diagnostics.append(self.diagnose(module, *info))
+        self.stats.count('failed_modules')
+        return True
+
+    def parse_specify_blocks(self, jobs=1):
         if self.specifyblocks is None:
             return None
-        for module, specifyblock in self.specifyblocks.items():
+        self.parse_module_batches([list(self.specifyblocks)], jobs)
+
+    def parse_module_batches(self, batches, jobs=1, chunksize=8):
+        # Parses the specify blocks of the modules from `batches`, an iterable
+        # of lists of module names. Batches are consumed lazily, so with
+        # jobs > 1 the workers already parse the first batches while the next
+        # ones are still being produced. Results are stored in the order of
+        # self.specifyblocks, modules left out of `batches` are skipped.
+        # Time spent producing the batches is only counted as 'parse' if it
+        # is not timed as a phase of its own.
+        with self.stats.phase('parse'):
+            self._parse_module_batches(batches, jobs, chunksize)
+
+    def _parse_module_batches(self, batches, jobs, chunksize):
+        if jobs is None or jobs < 1:
+            jobs = os.cpu_count() or 1
+        results = dict()
+        collect = self.stats.enabled
+        if jobs == 1:
+            p = self.parser
+            if p is None:
+                p = get_parser(self.lexer)
+            if collect:
+                p.collect_stats(self.stats)
             try:
-                p = Parser()
-                p.parse('\n'.join(specifyblock))
-                parsedspecifyblocks[module] = {
-                    'specparams': p.specparams,
-                    'constraintchecks': p.constraintchecks,
-                    'pathdelays': p.pathdelays,
-                    'ifstatements': p.ifstatements
-                }
-            except Exception as ex:
-                print('---------------')
-                print('Module: {}'.format(module))
-                print('---------------')
-                for i, line in enumerate(specifyblock):
-                    print('{:06d}: {}'.format(i + 1, line))
-                print('---------------')
-                print(ex)
-                print('---------------')
-                raise ex
-        self.parsedspecifyblocks = parsedspecifyblocks
-
-    def parse(self):
+                for batch in batches:
+                    for module in batch:
+                        key = tuple(self.specifyblocks[module])
+                        if self._reuse_block(results, module, key):
+                            continue
+                        cachekey, parsedentry = self._load_cached(module)
+                        if parsedentry is None:
+                            if collect:
+                                start = time.perf_counter()
+                            try:
+                                parsedentry = parse_specify_block(
+                                    p, self.specifyblocks[module])
+                            except Exception as ex:
+                                error = error_info(ex)
+                                self.blockresults[key] = (None, error)
+                                if self._parse_failed(module, error):
+                                    continue
+                                raise ex
+                            if collect:
+                                self.stats.add_module_time(
+                                    module, time.perf_counter() - start)
+                            self._store_cached(cachekey, parsedentry)
+                        self.blockresults[key] = (parsedentry, None)
+                        self._add_result(results, module, parsedentry)
+            finally:
+                if collect:
+                    p.collect_stats(None)
+        else:
+            with ProcessPoolExecutor(
+                    max_workers=jobs,
+                    initializer=_init_worker,
+                    initargs=(self.lexer,)) as executor:
+                futures = []
+                # block lines -> modules waiting for a block being parsed
+                waiting = dict()
+                # module -> block lines of its current definition, results
+                # of definitions replaced by a later file are dropped
+                current = dict()
+                for batch in batches:
+                    items = []
+                    for module in batch:
+                        key = tuple(self.specifyblocks[module])
+                        current[module] = key
+                        if self._reuse_block(results, module, key):
+                            continue
+                        if key in waiting:
+                            self.stats.count('duplicate_blocks')
+                            waiting[key].append(module)
+                            continue
+                        cachekey, parsedentry = self._load_cached(module)
+                        if parsedentry is None:
+                            waiting[key] = []
+                            items.append((module, key, cachekey))
+                        else:
+                            self.blockresults[key] = (parsedentry, None)
+                            self._add_result(results, module, parsedentry)
+                    for i in range(0, len(items), chunksize):
+                        futures.append(executor.submit(
+                            _parse_in_worker, items[i:i + chunksize],
+                            collect, self.lexer))
+                # results are checked in submission order, so the reported
+                # error does not depend on which worker finishes first
+                for future in futures:
+                    batchresults = future.result()
+                    if collect:
+                        batchresults, data = batchresults
+                        self.stats.merge(data)
+                    for module, blockkey, cachekey, parsedentry, error in \
+                            batchresults:
+                        # the block that was parsed, not the current
+                        # definition of the module
+                        self.blockresults[blockkey] = (parsedentry, error)
+                        if error is None:
+                            self._store_cached(cachekey, parsedentry)
+                        for shared in [module] + waiting.pop(blockkey):
+                            if error is None:
+                                if current[shared] == blockkey:
+                                    self._add_result(
+                                        results, shared, parsedentry)
+                            elif not self._parse_failed(shared, error):
+                                executor.shutdown(
+                                    wait=False, cancel_futures=True)
+                                raise ModuleParseError(shared, *error[:2])
+        self.parsedspecifyblocks = {
+            module: results[module]
+            for module in self.specifyblocks if module in results
+        }
+        self.stats.count('modules', len(self.parsedspecifyblocks))
+
+    def _reuse_block(self, results, module, key):
+        # Gives `module` the parse results of an identical block parsed
+        # before, returns False if there is none
+        known = self.blockresults.get(key)
+        if known is None:
+            return False
+        self.stats.count('duplicate_blocks')
+        parsedentry, error = known
+        if error is None:
+            self._add_result(results, module, parsedentry)
+        elif not self._parse_failed(module, error):
+            raise ModuleParseError(module, *error[:2])
+        return True
+
+    def _add_result(self, results, module, parsedentry):
+        results[module] = parsedentry
+        if self.onparsed is not None:
+            self.onparsed(module, parsedentry)
+
+    def _load_cached(self, module):
+        # Returns the cache key of the current definition of `module` and
+        # its cached parse results, or None for either of them
+        if self.resultcache is None:
+            return None, None
+        key = self.resultcache.key(self.specifyblocks[module])
+        parsedentry = self.resultcache.get(key)
+        self.stats.count(
+            'cache_misses' if parsedentry is None else 'cache_hits')
+        return key, parsedentry
+
+    def _store_cached(self, cachekey, parsedentry):
+        if self.resultcache is not None:
+            self.resultcache.put(cachekey, parsedentry)
+
+    def parse(self, jobs=1):
         self.clear_verilog()
         self.extract_specify_blocks()
-        self.parse_specify_blocks()
+        self.parse_specify_blocks(jobs)
 
     def convert_timings_to_lib_json(self):
         pass
+
+
+class VerilogLibraryExtractor(VerilogSpecifyExtractor):
+    # Extracts and parses specify blocks from many Verilog files as a single
+    # library. Every file is parsed as soon as it has been read, and with
+    # jobs > 1 its modules are handed to the workers while the following
+    # files are still being read.
+
+    DUPLICATE_POLICIES = ('error', 'first', 'last')
+    READERS = ('mmap', 'stream')
+
+    def __init__(self, paths, duplicates='error', parser=None, reader='mmap',
+                 resultcache=None, stats=None, lexer='fast', defines=None):
+        if duplicates not in self.DUPLICATE_POLICIES:
+            raise ValueError('Unknown duplicate module policy: {}'.format(
+                duplicates))
+        if reader not in self.READERS:
+            raise ValueError('Unknown reader: {}'.format(reader))
+        super().__init__([], parser, resultcache, stats, lexer, defines)
+        self.paths = paths
+        self.duplicates = duplicates
+        self.reader = reader
+        self.specifyblocks = dict()
+        self.specifylinenumbers = dict()
+        self.sources = dict()
+
+    def add_file(self, path):
+        extractor = VerilogSpecifyExtractor(
+            [], stats=self.stats, defines=self.defines)
+        if self.reader == 'mmap':
+            extractor.extract_specify_blocks_from_file(path)
+        else:
+            with open(path, 'r') as f:
+                extractor.extract_specify_blocks_from_stream(f)
+        return self.add_extracted(path, extractor)
+
+    def add_extracted(self, path, extractor):
+        # adds the specify blocks found in `path` by `extractor`, returns the
+        # modules added
+        added = []
+        for module, specifyblock in extractor.specifyblocks.items():
+            if module in self.sources:
+                if self.duplicates == 'error':
+                    raise DuplicateModuleError(
+                        module, self.sources[module], path)
+                if self.duplicates == 'first':
+                    continue
+            self.specifyblocks[module] = specifyblock
+            self.specifylinenumbers[module] = \
+                extractor.specifylinenumbers[module]
+            self.sources[module] = path
+            added.append(module)
+        return added
+
+    def report_parse_error(self, module, error):
+        print('File: {}'.format(self.sources[module]))
+        super().report_parse_error(module, error)
+
+    def diagnose(self, module, *args):
+        return super().diagnose(module, *args)._replace(
+            source=str(self.sources[module]))
+
+    def extract(self):
+        # reads the specify blocks of all files without parsing them
+        for path in self.paths:
+            self.add_file(path)
+
+    def parse(self, jobs=1):
+        self.parse_module_batches(
+            (self.add_file(path) for path in self.paths),
+            jobs)
+
+
+class MultiConfigExtractor(object):
+    '''Extracts and parses a library for several sets of defines at once.
+
+    Every file is read, cleaned and classified only once by a
+    MultiConfigScanner, and the specify blocks of each configuration are
+    kept by a VerilogLibraryExtractor of its own in `extractors`. Specify
+    blocks that come out the same in more than one configuration are parsed
+    once (see VerilogSpecifyExtractor.blockresults) and their parse results
+    are shared.
+    '''
+
+    def __init__(self, paths, configs, duplicates='error', reader='mmap',
+                 resultcache=None, stats=None, lexer='fast'):
+        # configs maps configuration names to their defines
+        if reader not in VerilogLibraryExtractor.READERS:
+            raise ValueError('Unknown reader: {}'.format(reader))
+        self.paths = paths
+        self.reader = reader
+        self.stats = stats if stats is not None else NULLSTATS
+        self.keepgoing = False
+        self.definesets = [set(defines) for defines in configs.values()]
+        self.extractors = {
+            name: VerilogLibraryExtractor(
+                [], duplicates, reader=reader, resultcache=resultcache,
+                stats=stats, lexer=lexer, defines=defines)
+            for name, defines in configs.items()
+        }
+        blockresults = dict()
+        for extractor in self.extractors.values():
+            extractor.blockresults = blockresults
+
+    @property
+    def diagnostics(self):
+        # a module failing in several configurations is reported only once
+        return list(dict.fromkeys(
+            diagnostic
+            for extractor in self.extractors.values()
+            for diagnostic in extractor.diagnostics))
+
+    def add_file(self, path):
+        scanner = MultiConfigScanner(self.definesets)
+        with self.stats.phase('extract'):
+            if self.reader == 'mmap':
+                for _ in prescan_specify_blocks(path, scanner, self.stats):
+                    pass
+            else:
+                with open(path, 'r') as f:
+                    for _ in iter_numbered_specify_blocks(
+                            f, scanner=scanner, stats=self.stats):
+                        pass
+        for extractor, configscanner, blocks in zip(
+                self.extractors.values(), scanner.scanners, scanner.blocks):
+            fileextractor = VerilogSpecifyExtractor([], stats=self.stats)
+            fileextractor._collect_numbered_blocks(blocks)
+            fileextractor._count_ifdef(configscanner)
+            extractor.add_extracted(path, fileextractor)
+
+    def extract(self):
+        for path in self.paths:
+            self.add_file(path)
+
+    def parse(self, jobs=1):
+        self.extract()
+        for extractor in self.extractors.values():
+            extractor.keepgoing = self.keepgoing
+            extractor.parse_specify_blocks(jobs)
@@ -0,0 +1,236 @@
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+
+from .cache import parser_digest
+
+# bump whenever the manifest layout or the emitted Liberty changes
+MANIFEST_VERSION = 1
+
+_recellgroup = re.compile(
+    rb'^[ \t]*cell[ \t]*\([ \t]*"?(?P<name>[^"\)\s]+)"?[ \t]*\)[ \t]*\{',
+    re.MULTILINE)
+
+
+def manifest_path(output):
+    return '{}.manifest.json'.format(output)
+
+
+def block_hash(specifyblock):
+    return hashlib.sha256(
+        '\n'.join(specifyblock).encode('utf-8')).hexdigest()
+
+
+def find_cell_groups(data):
+    # Returns {cell name: (start, end)} byte ranges of the cell groups in
+    # Liberty text. Ranges span whole lines, from the line opening the group
+    # up to and including the newline after its closing brace.
+    groups = dict()
+    pos = 0
+    while True:
+        match = _recellgroup.search(data, pos)
+        if match is None:
+            break
+        depth = 1
+        i = match.end()
+        while depth > 0 and i < len(data):
+            c = data[i]
+            if c == 0x22:  # skip quoted strings
+                i = data.find(b'"', i + 1)
+                if i < 0:
+                    i = len(data)
+            elif c == 0x7b:
+                depth += 1
+            elif c == 0x7d:
+                depth -= 1
+            i += 1
+        end = data.find(b'\n', i)
+        end = len(data) if end < 0 else end + 1
+        start = data.rfind(b'\n', 0, match.start()) + 1
+        groups[match.group('name').decode('utf-8')] = (start, end)
+        pos = end
+    return groups
+
+
+def _output_state(output):
+    stat = os.stat(output)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def load_manifest(output, libraryname, options=None):
+    # Returns the manifest of `output` if it still describes the file and
+    # was produced with the same library name, options and parser, None
+    # otherwise
+    try:
+        with open(manifest_path(output), 'r') as f:
+            manifest = json.load(f)
+        size, mtime = _output_state(output)
+    except (OSError, ValueError):
+        return None
+    if (manifest.get('version') != MANIFEST_VERSION or
+            manifest.get('library') != libraryname or
+            manifest.get('options') != (options or {}) or
+            manifest.get('parser') != parser_digest() or
+            manifest.get('output_size') != size or
+            manifest.get('output_mtime_ns') != mtime):
+        return None
+    return manifest
+
+
+def replace_output(path, write, mode='w'):
+    # Calls `write` with a temporary file next to `path` and moves it into
+    # place once `write` returns True, so readers never see a half-written
+    # output. Otherwise `path` is left untouched.
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmppath = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        if 'b' in mode:
+            f = os.fdopen(fd, mode)
+        else:
+            f = os.fdopen(fd, mode, encoding='utf-8')
+        with f:
+            written = write(f)
+        if written:
+            os.replace(tmppath, path)
+            return True
+    except BaseException:
+        os.remove(tmppath)
+        raise
+    os.remove(tmppath)
+    return False
+
+
+def replace_outputs(paths, write):
+    # replace_output for several files at once: `write` is called with a
+    # list of temporary text files, one for each path, and all of them are
+    # moved into place if it returns True
+    def nest(streams, paths):
+        if not paths:
+            return write(streams)
+        return replace_output(
+            paths[0], lambda f: nest(streams + [f], paths[1:]))
+    return nest([], list(paths))
+
+
+def _write_atomic(path, data):
+    replace_output(path, lambda f: f.write(data) or True, 'wb')
+
+
+def write_manifest(output, libraryname, hashes, ranges, options=None):
+    size, mtime = _output_state(output)
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'library': libraryname,
+        'options': options or {},
+        'parser': parser_digest(),
+        'output_size': size,
+        'output_mtime_ns': mtime,
+        'cells': {
+            module: {
+                'hash': hashes[module],
+                'range': list(ranges[module]) if module in ranges else None
+            } for module in hashes
+        }
+    }
+    _write_atomic(
+        manifest_path(output),
+        json.dumps(manifest, indent=1).encode('utf-8'))
+
+
+def _forget_failed(extractor, hashes):
+    # modules skipped by a keep-going parse are left out of the manifest, so
+    # the next run tries them again
+    for diagnostic in extractor.diagnostics:
+        hashes.pop(diagnostic.module, None)
+
+
+def update_liberty(extractor, libraryname, output, write_liberty, jobs=1,
+                   options=None):
+    # Brings `output` up to date with the modules of `extractor`, which has
+    # its specify blocks extracted but not parsed. `write_liberty` writes the
+    # library for the given name and parsed specify blocks to a text stream
+    # and returns False when there are no timings to write. `options` holds
+    # any settings that change the emitted text, such as the writer used -
+    # the output is rebuilt from scratch when they differ from the last run.
+    # Only modules whose specify block changed since the manifest was
+    # written are parsed and converted, their cell groups are spliced into
+    # the existing file. Returns the list of rebuilt modules.
+    hashes = {
+        module: block_hash(block)
+        for module, block in extractor.specifyblocks.items()
+    }
+    manifest = load_manifest(output, libraryname, options)
+    if manifest is None:
+        extractor.parse_module_batches([list(hashes)], jobs)
+        _forget_failed(extractor, hashes)
+        if not replace_output(output, lambda f: write_liberty(
+                libraryname, extractor.parsedspecifyblocks, f)):
+            return None
+        with open(output, 'rb') as f:
+            ranges = find_cell_groups(f.read())
+        write_manifest(output, libraryname, hashes, ranges, options)
+        return list(hashes)
+
+    previous = manifest['cells']
+    changed = [
+        module for module in hashes
+        if module not in previous or previous[module]['hash'] != hashes[module]
+    ]
+    removed = [module for module in previous if module not in hashes]
+    if not changed and not removed:
+        return []
+
+    newgroups = dict()
+    if changed:
+        extractor.parse_module_batches([changed], jobs)
+        _forget_failed(extractor, hashes)
+        buffer = io.StringIO()
+        if write_liberty(libraryname, extractor.parsedspecifyblocks, buffer):
+            partial = buffer.getvalue().encode('utf-8')
+            for module, (start, end) in find_cell_groups(partial).items():
+                group = partial[start:end]
+                if not group.endswith(b'\n'):
+                    group += b'\n'
+                newgroups[module] = group
+
+    with open(output, 'rb') as f:
+        old = f.read()
+    oldranges = sorted(
+        (entry['range'][0], entry['range'][1], module)
+        for module, entry in previous.items() if entry['range'] is not None)
+    pieces = []
+    ranges = dict()
+    pos = 0
+    newpos = 0
+
+    def emit(module, group):
+        nonlocal newpos
+        ranges[module] = (newpos, newpos + len(group))
+        pieces.append(group)
+        newpos += len(group)
+
+    for start, end, module in oldranges:
+        pieces.append(old[pos:start])
+        newpos += start - pos
+        pos = end
+        if module in removed:
+            continue
+        if module in newgroups:
+            emit(module, newgroups.pop(module))
+        elif module not in changed:
+            emit(module, old[start:end])
+    if not oldranges:
+        # no cell groups so far - new ones go before the closing brace
+        pos = old.rfind(b'\n', 0, old.rfind(b'}')) + 1
+        pieces.append(old[:pos])
+        newpos = pos
+    for module in changed:
+        if module in newgroups:
+            emit(module, newgroups.pop(module))
+    pieces.append(old[pos:])
+    _write_atomic(output, b''.join(pieces))
+    write_manifest(output, libraryname, hashes, ranges, options)
+    return changed + removed
@@ -33,10 +33,42 @@ class Number(object):
         return float(self.value)
 
 
+def number_from_match(match, line, text):
+    # Builds the Number of an integer literal from a match of the t_NUMBER
+    # regex, `text` is the whole literal
+    size = 32
+    typ = 'd'
+    value = (match.group('dvalue') if match.group('dvalue')
+             else match.group('value').lower())
+    value = value.replace('_', '')
+    digsize = {2: 1, 8: 3, 16: 4, 10: 4}
+
+    def convert_value(regex, base):
+        if (not re.match(regex, value) or len(value) * digsize[base] > size):
+            raise SpecifyLexer.InvalidNumberException(line, text)
+        return int(value, base)
+
+    if match.group('size'):
+        size = int(match.group('size'))
+    if match.group('type'):
+        typ = match.group('type').lower()
+    if typ == 'b':
+        value = convert_value(r'[01]+', 2)
+    elif typ == 'o':
+        value = convert_value(r'[0-7]+', 8)
+    elif typ == 'h':
+        value = convert_value(r'[0-9a-f]+', 16)
+    else:
+        value = convert_value(r'[0-9]+', 10)
+    return Number(size, typ, value)
+
+
 class SpecifyLexer(object):
 
     class InvalidNumberException(Exception):
         def __init__(self, line, value):
+            self.lineno = line
+            self.token = value
             self.message = 'Invalid number {} at line {}'.format(value, line)
 
         def __str__(self):
@@ -44,16 +76,21 @@ class SpecifyLexer(object):
                 return self.message
 
     class TokenizeError(Exception):
-        def __init__(self, message):
+        def __init__(self, message, lineno=None, token=None):
+            self.lineno = lineno
+            self.token = token
             self.message = message
 
         def __str__(self):
             if self.message:
                 return self.message
 
-    def __init__(self):
+    def __init__(self, tablecache=None):
         self.logger = lex.PlyLogger(sys.stdout)
-        self.lexer = lex.lex(module=self, errorlog=self.logger)
+        if tablecache is not None:
+            self.lexer = tablecache.lex(self, self.logger)
+        else:
+            self.lexer = lex.lex(module=self, errorlog=self.logger)
         self.input_data = ''
 
     reserved = {
@@ -90,6 +127,7 @@ class SpecifyLexer(object):
         'SEMI',
         'COLON',
         'NAME',
+        'BUSNAME',
         'NUMBER',
         'PATHTOKEN',
     ] + list(reserved.values())
@@ -118,6 +156,11 @@ class SpecifyLexer(object):
     t_SEMI = r';'
     t_COLON = r':'
 
+    def t_BUSNAME(self, t):
+        r'(?P<busname>[a-zA-Z_][a-zA-Z0-9_\$]*)\[(?P<msb>[0-9]+):(?P<lsb>[0-9]+)\]'  # noqa: E501
+        # range select of a vector port, only accepted as a path port
+        return t
+
     def t_NAME(self, t):
         r'[a-zA-Z_][a-zA-Z0-9_\$]*(\[[0-9]+\])?'
         t.type = self.reserved.get(t.value, 'NAME')
@@ -131,34 +174,7 @@ class SpecifyLexer(object):
 
     def t_NUMBER(self, t):
         r'((?P<size>[0-9]+)?\'(?P<type>[bBoOhHdD])(?P<value>[0-9a-fA-F_]+)|(?P<dvalue>[0-9]+))'  # noqa: E501
-        match = t.lexer.lexmatch
-        size = 32
-        typ = 'd'
-        value = (match.group('dvalue') if match.group('dvalue')
-                 else match.group('value').lower())
-        value = value.replace('_', '')
-        digsize = {2: 1, 8: 3, 16: 4, 10: 4}
-
-        def convert_value(regex, base):
-            if (not re.match(regex, value) or len(value) * digsize[base] > size):
-                raise SpecifyLexer.InvalidNumberException(
-                    t.lexer.lineno,
-                    t.value)
-            return int(value, base)
-
-        if match.group('size'):
-            size = int(match.group('size'))
-        if match.group('type'):
-            typ = match.group('type').lower()
-        if typ == 'b':
-            value = convert_value(r'[01]+', 2)
-        elif typ == 'o':
-            value = convert_value(r'[0-7]+', 8)
-        elif typ == 'h':
-            value = convert_value(r'[0-9a-f]+', 16)
-        else:
-            value = convert_value(r'[0-9]+', 10)
-        t.value = Number(size, typ, value)
+        t.value = number_from_match(t.lexer.lexmatch, t.lexer.lineno, t.value)
         return t
 
     def t_PATHTOKEN(self, t):
@@ -176,7 +192,9 @@ class SpecifyLexer(object):
         raise SpecifyLexer.TokenizeError(
             'Illegal character {} at line {}'.format(
                 t.value[0],
-                t.lexer.lineno))
+                t.lexer.lineno),
+            t.lexer.lineno,
+            t.value[0])
 
     def test(self, data):
         self.lexer.input(data)
@@ -0,0 +1,62 @@
+import re
+
+# group and attribute values that do not need quoting
+_rebare = re.compile(r'^[+-]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][+-]?[0-9]+)?$')
+
+
+class LibertyWriter(object):
+    '''Writes Liberty groups straight to a text stream.
+
+    Groups are given in the dict layout used by
+    convert_specify_to_libertyjson - keys of the form "<group> <name>" hold
+    a dict (a single group) or a list of dicts (repeated groups), all other
+    keys are simple attributes. Cells are written one at a time, so only the
+    cell being written has to be kept in memory.
+    '''
+
+    def __init__(self, stream, indent=4):
+        self.stream = stream
+        self.indent = ' ' * indent
+        self.depth = 0
+
+    def begin_group(self, group, name=''):
+        self.stream.write('{}{} ({}) {{\n'.format(
+            self.indent * self.depth,
+            group,
+            '"{}"'.format(name) if name else ''))
+        self.depth += 1
+
+    def end_group(self):
+        self.depth -= 1
+        self.stream.write('{}}}\n'.format(self.indent * self.depth))
+
+    def attribute(self, key, value):
+        value = str(value)
+        if not _rebare.match(value):
+            value = '"{}"'.format(value)
+        self.stream.write('{}{} : {};\n'.format(
+            self.indent * self.depth, key, value))
+
+    def write_group(self, key, content):
+        group, _, name = key.partition(' ')
+        self.begin_group(group, name)
+        for subkey, value in content.items():
+            if isinstance(value, dict):
+                self.write_group(subkey, value)
+            elif isinstance(value, list):
+                for entry in value:
+                    self.write_group(subkey, entry)
+            else:
+                self.attribute(subkey, value)
+        self.end_group()
+
+    def write_library(self, libraryname, cells):
+        # Writes the library group with the cells from `cells`, an iterable
+        # of (cell group key, cell content). Returns the number of cells.
+        self.begin_group('library', libraryname)
+        count = 0
+        for key, content in cells:
+            self.write_group(key, content)
+            count += 1
+        self.end_group()
+        return count
@@ -0,0 +1,374 @@
+import itertools
+from collections import defaultdict, namedtuple
+from collections.abc import Mapping
+
+from .conditions import Condition
+
+# Compact containers for the parsed timing data. Every class can be read
+# like the dicts the parser used to produce (entry['input_port'],
+# entry.get('notifier'), 'tstamp_cond' in check, dict(entry), ...), so
+# existing consumers keep working, while an instance takes a fraction of the
+# memory of a dict. as_dicts converts the parse results back to plain dicts
+# and lists, and conditions (see conditions.py) back to their text.
+#
+# The parse results of a specify block are frozen (see freeze) - the same
+# object is shared by every cell with an identical block, so its containers
+# and entries are read-only.
+#
+# Path delays between vector ports ((A[7:0] *> Y[7:0]) = ...) are kept as a
+# single PathDelay with BusRange ports. The bit-level arcs they stand for
+# are only generated, one at a time, by bit_pairs and iter_bit_paths when
+# the paths are written.
+
+DelayTriple = namedtuple('DelayTriple', ['min', 'typ', 'max'])
+
+
+class BusRange(namedtuple('BusRange', ['name', 'msb', 'lsb'])):
+    # range select name[msb:lsb] of a vector port
+    __slots__ = ()
+
+    def __str__(self):
+        return '{}[{}:{}]'.format(*self)
+
+    @property
+    def width(self):
+        return abs(self.msb - self.lsb) + 1
+
+    def bits(self):
+        # names of the bits, from msb to lsb
+        step = 1 if self.lsb >= self.msb else -1
+        return ['{}[{}]'.format(self.name, index)
+                for index in range(self.msb, self.lsb + step, step)]
+
+
+def port_width(port):
+    return port.width if isinstance(port, BusRange) else 1
+
+
+def bit_pairs(pathdelay):
+    # Iterates over (input pin, output pin) of the bit-level arcs of a path
+    # delay: bits are paired by position in parallel (=>) paths and all
+    # combinations are taken in full (*>) paths, a path between scalar
+    # ports is a single pair
+    inputs, outputs = (
+        port.bits() if isinstance(port, BusRange) else (port,)
+        for port in (pathdelay['input_port'], pathdelay['output_port']))
+    if pathdelay['parallel']:
+        return zip(inputs, outputs)
+    return itertools.product(inputs, outputs)
+
+
+def iter_bit_paths(paths):
+    # Yields the path delays of `paths`, with a PathDelay per bit pair
+    # (see bit_pairs) in place of every path between vector ports. The
+    # bit-level paths are created as they are consumed and share the
+    # condition and delays of the original path.
+    for pathdelay in paths:
+        if not (isinstance(pathdelay['input_port'], BusRange) or
+                isinstance(pathdelay['output_port'], BusRange)):
+            yield pathdelay
+            continue
+        for inputpin, outputpin in bit_pairs(pathdelay):
+            bitpath = PathDelay(**pathdelay)
+            bitpath.input_port = inputpin
+            bitpath.output_port = outputpin
+            yield bitpath
+
+
+class SlotsMapping(Mapping):
+    # Read-write dict view over __slots__. Slots that were never assigned
+    # are treated as missing keys, which keeps the per-type key sets of the
+    # old dicts (e.g. only full $setuphold entries have 'delayed_clk').
+    __slots__ = ()
+
+    def __init_subclass__(cls, **kwargs):
+        # the keys (and the printed name) are the ones of the class, or of
+        # its base for subclasses without slots of their own (see
+        # FrozenSlots)
+        super().__init_subclass__(**kwargs)
+        if cls.__dict__.get('__slots__'):
+            cls._keys = cls.__slots__
+            cls._typename = cls.__name__
+
+    def __init__(self, **kwargs):
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+
+    def __getitem__(self, key):
+        if key not in self._keys:
+            raise KeyError(key)
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self._keys:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __iter__(self):
+        for key in self._keys:
+            if hasattr(self, key):
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return '{}({})'.format(
+            self._typename,
+            ', '.join('{}={!r}'.format(key, value)
+                      for key, value in self.items()))
+
+
+class Event(SlotsMapping):
+    __slots__ = ('edge', 'signals')
+
+
+class PathDelay(SlotsMapping):
+    __slots__ = (
+        'cond',
+        'edge',
+        'input_port',
+        'parallel',
+        'output_port',
+        'inverted',
+        'source',
+        'delaylist'
+    )
+
+
+class ConstraintCheck(SlotsMapping):
+    __slots__ = (
+        'type',
+        'reference_event',
+        'data_event',
+        'limit',
+        'setup_limit',
+        'hold_limit',
+        'recovery_limit',
+        'removal_limit',
+        'width_limit',
+        'width_threshold',
+        'notifier',
+        'tstamp_cond',
+        'tcheck_cond',
+        'delayed_clk',
+        'delayed_data'
+    )
+
+
+class DelayList(Mapping):
+    # Stores only the delays given in the specify block (1, 2, 3, 6 or 12
+    # DelayTriples) and derives the delays of the remaining transitions on
+    # access, following the rules of IEEE 1364 14.3.1.
+
+    __slots__ = ('delays',)
+
+    TRANSITIONS = (
+        'rise', 'fall',
+        '0->Z', 'Z->1', '1->Z', 'Z->0',
+        '0->X', 'X->1', '1->X', 'X->0', 'X->Z', 'Z->X'
+    )
+
+    def __init__(self, delays):
+        if len(delays) not in (1, 2, 3, 6, 12):
+            raise ValueError('Unsupported number of delays: {}'.format(
+                len(delays)))
+        self.delays = tuple(delays)
+
+    def __getitem__(self, key):
+        d = self.delays
+        n = len(d)
+        if n == 1:
+            if key in self._INDEX:
+                return d[0]
+        elif n == 12:
+            if key in self._INDEX:
+                return d[self._INDEX[key]]
+        else:
+            derive = self._DERIVED[n].get(key)
+            if derive is not None:
+                return derive(d)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.TRANSITIONS)
+
+    def __len__(self):
+        return len(self.TRANSITIONS)
+
+    def __eq__(self, other):
+        if isinstance(other, DelayList):
+            return self.delays == other.delays
+        return Mapping.__eq__(self, other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'DelayList({!r})'.format(self.delays)
+
+
+DelayList._INDEX = {key: i for i, key in enumerate(DelayList.TRANSITIONS)}
+
+DelayList._DERIVED = {
+    2: {
+        'rise': lambda d: d[0],
+        'fall': lambda d: d[1],
+        '0->Z': lambda d: d[0],
+        'Z->1': lambda d: d[0],
+        '1->Z': lambda d: d[1],
+        'Z->0': lambda d: d[1],
+        '0->X': lambda d: d[0],
+        'X->1': lambda d: d[0],
+        '1->X': lambda d: d[1],
+        'X->0': lambda d: d[1],
+        'X->Z': lambda d: max(d[0], d[1]),
+        'Z->X': lambda d: min(d[0], d[1]),
+    },
+    3: {
+        'rise': lambda d: d[0],
+        'fall': lambda d: d[1],
+        '0->Z': lambda d: d[2],
+        'Z->1': lambda d: d[0],
+        '1->Z': lambda d: d[2],
+        'Z->0': lambda d: d[1],
+        '0->X': lambda d: min(d[0], d[2]),
+        'X->1': lambda d: d[0],
+        '1->X': lambda d: min(d[1], d[2]),
+        'X->0': lambda d: d[1],
+        'X->Z': lambda d: d[2],
+        'Z->X': lambda d: min(d[0], d[1]),
+    },
+    6: {
+        'rise': lambda d: d[0],
+        'fall': lambda d: d[1],
+        '0->Z': lambda d: d[2],
+        'Z->1': lambda d: d[3],
+        '1->Z': lambda d: d[4],
+        'Z->0': lambda d: d[5],
+        '0->X': lambda d: min(d[0], d[2]),
+        'X->1': lambda d: max(d[0], d[3]),
+        '1->X': lambda d: min(d[1], d[4]),
+        'X->0': lambda d: max(d[1], d[5]),
+        'X->Z': lambda d: max(d[2], d[4]),
+        'Z->X': lambda d: min(d[3], d[5]),
+    },
+}
+
+
+class FrozenMapping(Mapping):
+    # read-only dict
+    __slots__ = ('_data',)
+
+    def __init__(self, data=()):
+        self._data = dict(data)
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __reduce__(self):
+        return FrozenMapping, (self._data,)
+
+    def __repr__(self):
+        return 'FrozenMapping({!r})'.format(self._data)
+
+
+class FrozenSlots(object):
+    # Read-only variant of a SlotsMapping class, see freeze. Frozen entries
+    # have the same layout as the mutable ones, so freezing an entry only
+    # switches its class.
+    __slots__ = ()
+
+    def __setattr__(self, key, value):
+        raise TypeError('{} is read-only'.format(type(self).__name__))
+
+    __setitem__ = __setattr__
+
+    def __delattr__(self, key):
+        raise TypeError('{} is read-only'.format(type(self).__name__))
+
+    def __reduce__(self):
+        return _frozen_entry, (type(self), dict(self))
+
+
+def _frozen_entry(cls, values):
+    entry = cls.__new__(cls)
+    for key, value in values.items():
+        object.__setattr__(entry, key, value)
+    return entry
+
+
+class FrozenEvent(FrozenSlots, Event):
+    __slots__ = ()
+
+
+class FrozenPathDelay(FrozenSlots, PathDelay):
+    __slots__ = ()
+
+
+class FrozenConstraintCheck(FrozenSlots, ConstraintCheck):
+    __slots__ = ()
+
+
+_FROZEN = {
+    Event: FrozenEvent,
+    PathDelay: FrozenPathDelay,
+    ConstraintCheck: FrozenConstraintCheck
+}
+
+
+def _freeze_entry(entry):
+    frozen = _FROZEN.get(type(entry))
+    if frozen is not None:
+        entry.__class__ = frozen
+    return entry
+
+
+def freeze(parsedentry):
+    # Read-only parse results of a specify block: the lists of entries
+    # become tuples and the dicts FrozenMappings, and the entries (with the
+    # events of the checks) are switched to their frozen classes in place
+    for pathdelay in itertools.chain(
+            parsedentry['pathdelays'],
+            *parsedentry['ifstatements'].values()):
+        _freeze_entry(pathdelay)
+    for check in parsedentry['constraintchecks']:
+        for event in ('reference_event', 'data_event'):
+            if event in check:
+                _freeze_entry(check[event])
+        _freeze_entry(check)
+    return FrozenMapping({
+        'specparams': FrozenMapping(parsedentry['specparams']),
+        'constraintchecks': tuple(parsedentry['constraintchecks']),
+        'pathdelays': tuple(parsedentry['pathdelays']),
+        'ifstatements': FrozenMapping(
+            (key, tuple(paths))
+            for key, paths in parsedentry['ifstatements'].items())
+    })
+
+
+def as_dicts(value):
+    # Converts parse results built from the classes above to the plain
+    # dicts and lists the parser used to return
+    if isinstance(value, DelayTriple):
+        return list(value)
+    if isinstance(value, BusRange):
+        return str(value)
+    if isinstance(value, Condition):
+        return str(value)
+    if isinstance(value, defaultdict):
+        return defaultdict(value.default_factory, {
+            key: as_dicts(entry) for key, entry in value.items()})
+    if isinstance(value, Mapping):
+        return {key: as_dicts(entry) for key, entry in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [as_dicts(entry) for entry in value]
+    return value
@@ -0,0 +1,149 @@
+import itertools
+
+from .model import DelayList, iter_bit_paths
+
+# SDF timing check keywords for the constraint check types of the parser,
+# with the keys of the limits in the order SDF expects them
+TIMINGCHECKS = {
+    'setup': ('SETUP', ('limit',)),
+    'hold': ('HOLD', ('limit',)),
+    'setuphold': ('SETUPHOLD', ('setup_limit', 'hold_limit')),
+    'skew': ('SKEW', ('limit',)),
+    'recovery': ('RECOVERY', ('limit',)),
+    'recrem': ('RECREM', ('recovery_limit', 'removal_limit')),
+    'period': ('PERIOD', ('limit',)),
+    'width': ('WIDTH', ('width_limit',))
+}
+
+
+def format_triple(triple):
+    return '({}:{}:{})'.format(*triple)
+
+
+def format_port(edge, name):
+    if edge in ('posedge', 'negedge'):
+        return '({} {})'.format(edge, name)
+    return name
+
+
+def format_event(event):
+    # signals after the first one come from &&& conditions
+    port = format_port(event['edge'], event['signals'][0])
+    if len(event['signals']) > 1:
+        return '(COND {} {})'.format(
+            '&&'.join(str(signal) for signal in event['signals'][1:]),
+            port)
+    return port
+
+
+def delays_of(delaylist):
+    # The delays as given in the specify block - DelayList keeps them, for
+    # the dict layout all 12 transitions are written
+    if isinstance(delaylist, DelayList):
+        return delaylist.delays
+    return [delaylist[key] for key in DelayList.TRANSITIONS]
+
+
+class SDFWriter(object):
+    '''Writes an SDF file straight to a text stream, one CELL at a time.
+
+    Cells are built from the parse results of a single specify block - path
+    delays become IOPATH entries (wrapped in COND for conditional paths) and
+    constraint checks the matching TIMINGCHECK entries. Delays are written
+    as the min:typ:max triples from the parser.
+
+    Not everything in a specify block has an SDF equivalent: the polarity
+    of ``-=>``/``+=>`` paths (``inverted``) is not written, and timing check
+    events without an edge are written as ``posedge`` ones, because the
+    parser stores them with that edge.
+    '''
+
+    def __init__(self, stream, indent=2):
+        self.stream = stream
+        self.indent = ' ' * indent
+        self.depth = 0
+
+    def line(self, text):
+        self.stream.write('{}{}\n'.format(self.indent * self.depth, text))
+
+    def begin(self, text):
+        self.line('({}'.format(text))
+        self.depth += 1
+
+    def end(self):
+        self.depth -= 1
+        self.line(')')
+
+    def write_header(self, design, timescale='1ns'):
+        self.begin('DELAYFILE')
+        self.line('(SDFVERSION "3.0")')
+        self.line('(DESIGN "{}")'.format(design))
+        self.line('(DIVIDER /)')
+        self.line('(TIMESCALE {})'.format(timescale))
+
+    def write_footer(self):
+        self.end()
+
+    def iopath(self, pathdelay):
+        entry = '(IOPATH {} {} {})'.format(
+            format_port(pathdelay['edge'], pathdelay['input_port']),
+            pathdelay['output_port'],
+            ' '.join(format_triple(delay)
+                     for delay in delays_of(pathdelay['delaylist'])))
+        if pathdelay['cond']:
+            entry = '(COND {} {})'.format(pathdelay['cond'], entry)
+        return entry
+
+    def timingcheck(self, constraintcheck):
+        keyword, limits = TIMINGCHECKS[constraintcheck['type']]
+        ports = []
+        if keyword in ('SETUP', 'HOLD', 'SETUPHOLD'):
+            ports.append(format_event(constraintcheck['data_event']))
+        ports.append(format_event(constraintcheck['reference_event']))
+        if keyword in ('SKEW', 'RECOVERY', 'RECREM'):
+            ports.append(format_event(constraintcheck['data_event']))
+        return '({} {} {})'.format(
+            keyword,
+            ' '.join(ports),
+            ' '.join(format_triple(constraintcheck[limit])
+                     for limit in limits))
+
+    def write_cell(self, celltype, parsedentry):
+        # Returns False, without writing anything, for cells without timings
+        paths = list(itertools.chain(
+            parsedentry['pathdelays'],
+            *parsedentry['ifstatements'].values()))
+        checks = [
+            check for check in parsedentry['constraintchecks']
+            if check['type'] in TIMINGCHECKS
+        ]
+        if not paths and not checks:
+            return False
+        self.begin('CELL')
+        self.line('(CELLTYPE "{}")'.format(celltype))
+        self.line('(INSTANCE *)')
+        if paths:
+            self.begin('DELAY')
+            self.begin('ABSOLUTE')
+            # an IOPATH per bit of paths between vector ports
+            for pathdelay in iter_bit_paths(paths):
+                self.line(self.iopath(pathdelay))
+            self.end()
+            self.end()
+        if checks:
+            self.begin('TIMINGCHECK')
+            for constraintcheck in checks:
+                self.line(self.timingcheck(constraintcheck))
+            self.end()
+        self.end()
+        return True
+
+    def write_sdf(self, design, parsedspecifyblocks, timescale='1ns'):
+        # Writes the whole file, returns the number of cells written
+        self.write_header(design, timescale)
+        count = 0
+        for celltype, parsedentry in parsedspecifyblocks.items():
+            if self.write_cell(celltype, parsedentry):
+                count += 1
+        self.write_footer()
+        return count
@@ -0,0 +1,177 @@
+import contextlib
+import heapq
+import json
+import time
+from collections import Counter
+
+
+class Stats(object):
+    '''Collects timings and counters of a conversion.
+
+    Phases are timed with phase() or timed_iter() and may be nested - the
+    time of a nested phase is not counted in the enclosing one, so the
+    reported times of all phases add up to the instrumented total.
+    Everything is no-op in NullStats, which is used when statistics are
+    disabled - code that would have to do extra work to collect a value
+    checks `enabled` first.
+    '''
+
+    enabled = True
+
+    def __init__(self, top=10):
+        self.top = top
+        # name -> [wall seconds, CPU seconds, calls]
+        self.phases = dict()
+        self.counters = Counter()
+        self.tokens = Counter()
+        self.productions = Counter()
+        # (seconds, module) of parsed modules
+        self.moduletimes = []
+        self._stack = []
+
+    def start(self, name):
+        self._stack.append(
+            [name, time.perf_counter(), time.process_time(), 0.0, 0.0])
+
+    def stop(self):
+        name, wall, cpu, childwall, childcpu = self._stack.pop()
+        wall = time.perf_counter() - wall
+        cpu = time.process_time() - cpu
+        phase = self.phases.setdefault(name, [0.0, 0.0, 0])
+        phase[0] += wall - childwall
+        phase[1] += cpu - childcpu
+        phase[2] += 1
+        if self._stack:
+            self._stack[-1][3] += wall
+            self._stack[-1][4] += cpu
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        self.start(name)
+        try:
+            yield self
+        finally:
+            self.stop()
+
+    def timed_iter(self, name, iterable):
+        # times producing every item of `iterable` as phase `name`
+        iterator = iter(iterable)
+        while True:
+            self.start(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.stop()
+            yield item
+
+    def count(self, name, value=1):
+        self.counters[name] += value
+
+    def add_module_time(self, module, seconds):
+        self.moduletimes.append((seconds, module))
+
+    def export(self):
+        # picklable summary of the values collected in a worker process
+        return {
+            'counters': dict(self.counters),
+            'tokens': dict(self.tokens),
+            'productions': dict(self.productions),
+            'moduletimes': self.moduletimes
+        }
+
+    def merge(self, data):
+        self.counters.update(data['counters'])
+        self.tokens.update(data['tokens'])
+        self.productions.update(data['productions'])
+        self.moduletimes.extend(data['moduletimes'])
+
+    def slowest(self):
+        return heapq.nlargest(self.top, self.moduletimes)
+
+    def dedup_ratio(self):
+        # modules per distinct specify block, None if nothing was parsed
+        duplicates = self.counters.get('duplicate_blocks', 0)
+        modules = self.counters.get('modules', 0) + \
+            self.counters.get('failed_modules', 0)
+        if modules <= duplicates:
+            return None
+        return modules / (modules - duplicates)
+
+    def as_dict(self):
+        return {
+            'phases': {
+                name: {'wall': wall, 'cpu': cpu, 'calls': calls}
+                for name, (wall, cpu, calls) in self.phases.items()
+            },
+            'counters': dict(self.counters),
+            'tokens': sum(self.tokens.values()),
+            'token_types': dict(self.tokens.most_common()),
+            'productions': sum(self.productions.values()),
+            'production_types': dict(self.productions.most_common()),
+            'parsed_modules': len(self.moduletimes),
+            'dedup_ratio': self.dedup_ratio(),
+            'slowest_modules': [
+                {'module': module, 'seconds': seconds}
+                for seconds, module in self.slowest()
+            ]
+        }
+
+    def report(self, fmt='text'):
+        if fmt == 'json':
+            return json.dumps(self.as_dict(), indent=2)
+        lines = ['Phase                  wall [s]     CPU [s]    calls']
+        for name, (wall, cpu, calls) in self.phases.items():
+            lines.append('{:20} {:10.3f}  {:10.3f} {:8}'.format(
+                name, wall, cpu, calls))
+        lines.append('')
+        lines.append('Tokens:      {}'.format(sum(self.tokens.values())))
+        lines.append('Productions: {}'.format(
+            sum(self.productions.values())))
+        for name, value in sorted(self.counters.items()):
+            lines.append('{}: {}'.format(name, value))
+        ratio = self.dedup_ratio()
+        if ratio is not None:
+            lines.append('dedup_ratio: {:.2f} (modules per distinct specify block)'.format(ratio))  # noqa: E501
+        slowest = self.slowest()
+        if slowest:
+            lines.append('')
+            lines.append('Slowest modules to parse:')
+            for seconds, module in slowest:
+                lines.append('  {:10.6f} s  {}'.format(seconds, module))
+        return '\n'.join(lines)
+
+
+class NullStats(Stats):
+    # disabled statistics - every method does nothing
+    enabled = False
+
+    _nullcontext = contextlib.nullcontext()
+
+    def __init__(self):
+        pass
+
+    def start(self, name):
+        pass
+
+    def stop(self):
+        pass
+
+    def phase(self, name):
+        return self._nullcontext
+
+    def timed_iter(self, name, iterable):
+        return iterable
+
+    def count(self, name, value=1):
+        pass
+
+    def add_module_time(self, module, seconds):
+        pass
+
+    def merge(self, data):
+        pass
+
+
+NULLSTATS = NullStats()
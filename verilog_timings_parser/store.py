@@ -0,0 +1,196 @@
+import os
+import pickle
+import sqlite3
+import tempfile
+import zlib
+
+from .cache import parser_digest
+from .timingdb import iter_timing_arcs
+
+# bump whenever the tables below change
+SCHEMA_VERSION = 1
+
+_SCHEMA = '''
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE cells (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    source TEXT,
+    entry BLOB NOT NULL
+);
+CREATE TABLE arcs (
+    cell INTEGER NOT NULL REFERENCES cells (id),
+    kind TEXT NOT NULL,
+    related_pin TEXT,
+    pin TEXT,
+    edge TEXT,
+    related_edge TEXT,
+    cond TEXT
+);
+CREATE INDEX arcs_pins ON arcs (cell, related_pin, pin);
+CREATE INDEX arcs_kind ON arcs (kind, edge);
+'''
+
+_ARCCOLUMNS = ('kind', 'related_pin', 'pin', 'edge', 'related_edge', 'cond')
+
+
+class StoreError(Exception):
+    def __init__(self, path, reason):
+        self.message = 'Cannot use library database {}: {}'.format(
+            path, reason)
+
+    def __str__(self):
+        if self.message:
+            return self.message
+
+
+class LibraryStore(object):
+    '''Parsed specify blocks of a library saved in an SQLite file.
+
+    Every cell is stored as a zlib-compressed pickle of its parse results,
+    so a single cell can be read without loading the rest of the library,
+    and its arcs (see timingdb.TimingArc) are stored in an indexed table that
+    can be queried without unpickling anything. The file records the schema
+    version and the digest of the parser sources - a file written by a
+    different version is refused, as its pickles may not match the current
+    model classes.
+
+    Use LibraryStore.save() to write a file and LibraryStore(path) to open
+    one for reading.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        if not os.path.exists(path):
+            raise StoreError(path, 'no such file')
+        try:
+            self.connection = sqlite3.connect(
+                'file:{}?mode=ro'.format(path), uri=True)
+            meta = dict(self.connection.execute(
+                'SELECT key, value FROM meta'))
+        except sqlite3.Error as ex:
+            raise StoreError(path, str(ex))
+        if meta.get('schema_version') != str(SCHEMA_VERSION):
+            raise StoreError(path, 'unsupported schema version {}'.format(
+                meta.get('schema_version')))
+        if meta.get('parser_digest') != parser_digest():
+            raise StoreError(
+                path, 'written by a different version of the parser')
+
+    @classmethod
+    def save(cls, path, parsedspecifyblocks, sources=None):
+        # Writes the parse results to `path`, replacing it atomically.
+        # `sources` optionally maps cells to the files they come from.
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmppath = tempfile.mkstemp(
+            dir=directory, prefix='.' + os.path.basename(path),
+            suffix='.tmp')
+        os.close(fd)
+        try:
+            connection = sqlite3.connect(tmppath)
+            try:
+                with connection:
+                    cls._write(connection, parsedspecifyblocks, sources or {})
+            finally:
+                connection.close()
+            os.replace(tmppath, path)
+        except BaseException:
+            os.remove(tmppath)
+            raise
+
+    @staticmethod
+    def _write(connection, parsedspecifyblocks, sources):
+        connection.executescript(_SCHEMA)
+        meta = {
+            'schema_version': str(SCHEMA_VERSION),
+            'parser_digest': parser_digest()
+        }
+        connection.executemany(
+            'INSERT INTO meta (key, value) VALUES (?, ?)', meta.items())
+        for cell, parsedentry in parsedspecifyblocks.items():
+            source = sources.get(cell)
+            cellid = connection.execute(
+                'INSERT INTO cells (name, source, entry) VALUES (?, ?, ?)',
+                (cell, None if source is None else str(source),
+                 zlib.compress(pickle.dumps(
+                     parsedentry, pickle.HIGHEST_PROTOCOL)))).lastrowid
+            connection.executemany(
+                'INSERT INTO arcs (cell, {}) VALUES (?, ?, ?, ?, ?, ?, ?)'
+                .format(', '.join(_ARCCOLUMNS)),
+                ((cellid, arc.kind, arc.related_pin, arc.pin, arc.edge,
+                  arc.related_edge, None if arc.cond is None else str(
+                      arc.cond))
+                 for arc in iter_timing_arcs(cell, parsedentry)))
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.connection.execute(
+            'SELECT COUNT(*) FROM cells').fetchone()[0]
+
+    def __contains__(self, cell):
+        return self.connection.execute(
+            'SELECT 1 FROM cells WHERE name = ?', (cell,)).fetchone() \
+            is not None
+
+    def cells(self):
+        # names of the cells, in the order they were saved in
+        return [
+            name for name, in self.connection.execute(
+                'SELECT name FROM cells ORDER BY id')
+        ]
+
+    def sources(self):
+        return dict(self.connection.execute(
+            'SELECT name, source FROM cells WHERE source IS NOT NULL'))
+
+    def get(self, cell):
+        # parse results of a single cell, None if it is not stored
+        row = self.connection.execute(
+            'SELECT entry FROM cells WHERE name = ?', (cell,)).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(zlib.decompress(row[0]))
+
+    def items(self):
+        # yields (cell, parse results) of all cells without keeping them
+        for name, entry in self.connection.execute(
+                'SELECT name, entry FROM cells ORDER BY id'):
+            yield name, pickle.loads(zlib.decompress(entry))
+
+    def load(self):
+        # parse results of the whole library, like parsedspecifyblocks
+        return dict(self.items())
+
+    def arcs(self, cell=None, related_pin=None, pin=None, kind=None,
+             edge=None):
+        # Yields (cell, kind, related pin, pin, edge, related edge,
+        # condition) of the stored arcs matching all given criteria, in the
+        # order of the cells and of iter_timing_arcs
+        clauses = []
+        values = []
+        for column, value in (('cells.name', cell),
+                              ('arcs.related_pin', related_pin),
+                              ('arcs.pin', pin),
+                              ('arcs.kind', kind),
+                              ('arcs.edge', edge)):
+            if value is not None:
+                clauses.append('{} = ?'.format(column))
+                values.append(value)
+        query = 'SELECT cells.name, {} FROM arcs JOIN cells ON ' \
+            'arcs.cell = cells.id'.format(
+                ', '.join('arcs.' + column for column in _ARCCOLUMNS))
+        if clauses:
+            query += ' WHERE ' + ' AND '.join(clauses)
+        query += ' ORDER BY arcs.rowid'
+        yield from self.connection.execute(query, values)
@@ -0,0 +1,196 @@
+import itertools
+from collections import namedtuple
+
+from .columnar import ARC_KINDS, CHECKLIMITS
+from .model import bit_pairs
+
+# matches arcs with any condition, see TimingDB.arcs
+ANY = object()
+
+
+class TimingArc(namedtuple('TimingArc', [
+        'cell', 'kind', 'related_pin', 'pin', 'edge', 'related_edge',
+        'cond', 'entry', 'limit'])):
+    # A single arc of a cell, referencing the parsed entry it comes from:
+    #
+    # * kind - one of columnar.ARC_KINDS, $setuphold and $recrem checks give
+    #   a setup/hold or recovery/removal arc each,
+    # * related_pin, pin - input and output pin of a path delay; reference
+    #   and constrained (data) pin of a check, None and the reference pin
+    #   for $period and $width,
+    # * edge, related_edge - edges of pin and related_pin (None if not
+    #   given),
+    # * cond - Condition of a conditional path, or the text of the &&&
+    #   condition of a check, None if there is none,
+    # * entry - the PathDelay or ConstraintCheck (a path between vector ports
+    #   gives an arc per bit pair, all referencing the same PathDelay),
+    # * limit - the key of the limit of a check in entry (None for paths).
+    __slots__ = ()
+
+    @property
+    def value(self):
+        # the DelayList of a path, the DelayTriple limit of a check
+        if self.limit is None:
+            return self.entry['delaylist']
+        return self.entry[self.limit]
+
+
+def iter_timing_arcs(cell, parsedentry):
+    # Yields the TimingArcs of a parsed cell, in the order of
+    # columnar.iter_cell_arcs
+    paths = itertools.chain(
+        parsedentry['pathdelays'],
+        *parsedentry['ifstatements'].values())
+    for pathdelay in paths:
+        for inputpin, outputpin in bit_pairs(pathdelay):
+            yield TimingArc(
+                cell,
+                'path',
+                inputpin,
+                outputpin,
+                pathdelay['edge'],
+                None,
+                pathdelay['cond'] or None,
+                pathdelay,
+                None)
+    for check in parsedentry['constraintchecks']:
+        reference = check['reference_event']
+        if check['type'] in ('period', 'width'):
+            event, related, relatededge = reference, None, None
+        else:
+            event = check['data_event']
+            related = reference['signals'][0]
+            relatededge = reference['edge']
+        cond = '&'.join(str(s) for s in event['signals'][1:]) or None
+        for kind, limit in CHECKLIMITS[check['type']]:
+            yield TimingArc(
+                cell,
+                kind,
+                related,
+                event['signals'][0],
+                event['edge'],
+                relatededge,
+                cond,
+                check,
+                limit)
+
+
+class TimingDB(object):
+    '''Timing arcs of a parsed library, indexed for constant-time lookups.
+
+    Arcs are indexed by cell, by (cell, related pin, pin), by kind and by
+    edge. arcs() picks the smallest index matching the query and filters
+    the rest of the criteria while iterating - neither the index buckets nor
+    the parse results are copied, so the database must not be modified
+    while an iterator is in use.
+
+    The database can be filled while the library is parsed by setting
+    add_cell as the `onparsed` callback of the extractor::
+
+        db = TimingDB()
+        extractor.onparsed = db.add_cell
+        extractor.parse(jobs)
+        for arc in db.arcs('dff', related_pin='CLK', pin='D', kind='setup'):
+            ...
+    '''
+
+    def __init__(self):
+        # cell -> parsed entry, in the order the cells were added
+        self.cells = dict()
+        self._arcs = dict()
+        self._bycell = dict()
+        self._bypins = dict()
+        self._bykind = {kind: dict() for kind in ARC_KINDS}
+        self._byedge = dict()
+        self._ids = itertools.count()
+
+    @classmethod
+    def from_parsed(cls, parsedspecifyblocks):
+        db = cls()
+        for cell, parsedentry in parsedspecifyblocks.items():
+            db.add_cell(cell, parsedentry)
+        return db
+
+    def add_cell(self, cell, parsedentry):
+        # adds the arcs of a parsed cell, replacing the cell if it exists
+        if cell in self.cells:
+            self.remove_cell(cell)
+        self.cells[cell] = parsedentry
+        cellarcs = self._bycell[cell] = dict()
+        for arc in iter_timing_arcs(cell, parsedentry):
+            arcid = next(self._ids)
+            self._arcs[arcid] = arc
+            cellarcs[arcid] = arc
+            self._bypins.setdefault(
+                (cell, arc.related_pin, arc.pin), dict())[arcid] = arc
+            self._bykind[arc.kind][arcid] = arc
+            self._byedge.setdefault(arc.edge, dict())[arcid] = arc
+
+    def remove_cell(self, cell):
+        del self.cells[cell]
+        for arcid, arc in self._bycell.pop(cell).items():
+            del self._arcs[arcid]
+            pins = (cell, arc.related_pin, arc.pin)
+            del self._bypins[pins][arcid]
+            if not self._bypins[pins]:
+                del self._bypins[pins]
+            del self._bykind[arc.kind][arcid]
+            del self._byedge[arc.edge][arcid]
+
+    def __len__(self):
+        return len(self._arcs)
+
+    def __contains__(self, cell):
+        return cell in self.cells
+
+    def __iter__(self):
+        return iter(self._arcs.values())
+
+    def cell_arcs(self, cell):
+        return iter(self._bycell.get(cell, {}).values())
+
+    def pin_arcs(self, cell, related_pin, pin):
+        return iter(self._bypins.get((cell, related_pin, pin), {}).values())
+
+    def kind_arcs(self, kind):
+        return iter(self._bykind[kind].values())
+
+    def edge_arcs(self, edge):
+        return iter(self._byedge.get(edge, {}).values())
+
+    def arcs(self, cell=None, related_pin=None, pin=None, kind=None,
+             edge=None, cond=ANY):
+        # Iterates over the arcs matching all given criteria. cond=None
+        # selects unconditional arcs, a Condition or its text selects arcs
+        # with that condition.
+        buckets = []
+        if cell is not None:
+            if related_pin is not None and pin is not None:
+                buckets.append(self._bypins.get((cell, related_pin, pin), {}))
+            else:
+                buckets.append(self._bycell.get(cell, {}))
+        if kind is not None:
+            buckets.append(self._bykind[kind])
+        if edge is not None:
+            buckets.append(self._byedge.get(edge, {}))
+        bucket = min(buckets, key=len) if buckets else self._arcs
+        arcs = iter(bucket.values())
+        if cell is not None:
+            arcs = (arc for arc in arcs if arc.cell == cell)
+        if related_pin is not None:
+            arcs = (arc for arc in arcs if arc.related_pin == related_pin)
+        if pin is not None:
+            arcs = (arc for arc in arcs if arc.pin == pin)
+        if kind is not None:
+            arcs = (arc for arc in arcs if arc.kind == kind)
+        if edge is not None:
+            arcs = (arc for arc in arcs if arc.edge == edge)
+        if cond is None:
+            arcs = (arc for arc in arcs if arc.cond is None)
+        elif cond is not ANY:
+            text = str(cond)
+            arcs = (
+                arc for arc in arcs
+                if arc.cond is cond or
+                (arc.cond is not None and str(arc.cond) == text))
+        return arcs
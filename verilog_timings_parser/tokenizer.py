@@ -0,0 +1,164 @@
+import functools
+import itertools
+import re
+import sys
+
+from .lex import Number, SpecifyLexer, number_from_match
+
+
+def _rules():
+    # (token, regex) of SpecifyLexer in the order PLY tries them: function
+    # rules in definition order, then string rules from the longest regex to
+    # the shortest one
+    rules = []
+    for name in ('BUSNAME', 'NAME', 'REAL', 'NUMBER', 'PATHTOKEN', 'newline'):
+        rules.append((name, getattr(SpecifyLexer, 't_' + name).__doc__))
+    strings = [
+        (name[2:], value) for name, value in sorted(vars(SpecifyLexer).items())
+        if name.startswith('t_') and name != 't_ignore' and
+        isinstance(value, str)
+    ]
+    strings.sort(key=lambda rule: len(rule[1]), reverse=True)
+    return rules + strings
+
+
+def _uncaptured(regex):
+    regex = re.sub(r'\(\?P<\w+>', '(?:', regex)
+    return re.sub(r'(?<!\\)\((?!\?)', '(?:', regex)
+
+
+# classifies a single lexeme, like the PLY master regex
+_MASTER = re.compile(
+    '|'.join('(?P<{}>{})'.format(name, regex) for name, regex in _rules()),
+    re.VERBOSE)
+
+# splits the input into (ignored characters, lexeme, illegal character). PLY
+# treats t_ignore as a set of characters (brackets included) skipped before
+# any rule is tried. Lexemes are the same as the ones found by PLY, as the
+# rules are tried in the same order.
+_IGNORE = re.escape(SpecifyLexer.t_ignore)
+_LEXEMES = re.compile(
+    '([{0}]*)(?:({1})|([^{0}]))'.format(
+        _IGNORE,
+        '|'.join(_uncaptured(regex) for _, regex in _rules())),
+    re.VERBOSE)
+
+
+def _raise(error):
+    # raises `error` once the tokens before it have been consumed
+    raise error
+    yield
+
+
+class Token(object):
+    # ply.lex.LexToken with slots, printed the same way
+    __slots__ = ('type', 'value', 'lineno', 'lexpos', 'lexer')
+
+    def __init__(self, type, value, lineno, lexpos):
+        self.type = type
+        self.value = value
+        self.lineno = lineno
+        self.lexpos = lexpos
+
+    def __str__(self):
+        return 'LexToken(%s,%r,%d,%d)' % (
+            self.type, self.value, self.lineno, self.lexpos)
+
+    def __repr__(self):
+        return str(self)
+
+
+class SpecifyTokenizer(object):
+    '''Hand-written drop-in replacement of SpecifyLexer.
+
+    Produces the same tokens, values, line numbers and errors as the PLY
+    lexer. Instead of matching the master regex and calling a rule function
+    for every token, input() splits the whole block into lexemes with a
+    single findall() and looks every lexeme up in a table of (token type,
+    value) shared by all blocks - cell libraries repeat the same pin names,
+    keywords and delays over and over, so names are interned and numbers
+    converted once per distinct text. Number objects are shared between
+    tokens and must not be modified.
+
+    Errors are raised by token() when the parser reaches the offending
+    lexeme, as with the PLY lexer. Like SpecifyLexer, the object driven by
+    the parser (input(), token() and lineno) is available as `lexer` - here
+    it is the tokenizer itself.
+    '''
+
+    # the lexeme table is cleared when it grows larger than this
+    MAX_LEXEMES = 1 << 16
+
+    def __init__(self):
+        self.lexer = self
+        self.input_data = ''
+        self.lexdata = ''
+        self.lineno = 1
+        self.lexemes = dict()
+        self.token = self._end
+
+    @staticmethod
+    def _end():
+        return None
+
+    def _classify(self, text, lineno):
+        match = _MASTER.match(text)
+        kind = match.lastgroup
+        if kind == 'NAME':
+            return SpecifyLexer.reserved.get(text, 'NAME'), sys.intern(text)
+        if kind == 'REAL':
+            return 'NUMBER', Number(32, 'f', float(text))
+        if kind == 'NUMBER':
+            return 'NUMBER', number_from_match(match, lineno, text)
+        if kind == 'PATHTOKEN':
+            return kind, text == '=>'
+        return kind, text
+
+    def input(self, data):
+        # tokenizes the whole input, token() returns the tokens one by one
+        self.lexdata = data
+        tokens = []
+        append = tokens.append
+        lexemes = self.lexemes
+        lineno = self.lineno
+        pos = 0
+        error = None
+        for ignored, text, illegal in _LEXEMES.findall(data):
+            pos += len(ignored)
+            lexeme = lexemes.get(text)
+            if lexeme is None:
+                if illegal:
+                    error = SpecifyLexer.TokenizeError(
+                        'Illegal character {} at line {}'.format(
+                            illegal,
+                            lineno),
+                        lineno,
+                        illegal)
+                    break
+                try:
+                    lexeme = self._classify(text, lineno)
+                except Exception as ex:
+                    error = ex
+                    break
+                if len(lexemes) >= self.MAX_LEXEMES:
+                    lexemes.clear()
+                lexemes[text] = lexeme
+            if lexeme[0] == 'newline':
+                lineno += len(text)
+            else:
+                append(Token(lexeme[0], lexeme[1], lineno, pos))
+            pos += len(text)
+        self.lineno = lineno
+        stream = iter(tokens)
+        if error is not None:
+            stream = itertools.chain(stream, _raise(error))
+        self.token = functools.partial(next, stream, None)
+
+    def test(self, data):
+        self.input(data)
+        while True:
+            token = self.token()
+            if token:
+                print('{} : {}'.format(str(token), str(token.value)))
+            else:
+                break
@@ -1,7 +1,14 @@
 import ply.yacc as yacc
+import re
 import sys
 
+from .cache import TableCache
+from .conditions import Binary, Constant, Not, NoneOf, Paren, Signal
 from .lex import SpecifyLexer
+from .model import (
+    BusRange, ConstraintCheck, DelayList, DelayTriple, Event, PathDelay,
+    port_width)
+from .tokenizer import SpecifyTokenizer
 from collections import defaultdict
 
 
@@ -9,6 +16,8 @@ class Parser:
 
     class SpecparamRedefinitionError(Exception):
         def __init__(self, line, specparamname):
+            self.lineno = line
+            self.token = specparamname
             self.message = 'Specparam redefinition "{}" at line {}'.format(
                 specparamname, line)
 
@@ -18,6 +27,8 @@ class Parser:
 
     class SpecparamNotDeclared(Exception):
         def __init__(self, line, specparamname):
+            self.lineno = line
+            self.token = specparamname
             self.message = 'Specparam "{}" at line {} is not declared'.format(
                 specparamname, line)
 
@@ -27,14 +38,29 @@ class Parser:
 
     class IfnoneError(Exception):
         def __init__(self, line):
+            self.lineno = line
+            self.token = 'ifnone'
             self.message = 'Ifnone at line {} is corresponding to nonexistent delay path'.format(line)  # noqa: E501
 
         def __str__(self):
             if self.message:
                 return self.message
 
+    class PortWidthError(Exception):
+        def __init__(self, line, inputport, outputport):
+            self.lineno = line
+            self.token = str(inputport)
+            self.message = 'Parallel path "{} => {}" at line {} connects ports of different widths'.format(inputport, outputport, line)  # noqa: E501
+
+        def __str__(self):
+            if self.message:
+                return self.message
+
     class SyntaxError(Exception):
         def __init__(self, p):
+            # line and value of the offending token, None at EOF
+            self.lineno = p.lineno if p else None
+            self.token = p.value if p else None
             if p:
                 self.message = 'Syntax error at "{}" (line {})'.format(
                     p,
@@ -48,6 +74,8 @@ class Parser:
 
     tokens = SpecifyLexer.tokens
 
+    _busname = re.compile(SpecifyLexer.t_BUSNAME.__doc__)
+
     precedence = (
         ('left', 'PLUS', 'MINUS'),
         ('left', 'AND', 'EVAND'),
@@ -56,18 +84,70 @@ class Parser:
         ('right', 'UMINUS', 'UPLUS', 'EXCL', 'TILDA'),
     )
 
-    def __init__(self):
-        self.lexer = SpecifyLexer()
+    # tokenizer backends - the hand-written one and the PLY lexer produce
+    # the same tokens
+    LEXERS = ('fast', 'ply')
+
+    def __init__(self, tablecache=True, lexer='fast'):
+        # tablecache: True for the default on-disk table cache, a TableCache
+        # instance for a custom location, False to always build the tables
+        if tablecache is True:
+            tablecache = TableCache()
+        elif tablecache is False:
+            tablecache = None
+        if lexer == 'fast':
+            self.lexer = SpecifyTokenizer()
+        elif lexer == 'ply':
+            self.lexer = SpecifyLexer(tablecache)
+        else:
+            raise ValueError('Unknown lexer: {}'.format(lexer))
+        self.logger = yacc.PlyLogger(sys.stdout)
+        if tablecache is not None:
+            self.parser = tablecache.yacc(self, debug=False, optimize=1)
+        else:
+            self.parser = yacc.yacc(
+                module=self,
+                debug=False,
+                optimize=1,
+                write_tables=False)
+        self.stats = None
+        self._callables = None
+        self.reset()
+
+    def collect_stats(self, stats):
+        # Counts the tokens and the reduced productions of every parse into
+        # `stats`, None stops counting. Production callables are only
+        # wrapped while counting, so parsing without statistics is not slowed
+        # down.
+        if stats is None and self._callables is not None:
+            for production, callable in zip(
+                    self.parser.productions, self._callables):
+                production.callable = callable
+            self._callables = None
+        elif stats is not None and self._callables is None:
+            self._callables = [
+                production.callable for production in self.parser.productions
+            ]
+            for production in self.parser.productions:
+                if production.callable is not None:
+                    production.callable = self._counting(
+                        production.callable, production.name)
+        self.stats = stats
+
+    def _counting(self, callable, name):
+        def counted(p):
+            self.stats.productions[name] += 1
+            return callable(p)
+        return counted
+
+    def reset(self):
+        # results of the previous parse are handed over to the caller, so new
+        # containers are created instead of clearing the existing ones
         self.specparams = {}
         self.constraintchecks = []
         self.pathdelays = []
         self.ifstatements = defaultdict(list)
-        self.logger = yacc.PlyLogger(sys.stdout)
-        self.parser = yacc.yacc(
-            module=self,
-            debug=False,
-            optimize=1,
-            write_tables=False)
+        self.lexer.lexer.lineno = 1
 
     def p_specify_block(self, p):
         '''specifyblock : SPECIFY lines ENDSPECIFY'''
@@ -115,168 +195,168 @@ class Parser:
     def p_setup_entry(self, p):
         '''setup : SETUP LPAR event COMMA event COMMA delval COMMA NAME RPAR SEMI
                  | SETUP LPAR event COMMA event COMMA delval RPAR SEMI'''
-        constraint = {
-            'type': 'setup',
-            'data_event': p[3],
-            'reference_event': p[5],
-            'limit': p[7],
-            'notifier': p[9] if len(p) == 11 else None
-        }
+        constraint = ConstraintCheck(
+            type='setup',
+            data_event=p[3],
+            reference_event=p[5],
+            limit=p[7],
+            notifier=p[9] if len(p) == 11 else None
+        )
         self.constraintchecks.append(constraint)
 
     def p_hold_entry(self, p):
         '''hold : HOLD LPAR event COMMA event COMMA delval COMMA NAME RPAR SEMI
                 | HOLD LPAR event COMMA event COMMA delval RPAR SEMI'''
-        constraint = {
-            'type': 'hold',
-            'reference_event': p[3],
-            'data_event': p[5],
-            'limit': p[7],
-            'notifier': p[9] if len(p) == 11 else None
-        }
+        constraint = ConstraintCheck(
+            type='hold',
+            reference_event=p[3],
+            data_event=p[5],
+            limit=p[7],
+            notifier=p[9] if len(p) == 11 else None
+        )
         self.constraintchecks.append(constraint)
 
     def p_setuphold_entry(self, p):
         '''setuphold : SETUPHOLD LPAR event COMMA event COMMA delval COMMA delval COMMA NAME RPAR SEMI
                      | SETUPHOLD LPAR event COMMA event COMMA delval COMMA delval RPAR SEMI'''
-        constraint = {
-            'type': 'setuphold',
-            'reference_event': p[3],
-            'data_event': p[5],
-            'setup_limit': p[7],
-            'hold_limit': p[9],
-            'notifier': p[11] if len(p) == 13 else None,
-            'tstamp_cond': None,
-            'tcheck_cond': None
-        }
+        constraint = ConstraintCheck(
+            type='setuphold',
+            reference_event=p[3],
+            data_event=p[5],
+            setup_limit=p[7],
+            hold_limit=p[9],
+            notifier=p[11] if len(p) == 13 else None,
+            tstamp_cond=None,
+            tcheck_cond=None
+        )
         self.constraintchecks.append(constraint)
 
     def p_setuphold_entry_full(self, p):
         '''setuphold : SETUPHOLD LPAR event COMMA event COMMA delval COMMA delval COMMA NAME COMMA optcond COMMA optcond COMMA optcond COMMA optcond RPAR SEMI'''
-        constraint = {
-            'type': 'setuphold',
-            'reference_event': p[3],
-            'data_event': p[5],
-            'setup_limit': p[7],
-            'hold_limit': p[9],
-            'notifier': p[11],
-            'tstamp_cond': p[13],
-            'tcheck_cond': p[15],
-            'delayed_clk': p[17],
-            'delayed_data': p[19],
-        }
+        constraint = ConstraintCheck(
+            type='setuphold',
+            reference_event=p[3],
+            data_event=p[5],
+            setup_limit=p[7],
+            hold_limit=p[9],
+            notifier=p[11],
+            tstamp_cond=p[13],
+            tcheck_cond=p[15],
+            delayed_clk=p[17],
+            delayed_data=p[19],
+        )
         self.constraintchecks.append(constraint)
 
     def p_setuphold_entry_nodelayed(self, p):
         '''setuphold : SETUPHOLD LPAR event COMMA event COMMA delval COMMA delval COMMA NAME COMMA optcond COMMA optcond RPAR SEMI'''
-        constraint = {
-            'type': 'setuphold',
-            'reference_event': p[3],
-            'data_event': p[5],
-            'setup_limit': p[7],
-            'hold_limit': p[9],
-            'notifier': p[11],
-            'tstamp_cond': p[13],
-            'tcheck_cond': p[15],
-            'delayed_clk': None,
-            'delayed_data': None,
-        }
+        constraint = ConstraintCheck(
+            type='setuphold',
+            reference_event=p[3],
+            data_event=p[5],
+            setup_limit=p[7],
+            hold_limit=p[9],
+            notifier=p[11],
+            tstamp_cond=p[13],
+            tcheck_cond=p[15],
+            delayed_clk=None,
+            delayed_data=None,
+        )
         self.constraintchecks.append(constraint)
 
     def p_skew_entry(self, p):
         '''skew : SKEW LPAR event COMMA event COMMA delval COMMA NAME RPAR SEMI
                 | SKEW LPAR event COMMA event COMMA delval RPAR SEMI'''
-        constraint = {
-            'type': 'skew',
-            'reference_event': p[3],
-            'data_event': p[5],
-            'limit': p[7],
-            'notifier': p[9] if len(p) == 11 else None
-        }
+        constraint = ConstraintCheck(
+            type='skew',
+            reference_event=p[3],
+            data_event=p[5],
+            limit=p[7],
+            notifier=p[9] if len(p) == 11 else None
+        )
         self.constraintchecks.append(constraint)
 
     def p_recovery_entry(self, p):
         '''recovery : RECOVERY LPAR event COMMA event COMMA delval COMMA NAME RPAR SEMI
                     | RECOVERY LPAR event COMMA event COMMA delval RPAR SEMI'''
-        constraint = {
-            'type': 'recovery',
-            'reference_event': p[3],
-            'data_event': p[5],
-            'limit': p[7],
-            'notifier': p[9] if len(p) == 11 else None
-        }
+        constraint = ConstraintCheck(
+            type='recovery',
+            reference_event=p[3],
+            data_event=p[5],
+            limit=p[7],
+            notifier=p[9] if len(p) == 11 else None
+        )
         self.constraintchecks.append(constraint)
 
     def p_recovery_full_entry(self, p):
         '''recrem : RECOVERY LPAR event COMMA event COMMA delval COMMA delval COMMA optname COMMA optcond COMMA optcond COMMA optcond COMMA optcond RPAR SEMI
         '''
         # this is special case for recovery that looks exactly like recrem
-        constraint = {
-            'type': 'recrem',
-            'reference_event': p[3],
-            'data_event': p[5],
-            'recovery_limit': p[9],
-            'removal_limit': p[7],
-            'notifier': p[11],
-            'tstamp_cond': p[13],
-            'tcheck_cond': p[15],
-            'delayed_clk': p[17],
-            'delayed_data': p[19],
-        }
+        constraint = ConstraintCheck(
+            type='recrem',
+            reference_event=p[3],
+            data_event=p[5],
+            recovery_limit=p[9],
+            removal_limit=p[7],
+            notifier=p[11],
+            tstamp_cond=p[13],
+            tcheck_cond=p[15],
+            delayed_clk=p[17],
+            delayed_data=p[19],
+        )
         self.constraintchecks.append(constraint)
 
     def p_period_entry(self, p):
         '''period : PERIOD LPAR event COMMA delval COMMA NAME RPAR SEMI
                   | PERIOD LPAR event COMMA delval RPAR SEMI'''
-        constraint = {
-            'type': 'period',
-            'reference_event': p[3],
-            'limit': p[5],
-            'notifier': p[7] if len(p) == 9 else None
-        }
+        constraint = ConstraintCheck(
+            type='period',
+            reference_event=p[3],
+            limit=p[5],
+            notifier=p[7] if len(p) == 9 else None
+        )
         self.constraintchecks.append(constraint)
 
     def p_width_entry(self, p):
         '''width : WIDTH LPAR event COMMA delval COMMA optdelval COMMA NAME RPAR SEMI
                  | WIDTH LPAR event COMMA delval COMMA delval RPAR SEMI
                  | WIDTH LPAR event COMMA delval RPAR SEMI'''
-        constraint = {
-            'type': 'width',
-            'reference_event': p[3],
-            'width_limit': p[5],
-            'width_threshold': p[7] if len(p) >= 10 else None,
-            'notifier': p[9] if len(p) == 12 else None
-        }
+        constraint = ConstraintCheck(
+            type='width',
+            reference_event=p[3],
+            width_limit=p[5],
+            width_threshold=p[7] if len(p) >= 10 else None,
+            notifier=p[9] if len(p) == 12 else None
+        )
         self.constraintchecks.append(constraint)
 
     def p_recrem_entry(self, p):
         '''recrem : RECREM LPAR event COMMA event COMMA delval COMMA delval COMMA optname RPAR SEMI
                   | RECREM LPAR event COMMA event COMMA delval COMMA delval RPAR SEMI'''
-        constraint = {
-            'type': 'recrem',
-            'reference_event': p[3],
-            'data_event': p[5],
-            'recovery_limit': p[7],
-            'removal_limit': p[9],
-            'notifier': p[11] if len(p) == 14 else None
-        }
+        constraint = ConstraintCheck(
+            type='recrem',
+            reference_event=p[3],
+            data_event=p[5],
+            recovery_limit=p[7],
+            removal_limit=p[9],
+            notifier=p[11] if len(p) == 14 else None
+        )
         self.constraintchecks.append(constraint)
 
     def p_recrem_entry_full(self, p):
         '''recrem : RECREM LPAR event COMMA event COMMA delval COMMA delval COMMA optname COMMA optcond COMMA optcond COMMA optcond COMMA optcond RPAR SEMI
         '''
-        constraint = {
-            'type': 'recrem',
-            'reference_event': p[3],
-            'data_event': p[5],
-            'recovery_limit': p[7],
-            'removal_limit': p[9],
-            'notifier': p[11],
-            'tstamp_cond': p[13],
-            'tcheck_cond': p[15],
-            'delayed_clk': p[17],
-            'delayed_data': p[19],
-        }
+        constraint = ConstraintCheck(
+            type='recrem',
+            reference_event=p[3],
+            data_event=p[5],
+            recovery_limit=p[7],
+            removal_limit=p[9],
+            notifier=p[11],
+            tstamp_cond=p[13],
+            tcheck_cond=p[15],
+            delayed_clk=p[17],
+            delayed_data=p[19],
+        )
         self.constraintchecks.append(constraint)
 
     # PATHDELAYS block
@@ -289,118 +369,141 @@ class Parser:
         self.pathdelays.append(p[len(p) - 1])
 
     def p_pathdelay_edge(self, p):
-        '''pathdelay : LPAR edge NAME PATHTOKEN LPAR NAME RPAR RPAR EQUALS delaylist SEMI
-                     | LPAR edge NAME PATHTOKEN LPAR NAME COLON NAME RPAR RPAR EQUALS delaylist SEMI
-                     | LPAR edge NAME PATHTOKEN LPAR NAME PLUS COLON NAME RPAR RPAR EQUALS delaylist SEMI
-                     | LPAR edge NAME PATHTOKEN LPAR NAME MINUS COLON NAME RPAR RPAR EQUALS delaylist SEMI
-                     | LPAR edge NAME PATHTOKEN LPAR NAME PLUS COLON NUMBER RPAR RPAR EQUALS delaylist SEMI
-                     | LPAR edge NAME PATHTOKEN LPAR NAME MINUS COLON NUMBER RPAR RPAR EQUALS delaylist SEMI
+        '''pathdelay : LPAR edge port PATHTOKEN LPAR port RPAR RPAR EQUALS delaylist SEMI
+                     | LPAR edge port PATHTOKEN LPAR port COLON NAME RPAR RPAR EQUALS delaylist SEMI
+                     | LPAR edge port PATHTOKEN LPAR port PLUS COLON NAME RPAR RPAR EQUALS delaylist SEMI
+                     | LPAR edge port PATHTOKEN LPAR port MINUS COLON NAME RPAR RPAR EQUALS delaylist SEMI
+                     | LPAR edge port PATHTOKEN LPAR port PLUS COLON NUMBER RPAR RPAR EQUALS delaylist SEMI
+                     | LPAR edge port PATHTOKEN LPAR port MINUS COLON NUMBER RPAR RPAR EQUALS delaylist SEMI
         '''
         if p[7] == ')':
-            pathdelay = {
-                'cond': None,
-                'edge': p[2],
-                'input_port': p[3],
-                'parallel': p[4],
-                'output_port': p[6],
-                'inverted': False,
-                'source': None,
-                'delaylist': p[10]
-            }
+            pathdelay = PathDelay(
+                cond=None,
+                edge=p[2],
+                input_port=p[3],
+                parallel=p[4],
+                output_port=p[6],
+                inverted=False,
+                source=None,
+                delaylist=p[10]
+            )
         elif p[7] == ':':
-            pathdelay = {
-                'cond': None,
-                'edge': p[2],
-                'input_port': p[3],
-                'parallel': p[4],
-                'output_port': p[6],
-                'inverted': False,
-                'source': str(p[8]),
-                'delaylist': p[12]
-            }
+            pathdelay = PathDelay(
+                cond=None,
+                edge=p[2],
+                input_port=p[3],
+                parallel=p[4],
+                output_port=p[6],
+                inverted=False,
+                source=str(p[8]),
+                delaylist=p[12]
+            )
         else:
-            pathdelay = {
-                'cond': None,
-                'edge': p[2],
-                'input_port': p[3],
-                'parallel': p[4],
-                'output_port': p[6],
-                'inverted': p[7] == '-',
-                'source': str(p[9]),
-                'delaylist': p[13]
-            }
+            pathdelay = PathDelay(
+                cond=None,
+                edge=p[2],
+                input_port=p[3],
+                parallel=p[4],
+                output_port=p[6],
+                inverted=p[7] == '-',
+                source=str(p[9]),
+                delaylist=p[13]
+            )
+        self._check_widths(pathdelay, p.lineno(1))
         p[0] = pathdelay
 
     def p_pathdelay_withoutedge(self, p):
-        '''pathdelay : LPAR NAME PATHTOKEN LPAR NAME RPAR RPAR EQUALS delaylist SEMI
-                     | LPAR NAME PATHTOKEN LPAR NAME COLON NAME RPAR RPAR EQUALS delaylist SEMI
-                     | LPAR NAME PATHTOKEN LPAR NAME PLUS COLON NAME RPAR RPAR EQUALS delaylist SEMI
-                     | LPAR NAME PATHTOKEN LPAR NAME MINUS COLON NAME RPAR RPAR EQUALS delaylist SEMI
+        '''pathdelay : LPAR port PATHTOKEN LPAR port RPAR RPAR EQUALS delaylist SEMI
+                     | LPAR port PATHTOKEN LPAR port COLON NAME RPAR RPAR EQUALS delaylist SEMI
+                     | LPAR port PATHTOKEN LPAR port PLUS COLON NAME RPAR RPAR EQUALS delaylist SEMI
+                     | LPAR port PATHTOKEN LPAR port MINUS COLON NAME RPAR RPAR EQUALS delaylist SEMI
         '''
         if p[6] == ')':
-            pathdelay = {
-                'cond': None,
-                'edge': 'posedge',
-                'input_port': p[2],
-                'parallel': p[3],
-                'output_port': p[5],
-                'inverted': False,
-                'source': None,
-                'delaylist': p[9]
-            }
+            pathdelay = PathDelay(
+                cond=None,
+                edge='posedge',
+                input_port=p[2],
+                parallel=p[3],
+                output_port=p[5],
+                inverted=False,
+                source=None,
+                delaylist=p[9]
+            )
         elif p[6] == ':':
-            pathdelay = {
-                'cond': None,
-                'edge': 'posedge',
-                'input_port': p[2],
-                'parallel': p[3],
-                'output_port': p[5],
-                'inverted': False,
-                'source': p[7],
-                'delaylist': p[11]
-            }
+            pathdelay = PathDelay(
+                cond=None,
+                edge='posedge',
+                input_port=p[2],
+                parallel=p[3],
+                output_port=p[5],
+                inverted=False,
+                source=p[7],
+                delaylist=p[11]
+            )
         else:
-            pathdelay = {
-                'cond': None,
-                'edge': 'posedge',
-                'input_port': p[2],
-                'parallel': p[3],
-                'output_port': p[5],
-                'inverted': p[6] == '-',
-                'source': p[8],
-                'delaylist': p[12]
-            }
+            pathdelay = PathDelay(
+                cond=None,
+                edge='posedge',
+                input_port=p[2],
+                parallel=p[3],
+                output_port=p[5],
+                inverted=p[6] == '-',
+                source=p[8],
+                delaylist=p[12]
+            )
+        self._check_widths(pathdelay, p.lineno(1))
         p[0] = pathdelay
 
     def p_pathdelay_simple(self, p):
-        '''pathdelay : LPAR NAME PATHTOKEN NAME RPAR EQUALS delaylist SEMI
-                     | LPAR NAME PLUS PATHTOKEN NAME RPAR EQUALS delaylist SEMI
-                     | LPAR NAME MINUS PATHTOKEN NAME RPAR EQUALS delaylist SEMI
+        '''pathdelay : LPAR port PATHTOKEN port RPAR EQUALS delaylist SEMI
+                     | LPAR port PLUS PATHTOKEN port RPAR EQUALS delaylist SEMI
+                     | LPAR port MINUS PATHTOKEN port RPAR EQUALS delaylist SEMI
         '''
         if str(p[3]) not in '+-':
-            pathdelay = {
-                'cond': None,
-                'edge': None,
-                'input_port': p[2],
-                'parallel': p[3],
-                'output_port': p[4],
-                'inverted': False,
-                'source': None,
-                'delaylist': p[7]
-            }
+            pathdelay = PathDelay(
+                cond=None,
+                edge=None,
+                input_port=p[2],
+                parallel=p[3],
+                output_port=p[4],
+                inverted=False,
+                source=None,
+                delaylist=p[7]
+            )
         else:
-            pathdelay = {
-                'cond': None,
-                'edge': None,
-                'input_port': p[2],
-                'parallel': p[4],
-                'output_port': p[5],
-                'inverted': p[3] == '-',
-                'source': None,
-                'delaylist': p[8]
-            }
+            pathdelay = PathDelay(
+                cond=None,
+                edge=None,
+                input_port=p[2],
+                parallel=p[4],
+                output_port=p[5],
+                inverted=p[3] == '-',
+                source=None,
+                delaylist=p[8]
+            )
+        self._check_widths(pathdelay, p.lineno(1))
         p[0] = pathdelay
 
+    def p_port_name(self, p):
+        'port : NAME'
+        p[0] = p[1]
+
+    def p_port_bus(self, p):
+        'port : BUSNAME'
+        match = self._busname.match(p[1])
+        p[0] = BusRange(
+            match.group('busname'),
+            int(match.group('msb')),
+            int(match.group('lsb')))
+
+    def _check_widths(self, pathdelay, line):
+        # bits of parallel paths are paired one to one
+        if pathdelay['parallel'] and (
+                port_width(pathdelay['input_port']) !=
+                port_width(pathdelay['output_port'])):
+            raise self.PortWidthError(
+                line, pathdelay['input_port'], pathdelay['output_port'])
+
     # DELAY IF STATEMENTS
     # -------------------
 
@@ -425,11 +528,8 @@ class Parser:
         key = self._getifkey(condpathdelay)
         if key not in self.ifstatements:
             raise self.IfnoneError(p.lineno(1))
-        fincond = []
-        for delaypath in self.ifstatements[key]:
-            fincond.append('!({})'.format(delaypath['cond']))
-        fincond = '&'.join(fincond)
-        condpathdelay['cond'] = fincond
+        condpathdelay['cond'] = NoneOf(tuple(
+            delaypath['cond'] for delaypath in self.ifstatements[key]))
         p[0] = condpathdelay
 
     def p_lines_ifstatements(self, p):
@@ -446,16 +546,16 @@ class Parser:
     def p_delval_simple(self, p):
         '''delval : expression'''
         val = float(p[1])
-        p[0] = [val, val, val]
+        p[0] = DelayTriple(val, val, val)
 
     def p_delval_parenthesis(self, p):
         '''delval : LPAR expression COLON expression COLON expression RPAR'''
-        p[0] = [float(p[2]), float(p[4]), float(p[6])]
+        p[0] = DelayTriple(float(p[2]), float(p[4]), float(p[6]))
         # p[0] = p[2]
 
     def p_delval_mintypmax(self, p):
         '''delval : expression COLON expression COLON expression'''
-        p[0] = [float(p[1]), float(p[3]), float(p[5])]
+        p[0] = DelayTriple(float(p[1]), float(p[3]), float(p[5]))
 
     def p_optdelval(self, p):
         '''optdelval : delval
@@ -469,98 +569,23 @@ class Parser:
 
     def p_delaylist_1(self, p):
         '''delaylist : delval'''
-        p[0] = {
-            'rise': p[1],
-            'fall': p[1],
-
-            '0->Z': p[1],
-            'Z->1': p[1],
-            '1->Z': p[1],
-            'Z->0': p[1],
-
-            '0->X': p[1],
-            'X->1': p[1],
-            '1->X': p[1],
-            'X->0': p[1],
-            'X->Z': p[1],
-            'Z->X': p[1],
-        }
+        p[0] = DelayList((p[1],))
 
     def p_delaylist_2(self, p):
         '''delaylist : LPAR delval COMMA delval RPAR'''
-        p[0] = {
-            'rise': p[2],
-            'fall': p[4],
-
-            '0->Z': p[2],
-            'Z->1': p[2],
-            '1->Z': p[4],
-            'Z->0': p[4],
-
-            '0->X': p[2],
-            'X->1': p[2],
-            '1->X': p[4],
-            'X->0': p[4],
-            'X->Z': max(p[2], p[4]),
-            'Z->X': min(p[2], p[4]),
-        }
+        p[0] = DelayList((p[2], p[4]))
 
     def p_delaylist_3(self, p):
         '''delaylist : LPAR delval COMMA delval COMMA delval RPAR'''
-        p[0] = {
-            'rise': p[2],
-            'fall': p[4],
-
-            '0->Z': p[6],
-            'Z->1': p[2],
-            '1->Z': p[6],
-            'Z->0': p[4],
-
-            '0->X': min(p[2], p[6]),
-            'X->1': p[2],
-            '1->X': min(p[4], p[6]),
-            'X->0': p[4],
-            'X->Z': p[6],
-            'Z->X': min(p[2], p[4]),
-        }
+        p[0] = DelayList((p[2], p[4], p[6]))
 
     def p_delaylist_6(self, p):
         '''delaylist : LPAR delval COMMA delval COMMA delval COMMA delval COMMA delval COMMA delval RPAR'''
-        p[0] = {
-            'rise': p[2],
-            'fall': p[4],
-
-            '0->Z': p[6],
-            'Z->1': p[8],
-            '1->Z': p[10],
-            'Z->0': p[12],
-
-            '0->X': min(p[2], p[6]),
-            'X->1': max(p[2], p[8]),
-            '1->X': min(p[4], p[10]),
-            'X->0': max(p[4], p[12]),
-            'X->Z': max(p[6], p[10]),
-            'Z->X': min(p[8], p[12]),
-        }
+        p[0] = DelayList((p[2], p[4], p[6], p[8], p[10], p[12]))
 
     def p_delaylist_12(self, p):
         '''delaylist : LPAR delval COMMA delval COMMA delval COMMA delval COMMA delval COMMA delval COMMA delval COMMA delval COMMA delval COMMA delval COMMA delval COMMA delval RPAR'''
-        p[0] = {
-            'rise': p[2],
-            'fall': p[4],
-
-            '0->Z': p[6],
-            'Z->1': p[8],
-            '1->Z': p[10],
-            'Z->0': p[12],
-
-            '0->X': p[14],
-            'X->1': p[16],
-            '1->X': p[18],
-            'X->0': p[20],
-            'X->Z': p[22],
-            'Z->X': p[24],
-        }
+        p[0] = DelayList(tuple(p[i] for i in range(2, 25, 2)))
 
     # SIMPLE EXPRESSIONS
     # ------------------
@@ -577,18 +602,18 @@ class Parser:
     def p_event_entry(self, p):
         '''event : edge NAME
                  | edge evand'''
-        p[0] = {
-            'edge': p[1],
-            'signals': p[2] if type(p[2]) is list else [p[2]]
-        }
+        p[0] = Event(
+            edge=p[1],
+            signals=tuple(p[2]) if type(p[2]) is list else (p[2],)
+        )
 
     def p_event_entry_no_edge(self, p):
         '''event : NAME
                  | evand'''
-        p[0] = {
-            'edge': 'posedge',
-            'signals': p[1] if type(p[1]) is list else [p[1]]
-        }
+        p[0] = Event(
+            edge='posedge',
+            signals=tuple(p[1]) if type(p[1]) is list else (p[1],)
+        )
 
     # def p_evand_val(self, p):
     #     '''evand : NAME
@@ -667,31 +692,32 @@ class Parser:
 
     def p_cond_number(self, p):
         'cond : NUMBER'
-        p[0] = str(p[1])
+        p[0] = Constant(str(p[1]), p[1].value)
 
     def p_cond_name(self, p):
         'cond : NAME'
         if p[1] in self.specparams:
-            p[0] = str(self.specparams[p[1]])
+            value = self.specparams[p[1]]
+            p[0] = Constant(str(value), getattr(value, 'value', value))
         else:
-            p[0] = p[1]
+            p[0] = Signal(p[1])
 
     def p_cond_and(self, p):
         '''cond : cond AND cond
                 | cond EQ cond'''
-        p[0] = '{}{}{}'.format(p[1], p[2], p[3])
+        p[0] = Binary(p[2], p[1], p[3])
 
     def p_cond_par(self, p):
         '''cond : LPAR cond RPAR %prec PARENTHESIS'''
-        p[0] = '{}{}{}'.format(p[1], p[2], p[3])
+        p[0] = Paren(p[2])
 
     def p_cond_inv(self, p):
         '''cond : EXCL cond'''
-        p[0] = '{}{}'.format(p[1], p[2])
+        p[0] = Not(p[1], p[2])
 
     def p_cond_inv_tilda(self, p):
         '''cond : TILDA cond'''
-        p[0] = '{}{}'.format(p[1], p[2])
+        p[0] = Not(p[1], p[2])
 
     def p_optcond_optionalcond(self, p):
         '''optcond : cond
@@ -713,5 +739,22 @@ class Parser:
     # --------------
 
     def parse(self, s):
+        self.reset()
         self.lexer.input_data = s
-        return self.parser.parse(self.lexer.input_data)
+        if self.stats is None:
+            return self.parser.parse(
+                self.lexer.input_data,
+                lexer=self.lexer.lexer)
+        tokens = self.stats.tokens
+        lexer = self.lexer.lexer
+
+        def counted():
+            # looked up on every call, the tokenizer replaces token() on input
+            t = lexer.token()
+            if t is not None:
+                tokens[t.type] += 1
+            return t
+        return self.parser.parse(
+            self.lexer.input_data,
+            lexer=self.lexer.lexer,
+            tokenfunc=counted)